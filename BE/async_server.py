@@ -0,0 +1,403 @@
+# Asyncio serving mode: the hot read routes and /login run natively on an
+# aiomysql pool, every other route is served by the Flask app from server.py
+# (in a thread pool), so both modes expose the same routes and JSON contracts.
+#
+# Run: uvicorn async_server:app --host 0.0.0.0 --port 5000
+#  or: python3 async_server.py
+
+import contextlib
+import os
+import time
+
+import aiomysql
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+
+from db_connection.statements import STATEMENTS
+from modules.auth import HashQueueFull, check_secret_key, issue_token, verify_password
+from modules.cache import patient_cache, staff_cache
+from modules.compression import COMPRESS_MIN_SIZE, GZIP_LEVEL
+from modules.metrics import metrics
+from modules.patient import PATIENT_FIELDS, Patient, PatientGender
+from modules.query import Page, QueryArgError, date_filter, enum_filter, equals_filter, parse_fields, split_page
+from modules.staff import STAFF_FIELDS, Staff, StaffRole, StaffStatus, Ward
+from modules.versions import versions
+from repository.patients import HISTORY_BY_PATIENT, PATIENT_BY_ID, PATIENT_BY_NAME, PatientRepository
+from repository.staff import StaffRepository
+from repository.users import USER_FIELDS, UserRepository
+from server import NDJSON, app as flask_app
+
+pool = None
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global pool
+    check_secret_key()
+    pool = await aiomysql.create_pool(
+        host=os.getenv("DB_HOST"),
+        port=int(os.getenv("DB_PORT")),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        db=os.getenv("DB_NAME"),
+        minsize=int(os.getenv("DB_POOL_SIZE", "5")),
+        maxsize=int(os.getenv("DB_POOL_SIZE", "5")) + int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+        pool_recycle=int(float(os.getenv("DB_POOL_RECYCLE", "1800"))),
+        autocommit=True,
+    )
+    try:
+        yield
+    finally:
+        pool.close()
+        await pool.wait_closed()
+
+
+async def fetch_all(sql, params=()):
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(sql, params)
+            return await cursor.fetchall()
+
+
+async def fetch_one(sql, params=()):
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(sql, params)
+            return await cursor.fetchone()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded by the Flask app's provider, so both modes send identical bodies."""
+
+    def render(self, content) -> bytes:
+        return flask_app.json.dump_bytes(content)
+
+
+def error(message, status):
+    return FastJSONResponse({"error": message}, status_code=status)
+
+
+def etag_headers(etag):
+    """Same validator headers as server.tag_response."""
+    return {"ETag": quote_etag(etag, weak=True), "Cache-Control": "no-cache", "Vary": "Accept"}
+
+
+def page_response(items, next_cursor, etag=None):
+    """Same contract as server.page_response: JSON array, cursor in X-Next-Cursor."""
+    headers = etag_headers(etag) if etag is not None else {}
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = next_cursor
+    return FastJSONResponse(items, headers=headers)
+
+
+def not_modified(request, etag):
+    """Same conditional GET as server.not_modified: a 304 before any DB access, else None."""
+    if not parse_etags(request.headers.get("if-none-match")).contains_weak(etag):
+        return None
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+def wants_ndjson(request):
+    """Same content negotiation as server.wants_ndjson."""
+    accept = parse_accept_header(request.headers.get("accept"), MIMEAccept)
+    return accept.best_match(["application/json", NDJSON]) == NDJSON
+
+
+async def stream_rows(sql, params):
+    """Yield rows from an unbuffered server-side cursor on a dedicated connection."""
+    async with pool.acquire() as conn:
+        async with conn.cursor(aiomysql.SSDictCursor) as cursor:
+            await cursor.execute(sql, params)
+            while True:
+                rows = await cursor.fetchmany(500)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+
+
+async def ndjson(items):
+    async for item in items:
+        yield flask_app.json.dump_bytes(item) + b"\n"
+
+
+# http://127.0.0.1:5000/user?username=admin@hospital.com
+async def get_user_by_username(request):
+    username = request.query_params.get("username")
+    if not username:
+        return error("username is required as a query parameter.", 400)
+
+    user = await fetch_one("SELECT id, username, name FROM Users WHERE username = %s", (username,))
+    if not user:
+        return error(f"No user found with username: {username}", 404)
+    return FastJSONResponse(user)
+
+
+# http://127.0.0.1:5000/users?after=U002&limit=50
+async def get_all_users(request):
+    try:
+        page = Page.from_args(request.query_params)
+        fields = parse_fields(request.query_params, USER_FIELDS, "id")
+    except QueryArgError as e:
+        return error(str(e), 400)
+
+    sql, params = UserRepository.page_query(page, fields)
+    users, next_cursor = split_page(list(await fetch_all(sql, params)), "id", page)
+    if not users and not request.query_params:
+        return error("No users found.", 404)
+    return page_response(users, next_cursor)
+
+
+# http://127.0.0.1:5000/login
+async def login(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return error("Request body must be JSON.", 400)
+
+    username = data.get("username")
+    password = data.get("password")
+    if not username or not password:
+        return error("Username and password are required.", 400)
+
+    user = await fetch_one("SELECT id, username, password, name FROM Users WHERE username = %s", (username,))
+    if not user:
+        return error("Invalid username or password.", 401)
+
+    # Key derivation runs in the hashing process pool; wait for it off the event loop
+    try:
+        valid = await run_in_threadpool(verify_password, user["password"], password)
+    except HashQueueFull as e:
+        return FastJSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "1"})
+    if not valid:
+        return error("Invalid username or password.", 401)
+
+    user.pop("password")
+    return FastJSONResponse({"message": "Login successful!", "user": user, "token": issue_token(user)})
+
+
+# http://127.0.0.1:5000/staff?staff_id=S001
+async def get_staff_by_id(request):
+    staff_id = request.query_params.get("staff_id")
+    if not staff_id:
+        return error("staff_id is required as a query parameter.", 400)
+    try:
+        fields = parse_fields(request.query_params, STAFF_FIELDS, "staff_id")
+    except QueryArgError as e:
+        return error(str(e), 400)
+
+    # Version read once, before the data: the tag is never newer than the body
+    version = versions.get("staff", staff_id)
+    etag = versions.etag(version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    async def load():
+        row = await fetch_one("SELECT * FROM Staff WHERE staff_id = %s", (staff_id,))
+        return Staff.details_from_row(row)
+
+    if fields is None:
+        staff_data = await staff_cache.aget_or_load((staff_id, version), load, cacheable=lambda details: isinstance(details, dict))
+    else:
+        row = await fetch_one(*StaffRepository.fields_query(staff_id, fields))
+        staff_data = Staff.row_to_dict(row, fields) if row else "No staff member found."
+    if isinstance(staff_data, str):
+        return error(staff_data, 404)
+    return FastJSONResponse(staff_data, headers=etag_headers(etag))
+
+
+# http://127.0.0.1:5000/staffs?after=D003&limit=50&role=Nurse
+async def get_all_staff(request):
+    args = request.query_params
+    try:
+        page = Page.from_args(args)
+        fields = parse_fields(args, STAFF_FIELDS, "staff_id")
+        filters = (
+            enum_filter(args, "role", StaffRole)
+            + enum_filter(args, "status", StaffStatus)
+            + enum_filter(args, "ward", Ward)
+            + equals_filter(args, "department")
+        )
+    except QueryArgError as e:
+        return error(str(e), 400)
+
+    if wants_ndjson(request):
+        sql, params = StaffRepository.page_query(page, filters, lookahead=False, fields=fields)
+
+        async def staff_items():
+            async for row in stream_rows(sql, params):
+                yield Staff.row_to_dict(row, fields)
+
+        return StreamingResponse(ndjson(staff_items()), media_type=NDJSON)
+
+    etag = versions.etag(versions.get("staff"))
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    sql, params = StaffRepository.page_query(page, filters, fields=fields)
+    staff_data, next_cursor = split_page(list(await fetch_all(sql, params)), "staff_id", page)
+    if not staff_data and not args:
+        return error("No staff members found.", 404)
+    return page_response([Staff.row_to_dict(row, fields) for row in staff_data], next_cursor, etag)
+
+
+# http://127.0.0.1:5000/patient?patient_id=P001
+async def get_patient(request):
+    patient_id = request.query_params.get("patient_id")
+    name = request.query_params.get("name")
+    if not patient_id and not name:
+        return error("Provide a search parameter (patient_id or name).", 400)
+    try:
+        fields = parse_fields(request.query_params, PATIENT_FIELDS, "patient_id")
+    except QueryArgError as e:
+        return error(str(e), 400)
+
+    version = versions.get("patients", patient_id)
+    etag = versions.etag(version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    async def load():
+        async with pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                # The registered statements of the sync path, so both modes read the same history row
+                if patient_id:
+                    await cursor.execute(STATEMENTS[PATIENT_BY_ID], (patient_id,))
+                else:
+                    await cursor.execute(STATEMENTS[PATIENT_BY_NAME], (name,))
+                patient_data = await cursor.fetchone()
+                if not patient_data:
+                    return "No patient found."
+                await cursor.execute(STATEMENTS[HISTORY_BY_PATIENT], (patient_data["patient_id"],))
+                history_data = await cursor.fetchone()
+        return Patient.details_from_rows(patient_data, history_data)
+
+    if fields is not None:
+        patients = list(Patient._merge_rows(await fetch_all(*PatientRepository.fields_query(fields, patient_id, name)), fields))
+        patient = patients[0] if patients else "No patient found."
+    elif patient_id:
+        patient = await patient_cache.aget_or_load((patient_id, version), load, cacheable=lambda details: isinstance(details, dict))
+    else:
+        patient = await load()
+
+    if isinstance(patient, str):
+        return error(patient, 404)
+    return FastJSONResponse(patient, headers=etag_headers(etag))
+
+
+# http://127.0.0.1:5000/patients?after=P0100&limit=50&gender=Female
+async def get_all_patients(request):
+    args = request.query_params
+    try:
+        page = Page.from_args(args)
+        fields = parse_fields(args, PATIENT_FIELDS, "patient_id")
+        filters = (
+            enum_filter(args, "gender", PatientGender)
+            + date_filter(args, "born_after", "date_of_birth", ">=")
+            + date_filter(args, "born_before", "date_of_birth", "<=")
+        )
+    except QueryArgError as e:
+        return error(str(e), 400)
+
+    if wants_ndjson(request):
+        sql, params = PatientRepository.page_query(page, filters, lookahead=False, fields=fields)
+
+        async def patient_items():
+            # Same merge as Patient._merge_rows: the lowest history_id of each patient,
+            # whose rows arrive together but in no particular history order
+            current = None
+            async for row in stream_rows(sql, params):
+                if current is not None and row["patient_id"] == current["patient_id"]:
+                    current = Patient._lower_history(current, row)
+                    continue
+                if current is not None:
+                    yield Patient.joined_row_to_dict(current, fields)
+                current = row
+            if current is not None:
+                yield Patient.joined_row_to_dict(current, fields)
+
+        return StreamingResponse(ndjson(patient_items()), media_type=NDJSON)
+
+    etag = versions.etag(versions.get("patients"))
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    sql, params = PatientRepository.page_query(page, filters, fields=fields)
+    patients = list(Patient._merge_rows(await fetch_all(sql, params), fields))
+    patients, next_cursor = split_page(patients, "patient_id", page)
+    if not patients and not args:
+        return error("No patients found.", 404)
+    return page_response(patients, next_cursor, etag)
+
+
+native_routes = [
+    Route("/user", get_user_by_username, methods=["GET"]),
+    Route("/users", get_all_users, methods=["GET"]),
+    Route("/login", login, methods=["POST"]),
+    Route("/staff", get_staff_by_id, methods=["GET"]),
+    Route("/staffs", get_all_staff, methods=["GET"]),
+    Route("/patient", get_patient, methods=["GET"]),
+    Route("/patients", get_all_patients, methods=["GET"]),
+]
+
+
+class RequestMetrics:
+    """Latency histogram of the native routes; the mounted Flask app records its own."""
+
+    paths = {route.path for route in native_routes}
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.observe_request(scope["method"], scope["path"], status, time.perf_counter() - started)
+
+
+app = Starlette(
+    routes=[
+        *native_routes,
+        # Everything else (writes, bulk import, /metrics, ...) goes through the Flask app
+        Mount("/", app=WSGIMiddleware(flask_app)),
+    ],
+    middleware=[
+        Middleware(RequestMetrics),
+        # Native routes only in practice: the Flask app compresses (gzip/brotli) its own responses
+        Middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_SIZE, compresslevel=GZIP_LEVEL),
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"], expose_headers=["X-Next-Cursor"]),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "5000")))
@@ -0,0 +1,55 @@
+# Compare the sync Flask server with the asyncio server on the same database.
+#
+# Start both against one MySQL, e.g.
+#   python3 server.py                                  # :5000
+#   uvicorn async_server:app --port 5001 --workers 1   # :5001
+# then run from BE/:
+#   python3 -m benchmarks.async_vs_sync --sync-url http://127.0.0.1:5000 \
+#       --async-url http://127.0.0.1:5001 --concurrency 200 --duration 15
+
+import argparse
+import asyncio
+import json
+
+from benchmarks.loadgen import Scenario, ensure_user, run_scenario
+
+BENCH_USER = {"id": "UBENCH", "username": "bench@hospital.com", "password": "bench-password", "name": "Benchmark"}
+
+
+def scenarios(staff_id, page_limit):
+    return [
+        Scenario("patients", "GET", f"/patients?limit={page_limit}"),
+        Scenario("staff", "GET", f"/staff?staff_id={staff_id}"),
+        Scenario("login", "POST", "/login", {"username": BENCH_USER["username"], "password": BENCH_USER["password"]}),
+    ]
+
+
+async def main(args):
+    targets = {"sync": args.sync_url, "async": args.async_url}
+    results = {"concurrency": args.concurrency, "duration_s": args.duration, "results": {}}
+
+    await ensure_user(args.sync_url, BENCH_USER)
+
+    for scenario in scenarios(args.staff_id, args.page_limit):
+        for mode, url in targets.items():
+            summary = await run_scenario(url, scenario, args.concurrency, args.duration)
+            results["results"].setdefault(scenario.name, {})[mode] = summary
+            print(f"{scenario.name:10} {mode:6} {summary['throughput_rps']:>9} req/s  "
+                  f"p50 {summary['p50_ms']:>8} ms  p95 {summary['p95_ms']:>8} ms  "
+                  f"p99 {summary['p99_ms']:>8} ms  errors {summary['errors']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the sync and asyncio servers.")
+    parser.add_argument("--sync-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--async-url", default="http://127.0.0.1:5001")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--staff-id", default="D002")
+    parser.add_argument("--page-limit", type=int, default=50)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+# Closed-loop HTTP load generator shared by the benchmark scripts.
+
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+
+class Scenario:
+    """One request shape to replay: method, path and optional JSON body.
+
+    path and body may also be callables, called for every request (e.g. random
+    ids, or unique ids for inserts).
+    """
+
+    def __init__(self, name, method, path, body=None, expect=(200,)):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.expect = expect
+
+    def build(self):
+        path = self.path() if callable(self.path) else self.path
+        body = self.body() if callable(self.body) else self.body
+        return path, body
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    """Throughput and latency percentiles (milliseconds) of one run."""
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def run_scenario(base_url, scenario, concurrency, duration, warmup=1.0):
+    """Keep `concurrency` requests in flight for `duration` seconds after a warmup."""
+    latencies = []
+    errors = 0
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(base_url, connector=connector) as session:
+        started = time.perf_counter()
+        measure_from = started + warmup
+        stop_at = measure_from + duration
+
+        async def worker():
+            nonlocal errors
+            while True:
+                path, body = scenario.build()
+                sent = time.perf_counter()
+                if sent >= stop_at:
+                    return
+                try:
+                    async with session.request(scenario.method, path, json=body) as response:
+                        await response.read()
+                        ok = response.status in scenario.expect
+                except aiohttp.ClientError:
+                    ok = False
+                done = time.perf_counter()
+                if sent < measure_from:
+                    continue
+                if ok:
+                    latencies.append(done - sent)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return summarize(latencies, errors, duration)
+
+
+async def ensure_user(base_url, user):
+    """Create the benchmark login user through the API; an existing one is fine."""
+    async with aiohttp.ClientSession(base_url) as session:
+        async with session.post("/user/add", json=user) as response:
+            await response.read()
@@ -0,0 +1,145 @@
+# Seed the database with generated benchmark data, straight through the bulk
+# insert path (no HTTP). Rows get their own id prefixes so --reset only removes
+# benchmark data and leaves the demo rows of init.sql alone.
+#
+# Run from BE/ with the DB_* environment of the server:
+#   python3 -m benchmarks.seed --patients 100000 --staff 2000 --users 500 --reset
+# Against a running server, also pass the VERSIONS_FILE and EVENTS_FILE of its
+# master (/tmp/hms-versions-<pid>, /tmp/hms-events-<pid>) so that its ETags move
+# on and /events clients reload; cached single entities expire within
+# ENTITY_CACHE_TTL either way.
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from db_connection.db import get_db_connection
+from modules.bulk import bulk_insert
+from modules.patient import Patient
+from modules.staff import Staff, StaffRole, StaffStatus, Ward
+from repository.patients import PATIENT_BULK_STATEMENTS, PatientRepository
+from repository.staff import STAFF_BULK_STATEMENTS, StaffRepository
+from repository.users import USER_INSERT_SQL
+
+PATIENT_PREFIX = "BP"    # seeded patients
+NEW_PATIENT_PREFIX = "BN"  # patients created by the /patient/add scenario
+STAFF_PREFIX = "BS"
+USER_PREFIX = "BU"
+
+USER_PASSWORD = "bench-password"
+
+FIRST_NAMES = ["John", "Jane", "Alice", "Bob", "Minh", "Linh", "Carlos", "Maria", "Wei", "Aisha", "Omar", "Emma", "Lucas", "Sofia", "Hiro", "Nadia"]
+LAST_NAMES = ["Smith", "Nguyen", "Garcia", "Tran", "Johnson", "Lee", "Brown", "Kim", "Pham", "Muller", "Rossi", "Khan", "Silva", "Sato"]
+CONDITIONS = ["Hypertension", "Diabetes", "Asthma", "Migraine", "Arthritis", "Healthy", "Anemia", "Bronchitis"]
+ALLERGIES = ["Penicillin", "Peanuts", "Latex", "Pollen", "Dust", "Shellfish", "Aspirin", "None"]
+DEPARTMENTS = ["Cardiology", "Neurology", "Pediatrics", "Oncology", "Emergency", "Orthopedics"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def patient_id(i: int) -> str:
+    return f"{PATIENT_PREFIX}{i:07d}"
+
+
+def staff_id(i: int) -> str:
+    return f"{STAFF_PREFIX}{i:06d}"
+
+
+def username(i: int) -> str:
+    return f"bench{i}@bench.local"
+
+
+def patient_records(count: int, rng: random.Random):
+    for i in range(count):
+        yield {
+            "patient_id": patient_id(i),
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "gender": rng.choice(["Male", "Female", "Other"]),
+            "date_of_birth": (date(1940, 1, 1) + timedelta(days=rng.randrange(30000))).isoformat(),
+            "contact_info": f"09{rng.randrange(10 ** 8):08d}",
+            "condition": rng.choice(CONDITIONS),
+            "allergies": rng.sample(ALLERGIES, rng.randint(1, 3)),
+        }
+
+
+def staff_records(count: int, rng: random.Random):
+    for i in range(count):
+        role = rng.choice(list(StaffRole)).value
+        yield {
+            "staff_id": staff_id(i),
+            "name": f"{'Dr.' if role == 'Doctor' else 'Nurse'} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "contact_info": f"08{rng.randrange(10 ** 8):08d}",
+            "role": role,
+            "status": rng.choice([StaffStatus.ACTIVE.value] * 9 + [StaffStatus.INACTIVE.value]),
+            "specialization": rng.choice(DEPARTMENTS) if role == "Doctor" else None,
+            "department": rng.choice(DEPARTMENTS),
+            "ward": rng.choice(list(Ward)).value,
+            "shift": [[day, rng.choice(["Day", "Night"])] for day in rng.sample(DAYS, 3)],
+        }
+
+
+def user_records(count: int):
+    # One hash for every user: login still pays for the full verification per request
+    password_hash = generate_password_hash(USER_PASSWORD)
+    for i in range(count):
+        yield {"id": f"{USER_PREFIX}{i:06d}", "username": username(i), "password": password_hash, "name": f"Bench User {i}"}
+
+
+def reset():
+    """Delete every benchmark row (child rows cascade)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        "DELETE FROM Patient WHERE patient_id LIKE %s OR patient_id LIKE %s",
+        (f"{PATIENT_PREFIX}%", f"{NEW_PATIENT_PREFIX}%")
+    )
+    cursor.execute("DELETE FROM Staff WHERE staff_id LIKE %s", (f"{STAFF_PREFIX}%",))
+    cursor.execute("DELETE FROM Users WHERE id LIKE %s", (f"{USER_PREFIX}%",))
+    conn.commit()
+    cursor.close()
+    conn.close()
+    PatientRepository.notify_bulk_write()
+    StaffRepository.notify_bulk_write()
+
+
+def seed(patients: int, staff: int, users: int, batch_size: int = 1000, random_seed: int = 42) -> dict:
+    """Insert the requested volumes; the same random_seed always generates the same rows."""
+    rng = random.Random(random_seed)
+    report = {}
+    for name, records, prepare, statements, key, notify in (
+        ("patients", patient_records(patients, rng), Patient.bulk_params, PATIENT_BULK_STATEMENTS, "patient_id",
+         PatientRepository.notify_bulk_write),
+        ("staff", staff_records(staff, rng), Staff.bulk_params, STAFF_BULK_STATEMENTS, "staff_id",
+         StaffRepository.notify_bulk_write),
+        ("users", user_records(users), lambda r: {"user": (r["id"], r["username"], r["password"], r["name"])},
+         [("user", USER_INSERT_SQL)], "id", None),
+    ):
+        started = time.perf_counter()
+        try:
+            result = bulk_insert(records, prepare, statements, key, batch_size=batch_size)
+        finally:
+            if notify:
+                notify()
+        elapsed = time.perf_counter() - started
+        report[name] = {"inserted": result["inserted"], "failed": result["failed"], "seconds": round(elapsed, 2)}
+        print(f"{name:9} {result['inserted']:>8} inserted  {result['failed']:>6} failed  {elapsed:7.2f}s")
+        for error in result["errors"][:3]:
+            print(f"          {error}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed benchmark data.")
+    parser.add_argument("--patients", type=int, default=10000)
+    parser.add_argument("--staff", type=int, default=500)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="delete earlier benchmark rows first")
+    args = parser.parse_args()
+
+    if args.reset:
+        reset()
+    seed(args.patients, args.staff, args.users, args.batch_size, args.random_seed)
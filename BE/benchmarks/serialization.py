@@ -0,0 +1,142 @@
+# Microbenchmark of the response path of GET /patients and /staffs without a
+# database: conversion of result rows to response dicts through the model
+# objects and through the direct row serializers, JSON encoding of a patient
+# list with Flask's default provider and with every FastJSONProvider encoder,
+# then gzip / brotli compression of the body.
+#
+# Run from BE/:
+#   python3 -m benchmarks.serialization --rows 50000 --repeat 5 --output benchmarks/results/serialization.json
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import date
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks import seed
+from modules.compression import CODINGS
+from modules.fastjson import ENCODERS, JSON_ENCODER, FastJSONProvider
+from modules.patient import GENDER_BY_VALUE, MedicalHistory, Patient
+from modules.staff import Staff
+
+
+def patient_rows(rows: int, random_seed: int = 42) -> list:
+    """`rows` PATIENT_WITH_HISTORY_SQL rows, as the cursor returns them."""
+    return [
+        {
+            **record,
+            "date_of_birth": date.fromisoformat(record["date_of_birth"]),
+            "history_id": f"H{i:09d}",
+            "allergies": ",".join(record["allergies"]),
+        }
+        for i, record in enumerate(seed.patient_records(rows, random.Random(random_seed)))
+    ]
+
+
+def staff_rows(rows: int, random_seed: int = 42) -> list:
+    """`rows` raw Staff rows, shift as the stored JSON text."""
+    return [
+        {**record, "shift": json.dumps(record["shift"])}
+        for record in seed.staff_records(rows, random.Random(random_seed))
+    ]
+
+
+def patient_from_joined_row(row) -> Patient:
+    """Build a Patient (and its MedicalHistory) from a PATIENT_WITH_HISTORY_SQL row, as the list path did."""
+    medical_history = MedicalHistory(
+        history_id=row["history_id"],
+        patient_id=row["patient_id"],
+        condition=row["condition"],
+        allergies=row["allergies"].split(",") if row["allergies"] else []
+    ) if row["history_id"] else None
+
+    return Patient(
+        patient_id=row["patient_id"],
+        name=row["name"],
+        gender=GENDER_BY_VALUE.get(row["gender"]),
+        date_of_birth=str(row["date_of_birth"]),
+        contact_info=row["contact_info"],
+        medical_history=medical_history
+    )
+
+
+def object_size(obj) -> int:
+    """Bytes of an object plus its instance __dict__, if it has one."""
+    return sys.getsizeof(obj) + (sys.getsizeof(obj.__dict__) if hasattr(obj, "__dict__") else 0)
+
+
+# (name, rows, object path, direct path, intermediate objects of one row)
+CONVERSIONS = [
+    ("patients", patient_rows, lambda row: patient_from_joined_row(row).to_dict(), Patient.joined_row_to_dict,
+     lambda row: (lambda patient: [patient, patient.medical_history])(patient_from_joined_row(row))),
+    ("staff", staff_rows, lambda row: Staff.from_list_row(row).to_dict(), Staff.row_to_dict,
+     lambda row: [Staff.from_list_row(row)]),
+]
+
+
+def compare_conversions(rows: int, repeat: int, results: dict):
+    for name, make_rows, via_objects, direct, intermediates in CONVERSIONS:
+        data = make_rows(rows)
+        assert [via_objects(row) for row in data[:100]] == [direct(row) for row in data[:100]]
+        object_bytes = sum(object_size(obj) for obj in intermediates(data[0]))
+        for path, convert, allocated in (("objects", via_objects, object_bytes), ("direct", direct, 0)):
+            _, seconds = timed(lambda: [convert(row) for row in data], repeat)
+            results["conversion"][f"{name}/{path}"] = {
+                "us_per_row": round(seconds / rows * 1e6, 3),
+                "model_bytes_per_row": allocated,
+            }
+            print(f"{name + '/' + path:18} {seconds / rows * 1e6:7.2f} us/row  {allocated:5} B/row of model objects")
+
+
+def timed(fn, repeat: int):
+    """(result, median seconds) of repeat calls."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return result, statistics.median(times)
+
+
+def main(args):
+    app = Flask(__name__)
+    results = {"rows": args.rows, "repeat": args.repeat, "conversion": {}, "encoders": {}, "compression": {}}
+    compare_conversions(args.rows, args.repeat, results)
+
+    patients = [Patient.joined_row_to_dict(row) for row in patient_rows(args.rows)]
+
+    providers = {"flask-default": DefaultJSONProvider(app)}
+    providers.update({name: FastJSONProvider(app, name) for name in ENCODERS})
+    baseline = body = None
+    with app.app_context():
+        for name, provider in providers.items():
+            response, seconds = timed(lambda: provider.response(patients), args.repeat)
+            data = response.get_data()
+            baseline = baseline or seconds
+            results["encoders"][name] = {"seconds": round(seconds, 4), "bytes": len(data), "speedup": round(baseline / seconds, 2)}
+            print(f"{name:14} {seconds * 1000:9.1f} ms  {len(data):>11} bytes  x{baseline / seconds:5.2f}")
+            if name == JSON_ENCODER:
+                body = data  # what the server sends with the current settings
+
+    for coding, (compress, _) in CODINGS.items():
+        compressed, seconds = timed(lambda: compress(body), args.repeat)
+        ratio = len(compressed) / len(body)
+        results["compression"][coding] = {"seconds": round(seconds, 4), "bytes": len(compressed), "ratio": round(ratio, 3)}
+        print(f"{coding:14} {seconds * 1000:9.1f} ms  {len(compressed):>11} bytes  {ratio:6.1%} of the JSON body")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Row conversion, JSON encoding and compression microbenchmark of the list endpoints.")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    main(parser.parse_args())
@@ -0,0 +1,136 @@
+# HTTP benchmark of the main endpoints against a running server.
+#
+# Seed (optional) and run from BE/, with the server started on the same database:
+#   python3 -m benchmarks.suite --url http://127.0.0.1:5000 --seed --patients 100000 \
+#       --concurrency 1,16,64 --duration 15 --output benchmarks/results/$(git rev-parse --short HEAD).json
+# Compare with an earlier run:
+#   python3 -m benchmarks.suite --baseline benchmarks/results/abc1234.json ...
+#
+# --seed needs the DB_* environment of the server; without it the data of an
+# earlier seed run is used, with the same --patients/--staff/--users counts.
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+
+from benchmarks import seed
+from benchmarks.loadgen import Scenario, run_scenario
+
+SCENARIOS = ("patients", "patient", "staffs", "staff_update", "login", "patient_add")
+
+
+def scenarios(args):
+    rng = random.Random()
+    new_ids = itertools.count()
+    run_tag = f"{int(time.time()) % 100000:05d}"
+
+    def random_patient():
+        return f"/patient?patient_id={seed.patient_id(rng.randrange(args.patients))}"
+
+    def staff_update():
+        return {"staff_id": seed.staff_id(rng.randrange(args.staff)), "contact_info": f"07{rng.randrange(10 ** 8):08d}"}
+
+    def login():
+        return {"username": seed.username(rng.randrange(args.users)), "password": seed.USER_PASSWORD}
+
+    def new_patient():
+        return {
+            "patient_id": f"{seed.NEW_PATIENT_PREFIX}{run_tag}{next(new_ids):09d}",
+            "name": "Bench Patient",
+            "gender": "Other",
+            "date_of_birth": "1990-01-01",
+            "contact_info": "0900000000",
+            "condition": "Healthy",
+            "allergies": ["None"],
+        }
+
+    return {
+        "patients": Scenario("patients", "GET", f"/patients?limit={args.page_limit}"),
+        "patient": Scenario("patient", "GET", random_patient),
+        "staffs": Scenario("staffs", "GET", f"/staffs?limit={args.page_limit}"),
+        "staff_update": Scenario("staff_update", "PUT", "/staff/update_info", staff_update),
+        "login": Scenario("login", "POST", "/login", login),
+        "patient_add": Scenario("patient_add", "POST", "/patient/add", new_patient, expect=(201,)),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    """Print throughput and p95 changes against an earlier results file."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_path} ({baseline.get('commit')})")
+    for name, runs in results["results"].items():
+        for concurrency, summary in runs.items():
+            before = baseline.get("results", {}).get(name, {}).get(concurrency)
+            if not before:
+                continue
+            rps = (summary["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0.0
+            p95 = (summary["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+            print(f"{name:13} c={concurrency:>4}  throughput {rps:+7.1f}%  p95 {p95:+7.1f}%")
+
+
+async def main(args):
+    selected = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    results = {
+        "commit": git_commit(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "url": args.url,
+        "host": {"python": platform.python_version(), "cpus": os.cpu_count()},
+        "volumes": {"patients": args.patients, "staff": args.staff, "users": args.users},
+        "duration_s": args.duration,
+        "results": {},
+    }
+    if args.seed:
+        seed.reset()
+        results["seed"] = seed.seed(args.patients, args.staff, args.users)
+
+    available = scenarios(args)
+    for name in selected:
+        for concurrency in args.concurrency:
+            summary = await run_scenario(args.url, available[name], concurrency, args.duration, args.warmup)
+            results["results"].setdefault(name, {})[str(concurrency)] = summary
+            print(f"{name:13} c={concurrency:>4} {summary['throughput_rps']:>9} req/s  "
+                  f"p50 {summary['p50_ms']:>8} ms  p95 {summary['p95_ms']:>8} ms  "
+                  f"p99 {summary['p99_ms']:>8} ms  errors {summary['errors']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load and latency benchmark of the HTTP API.")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--seed", action="store_true", help="reset and seed the benchmark rows first")
+    parser.add_argument("--patients", type=int, default=10000)
+    parser.add_argument("--staff", type=int, default=500)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--scenarios", help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=lambda value: [int(c) for c in value.split(",")], default=[1, 16, 64],
+                        help="comma-separated concurrency levels (default 1,16,64)")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--page-limit", type=int, default=50)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    asyncio.run(main(parser.parse_args()))
@@ -1,11 +1,32 @@
 # db_connection.py
 
+import contextlib
 import mysql.connector
+from mysql.connector.constants import ClientFlag
 import os
+import sqlite3
+import threading
+import time
 from dotenv import load_dotenv
+from flask import g, has_app_context
 
-# Database connection function
-def get_db_connection():
+from db_connection.pool import ConnectionPool
+from modules.metrics import InstrumentedCursor
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# DB_BACKEND=sqlite runs the API on the embedded SQLite backend (db_connection.sqlite)
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").lower()
+
+# Driver errors of either backend, for handlers that turn them into responses
+DB_ERRORS = (mysql.connector.Error, sqlite3.Error)
+
+
+def _connect():
+    if DB_BACKEND == "sqlite":
+        from db_connection import sqlite
+        return sqlite.connect()
     return mysql.connector.connect(
         # host="172.17.0.2", # inside the network of Docker port 3306 inside docker network
         # host="mysql-hospital",
@@ -17,5 +38,180 @@ def get_db_connection():
         port=int(os.getenv("DB_PORT")),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
+        database=os.getenv("DB_NAME"),
+        # Handlers share one connection per request, so a half-read cursor
+        # must never block the next query on the same connection.
+        buffered=True,
+        # rowcount of an UPDATE counts matched rows, so it doubles as an existence check
+        client_flags=[ClientFlag.FOUND_ROWS],
     )
+
+
+def get_pool():
+    """Return the process-wide pool, creating it on first use (and after fork)."""
+    global _pool
+    pool = _pool
+    if pool is None or pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = ConnectionPool(
+                    _connect,
+                    size=int(os.getenv("DB_POOL_SIZE", "5")),
+                    max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+                    timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+                    recycle=float(os.getenv("DB_POOL_RECYCLE", "1800")),
+                    ping_interval=float(os.getenv("DB_POOL_PING_INTERVAL", "5")),
+                )
+            pool = _pool
+    return pool
+
+
+def reset_pool():
+    """Forget the pool inherited from a parent process (call after fork).
+
+    The parent's sockets are dropped, not closed, so the parent keeps working.
+    """
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def get_pool_stats():
+    """Checkout wait time, in-use count and other counters of the pool."""
+    return get_pool().stats()
+
+
+class _InstrumentedConnection:
+    """Connection whose cursors count and time their queries into the request's stats."""
+
+    def __init__(self, conn, stats=None, route=None):
+        self._conn = conn
+        self._stats = stats
+        self._route = route
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conn.cursor(*args, **kwargs)
+        if self._stats is None:
+            return cursor
+        return InstrumentedCursor(cursor, self._stats, self._route)
+
+    def prepared(self, name):
+        cursor = self._conn.prepared(name)
+        if self._stats is None:
+            return cursor
+        return InstrumentedCursor(cursor, self._stats, self._route)
+
+    def close(self):
+        self._conn.close()
+
+
+class _RequestConnection(_InstrumentedConnection):
+    """Request-scoped handle; close() is a no-op, the teardown releases it.
+
+    Inside transaction() commit() is a no-op too, and after_commit callbacks
+    wait in `deferred` until the transaction commits.
+    """
+
+    deferred = None
+
+    def commit(self):
+        if self.deferred is None:
+            self._conn.commit()
+
+    def close(self):
+        pass
+
+
+def _checkout():
+    """Pooled connection, with the wait for it added to the request's stats."""
+    stats = g.get("_request_stats")
+    started = time.perf_counter()
+    try:
+        conn = get_pool().connect()
+    finally:
+        if stats is not None:
+            stats.acquire_time += time.perf_counter() - started
+    return conn, stats, g.get("_metrics_route")
+
+
+# Database connection function
+def get_db_connection():
+    """Pooled connection; inside a Flask request every call shares one."""
+    if not has_app_context():
+        return get_pool().connect()
+
+    conn = g.get("_db_conn")
+    if conn is None:
+        conn = g._db_conn = _RequestConnection(*_checkout())
+    return conn
+
+
+def get_stream_connection():
+    """Dedicated pooled connection outside the request scope, for streamed responses.
+
+    The generator that uses it must close() it when it is done.
+    """
+    if not has_app_context():
+        return get_pool().connect()
+    return _InstrumentedConnection(*_checkout())
+
+
+def _request_connection():
+    return g.get("_db_conn") if has_app_context() else None
+
+
+def in_transaction() -> bool:
+    """True inside transaction(); loads made there may see uncommitted rows and must not be cached."""
+    conn = _request_connection()
+    return conn is not None and conn.deferred is not None
+
+
+def after_commit(callback, *args):
+    """Run callback(*args) once the caller's writes are committed.
+
+    That is right away, except inside transaction(), where callbacks wait for the
+    final commit and are dropped on rollback.
+    """
+    conn = _request_connection()
+    if conn is not None and conn.deferred is not None:
+        conn.deferred.append((callback, args))
+    else:
+        callback(*args)
+
+
+@contextlib.contextmanager
+def transaction():
+    """Run every repository call of the block on the request's connection as one transaction.
+
+    The repositories' own commits are deferred to the end of the block; an exception
+    rolls everything back. Not reentrant.
+    """
+    conn = get_db_connection()
+    if conn.deferred is not None:
+        raise RuntimeError("transaction() is already open on this request.")
+    conn.deferred = deferred = []
+    try:
+        yield conn
+    except BaseException:
+        conn.deferred = None
+        conn._conn.rollback()
+        raise
+    conn.deferred = None
+    conn._conn.commit()
+    for callback, args in deferred:
+        callback(*args)
+
+
+def release_db_connection(exc=None):
+    """Return the request's connection to the pool (teardown handler)."""
+    conn = g.pop("_db_conn", None) if has_app_context() else None
+    if conn is not None:
+        conn._conn.close()
+
+
+def init_app(app):
+    """Register the per-request connection teardown on a Flask app."""
+    app.teardown_appcontext(release_db_connection)
@@ -0,0 +1,285 @@
+# Versioned schema migrations.
+#
+# Migrations live in BE/migrations as NNN_description.sql or NNN_description.py
+# (a module with an upgrade(conn) function) and are applied in version order.
+# Applied versions are recorded in the schema_migrations table, and errors that
+# only mean "this is already in place" are skipped, so the runner can be
+# pointed at a fresh database created from database/init.sql as well as at an
+# old one.
+#
+# Run from BE/:
+#   python3 -m db_connection.migrate            # apply pending migrations
+#   python3 -m db_connection.migrate --status   # list applied / pending versions
+#   python3 -m db_connection.migrate --check    # EXPLAIN the hot queries, fail on full scans and filesorts
+
+import argparse
+import importlib.util
+import os
+import re
+import sys
+import time
+
+import mysql.connector
+
+from db_connection.db import DB_BACKEND, get_db_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.(sql|py)$")
+
+# Table exists, duplicate column, duplicate key name, can't drop missing column/key
+IDEMPOTENT_ERRORS = {1050, 1060, 1061, 1091}
+
+# Serializes runners started at the same time (e.g. several containers)
+LOCK_NAME = "hms_schema_migrations"
+LOCK_TIMEOUT = 60
+
+SCHEMA_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+class Migration:
+    def __init__(self, version: int, name: str, path: str):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    @property
+    def kind(self) -> str:
+        return os.path.splitext(self.path)[1][1:]
+
+
+def discover(directory: str = MIGRATIONS_DIR):
+    """Migration files of the directory, sorted by version."""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise RuntimeError(f"Duplicate migration version {version}: {migrations[version].name} and {filename}")
+        migrations[version] = Migration(version, filename, os.path.join(directory, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def split_statements(sql: str):
+    """Split a migration script on statement-ending semicolons, dropping comment lines."""
+    statements, current = [], []
+    for line in sql.splitlines():
+        if line.strip().startswith("--"):
+            continue
+        current.append(line)
+        if line.rstrip().endswith(";"):
+            statement = "\n".join(current).strip().rstrip(";").strip()
+            if statement:
+                statements.append(statement)
+            current = []
+    tail = "\n".join(current).strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def applied_versions(cursor):
+    cursor.execute(SCHEMA_TABLE_SQL)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {version for (version,) in cursor.fetchall()}
+
+
+def _run_sql(conn, migration: Migration):
+    with open(migration.path, encoding="utf-8") as f:
+        statements = split_statements(f.read())
+
+    cursor = conn.cursor()
+    for statement in statements:
+        try:
+            cursor.execute(statement)
+        except mysql.connector.Error as e:
+            if e.errno not in IDEMPOTENT_ERRORS:
+                raise
+            print(f"  skipped (already applied): {e.msg}")
+    cursor.close()
+
+
+def _run_python(conn, migration: Migration):
+    spec = importlib.util.spec_from_file_location(f"migrations.m{migration.version:03d}", migration.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.upgrade(conn)
+
+
+def apply_migration(conn, migration: Migration):
+    """Apply one migration and record its version."""
+    if migration.kind == "sql":
+        _run_sql(conn, migration)
+    else:
+        _run_python(conn, migration)
+
+    cursor = conn.cursor()
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+        (migration.version, migration.name)
+    )
+    conn.commit()
+    cursor.close()
+
+
+def wait_for_db(timeout: float):
+    """Connect, retrying while the database is still starting up."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return get_db_connection()
+        except mysql.connector.Error as e:
+            if time.monotonic() >= deadline:
+                raise
+            print(f"Waiting for the database: {e.msg}")
+            time.sleep(2)
+
+
+def migrate(conn, migrations=None):
+    """Apply every pending migration in order; returns the versions applied."""
+    migrations = discover() if migrations is None else migrations
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+    if cursor.fetchone()[0] != 1:
+        raise RuntimeError("Another migration run holds the schema lock.")
+
+    applied = []
+    try:
+        done = applied_versions(cursor)
+        for migration in migrations:
+            if migration.version in done:
+                continue
+            print(f"Applying {migration.name}")
+            apply_migration(conn, migration)
+            applied.append(migration.version)
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+    return applied
+
+
+def status(conn):
+    cursor = conn.cursor()
+    done = applied_versions(cursor)
+    cursor.close()
+    for migration in discover():
+        print(f"{'applied' if migration.version in done else 'pending':8} {migration.name}")
+    return 0
+
+
+def hot_queries():
+    """(name, sql, params) of the queries behind the hot endpoints, built with the same helpers."""
+    from modules.query import Page, select_page
+    from db_connection.statements import STATEMENTS
+    from repository.patients import (
+        HISTORY_BY_PATIENT, PATIENT_BY_ID, PATIENT_BY_NAME, PATIENT_HISTORY_FILTER, PATIENT_WITH_HISTORY_SQL,
+        PatientRepository,
+    )
+
+    page = Page(limit=50)
+    patients_by_allergy, allergy_params = select_page(
+        "PatientAllergy a JOIN Patient p ON p.patient_id = a.patient_id",
+        "a.patient_id", page, [("a.allergy = %s", "Peanuts")], columns="p.*"
+    )
+    return [
+        ("login", "SELECT * FROM Users WHERE username = %s", ("admin@hospital.com",)),
+        ("users page", *select_page("Users", "id", page, columns="id, username, name")),
+        ("staff by id", "SELECT * FROM Staff WHERE staff_id = %s", ("D001",)),
+        ("staff page", *select_page("Staff", "staff_id", page)),
+        ("staff by role/status", *select_page("Staff", "staff_id", page, [("role = %s", "Doctor"), ("status = %s", "active")])),
+        ("staff by ward", *select_page("Staff", "staff_id", page, [("ward = %s", "ICU")])),
+        ("staff by department", *select_page("Staff", "staff_id", page, [("department = %s", "Cardiology")])),
+        ("staff on duty", *select_page(
+            "StaffShift r JOIN Staff s ON s.staff_id = r.staff_id", "r.staff_id", page,
+            [("r.day = %s", "Monday"), ("r.shift_type = %s", "Day")], columns="s.*"
+        )),
+        ("patient by id", STATEMENTS[PATIENT_BY_ID], ("P001",)),
+        ("patient by name", STATEMENTS[PATIENT_BY_NAME], ("John Doe",)),
+        ("history by patient", STATEMENTS[HISTORY_BY_PATIENT], ("P001",)),
+        ("patients page", *PatientRepository.page_query(page)),
+        ("patients by gender/birth", *PatientRepository.page_query(page, [("gender = %s", "Female"), ("date_of_birth >= %s", "1990-01-01")])),
+        ("patients by birth", *PatientRepository.page_query(page, [("date_of_birth >= %s", "1990-01-01")])),
+        ("patients page, id and name", *PatientRepository.page_query(page, fields=["patient_id", "name"])),
+        ("patients stream", *PatientRepository.page_query(Page(), lookahead=False)),
+        ("patients by allergy", PATIENT_WITH_HISTORY_SQL.format(patients=f"({patients_by_allergy})"), allergy_params),
+        ("patient name prefix", "SELECT patient_id, name, date_of_birth FROM Patient WHERE name LIKE %s ORDER BY name LIMIT %s", ("Jo%", 10)),
+        ("patient name trigrams",
+         "SELECT patient_id, COUNT(*) AS hits FROM PatientNameTrigram WHERE trigram IN (%s, %s, %s) "
+         "GROUP BY patient_id HAVING hits >= %s ORDER BY hits DESC LIMIT %s",
+         ("  j", " jo", "joh", 2, 50)),
+        ("update patient", "UPDATE Patient SET contact_info = %s WHERE patient_id = %s", ("x", "P001")),
+        ("update history", f"UPDATE MedicalHistory SET `condition` = %s WHERE {PATIENT_HISTORY_FILTER}", ("x", "P001")),
+        ("delete history", "DELETE FROM MedicalHistory WHERE patient_id = %s", ("P001",)),
+    ]
+
+
+# Hot queries that sort by design: the grouped trigram hits, and the rows matching a
+# date range (no index serves both the range and the patient_id order)
+SORTING_QUERIES = {"patient name trigrams", "patients by gender/birth", "patients by birth"}
+
+
+def check(conn, min_rows: int = 0):
+    """EXPLAIN every hot query; returns 1 when any of them scans a whole table or filesorts it.
+
+    Derived tables (`<derived2>`) are materialized page results, not base tables, and
+    are not counted. Tables estimated below min_rows rows are allowed to be scanned
+    and sorted, since the optimizer prefers a scan over an index on tiny tables.
+    """
+    cursor = conn.cursor(dictionary=True)
+    failures = 0
+    for name, sql, params in hot_queries():
+        cursor.execute("EXPLAIN " + sql, params)
+        for row in cursor.fetchall():
+            table = row.get("table") or ""
+            base_table = not table.startswith("<") and (row.get("rows") or 0) >= min_rows
+            full_scan = base_table and row.get("type") == "ALL"
+            filesort = base_table and "Using filesort" in (row.get("Extra") or "") and name not in SORTING_QUERIES
+            problem = "FULL SCAN" if full_scan else "FILESORT" if filesort else "ok"
+            failures += problem != "ok"
+            print(f"{problem:9} {name:26} {table:14} "
+                  f"type={row.get('type')} key={row.get('key')} rows={row.get('rows')} extra={row.get('Extra')}")
+    cursor.close()
+
+    if failures:
+        print(f"{failures} full table scan(s) or filesort(s) on hot queries.")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply schema migrations.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    mode.add_argument("--check", action="store_true", help="EXPLAIN the hot queries and fail on full table scans and filesorts")
+    parser.add_argument("--min-rows", type=int, default=0, help="with --check, ignore scans of tables estimated below this many rows")
+    parser.add_argument("--wait", type=float, default=0, help="seconds to wait for the database to come up")
+    args = parser.parse_args(argv)
+
+    if DB_BACKEND == "sqlite":
+        # The embedded backend builds its schema from db_connection/sqlite_schema.sql
+        print("DB_BACKEND=sqlite: migrations only apply to MySQL, nothing to do.")
+        return 0
+
+    conn = wait_for_db(args.wait)
+    try:
+        if args.status:
+            return status(conn)
+        if args.check:
+            return check(conn, args.min_rows)
+        applied = migrate(conn)
+        print(f"Applied {len(applied)} migration(s)." if applied else "Schema is up to date.")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
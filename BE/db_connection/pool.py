@@ -0,0 +1,210 @@
+# pool.py
+
+import os
+import threading
+import time
+from collections import deque
+
+from db_connection.statements import StatementCache
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class PooledConnection:
+    """Wrapper around a raw DB connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise AttributeError(f"Connection already returned to the pool ({name}).")
+        return getattr(raw, name)
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw)
+
+    def prepared(self, name):
+        """Prepared cursor for a registered statement, kept with the underlying connection."""
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise AttributeError("Connection already returned to the pool (prepared).")
+        return self._pool._statement_cache(raw).cursor(name)
+
+    def invalidate(self):
+        """Close the underlying connection instead of returning it, e.g. after an aborted stream."""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw, discard=True)
+
+
+class ConnectionPool:
+    """Bounded connection pool with overflow, pre-ping and max lifetime.
+
+    size          connections kept open while idle
+    max_overflow  extra connections opened under load, closed on release
+    timeout       seconds to wait for a free connection before PoolTimeout
+    recycle       max lifetime in seconds before a connection is reopened
+    ping_interval a connection idle longer than this is pinged on checkout
+    """
+
+    def __init__(self, connect, size=5, max_overflow=10, timeout=30.0, recycle=1800.0, ping_interval=5.0):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.pid = os.getpid()
+
+        self._cond = threading.Condition()
+        self._idle = deque()      # (raw, created_at, released_at), newest last
+        self._created = {}        # id(raw) -> created_at
+        self._statements = {}     # id(raw) -> StatementCache
+        self._opened = 0
+        self._in_use = 0
+
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._timeouts = 0
+        self._recycled = 0
+        self._ping_failures = 0
+
+    def connect(self):
+        """Check out a connection; call close() on the result to return it."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        entry = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._opened < self.size + self.max_overflow:
+                    self._opened += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No DB connection available within {self.timeout}s "
+                        f"(size={self.size}, overflow={self.max_overflow})."
+                    )
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        try:
+            raw = self._prepare(entry)
+        except Exception:
+            with self._cond:
+                self._opened -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return PooledConnection(self, raw)
+
+    def _prepare(self, entry):
+        """Return a usable raw connection for a checkout slot."""
+        if entry is None:
+            return self._open()
+
+        raw, created_at, released_at = entry
+        now = time.monotonic()
+        if self.recycle and now - created_at > self.recycle:
+            with self._cond:
+                self._recycled += 1
+            self._discard(raw)
+            return self._open()
+
+        if now - released_at > self.ping_interval:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                with self._cond:
+                    self._ping_failures += 1
+                self._discard(raw)
+                return self._open()
+        return raw
+
+    def _open(self):
+        raw = self._connect()
+        self._created[id(raw)] = time.monotonic()
+        return raw
+
+    def _statement_cache(self, raw):
+        cache = self._statements.get(id(raw))
+        if cache is None:
+            cache = self._statements[id(raw)] = StatementCache(raw)
+        return cache
+
+    def _discard(self, raw):
+        self._created.pop(id(raw), None)
+        # Server-side statements die with the connection; no need to close them one by one
+        self._statements.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _release(self, raw, discard=False):
+        healthy = not discard
+        try:
+            # Never hand out a connection with a half-finished transaction.
+            if healthy and raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy and self._opened <= self.size:
+                created_at = self._created.get(id(raw), time.monotonic())
+                self._idle.append((raw, created_at, time.monotonic()))
+                raw = None
+            else:
+                self._opened -= 1
+            self._cond.notify()
+
+        if raw is not None:
+            self._discard(raw)
+
+    def dispose(self):
+        """Close every idle connection (checked-out ones close on release)."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._opened -= len(idle)
+        for raw, _, _ in idle:
+            self._discard(raw)
+
+    def stats(self):
+        """Snapshot of pool usage counters."""
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "opened": self._opened,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "checkouts": self._checkouts,
+                "wait_time_total": self._wait_total,
+                "wait_time_max": self._wait_max,
+                "wait_time_avg": self._wait_total / self._checkouts if self._checkouts else 0.0,
+                "timeouts": self._timeouts,
+                "recycled": self._recycled,
+                "ping_failures": self._ping_failures,
+                "prepared_statements": sum(len(cache) for cache in list(self._statements.values())),
+            }
@@ -0,0 +1,158 @@
+# sqlite.py
+#
+# Embedded SQLite backend (DB_BACKEND=sqlite). Connections implement the part
+# of the mysql.connector interface the repositories use: cursor(dictionary=,
+# buffered=), execute / executemany with %s placeholders, fetch*, rowcount,
+# commit / rollback, in_transaction and ping. The few MySQL-only spellings in
+# the repository SQL are rewritten once per statement, so the API, the pool
+# and bulk import run unchanged in-process for tests and profiling.
+#
+# SQLITE_PATH is a file path or a SQLite URI. The default is a shared
+# in-memory database that lives as long as the process; use a file for
+# concurrent writers (in-memory shared cache locks whole tables).
+
+import functools
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+
+from modules.search import name_index_rows
+
+DEFAULT_PATH = "file:hms?mode=memory&cache=shared"
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sqlite_schema.sql")
+SEED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sqlite_seed.sql")
+
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+
+_bootstrap_lock = threading.Lock()
+_bootstrapped = set()
+_keepalive = {}  # path -> connection holding a shared in-memory database open
+
+
+@functools.lru_cache(maxsize=1024)
+def translate(sql: str) -> str:
+    """Rewrite MySQL spellings: INSERT IGNORE, LIKE with the backslash escape, %s placeholders."""
+    sql = sql.replace("INSERT IGNORE", "INSERT OR IGNORE")
+    sql = re.sub(r"\bLIKE %s", r"LIKE %s ESCAPE '\\'", sql)
+    return sql.replace("%s", "?")
+
+
+class SQLiteCursor:
+    """mysql.connector-style cursor; dictionary=True returns rows as dicts."""
+
+    def __init__(self, raw, dictionary=False):
+        self._cursor = raw.cursor()
+        self._dictionary = dictionary
+        self._columns = None
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self._columns, row))
+
+    def execute(self, operation, params=None):
+        self._cursor.execute(translate(operation), tuple(params or ()))
+        self._columns = [column[0] for column in self._cursor.description] if self._cursor.description else None
+
+    def executemany(self, operation, seq_params):
+        self._cursor.executemany(translate(operation), [tuple(params) for params in seq_params])
+        self._columns = None
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for row in self._cursor:
+            yield self._row(row)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, raw):
+        self._raw = raw
+
+    def cursor(self, dictionary=False, buffered=None, prepared=False):
+        # SQLite cursors step lazily, so buffered= has nothing to switch, and
+        # sqlite3 already keeps compiled statements in a per-connection cache
+        return SQLiteCursor(self._raw, dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def ping(self, reconnect=False):
+        self._raw.execute("SELECT 1")
+
+    def close(self):
+        self._raw.close()
+
+
+def _open(path):
+    raw = sqlite3.connect(path, uri=path.startswith("file:"), timeout=30, check_same_thread=False)
+    raw.execute("PRAGMA foreign_keys = ON")
+    return raw
+
+
+def create_schema(raw, seed=True):
+    """Create the tables (idempotent) and, on an empty database, load the demo rows of init.sql."""
+    with open(SCHEMA_FILE, encoding="utf-8") as f:
+        raw.executescript(f.read())
+    if not seed or raw.execute("SELECT COUNT(*) FROM Patient").fetchone()[0]:
+        return
+    with open(SEED_FILE, encoding="utf-8") as f:
+        raw.executescript(f.read())
+    # Name search trigrams are computed in Python, like the MySQL backfill
+    patients = raw.execute("SELECT patient_id, name FROM Patient").fetchall()
+    raw.executemany(
+        "INSERT OR IGNORE INTO PatientNameTrigram (trigram, patient_id) VALUES (?, ?)",
+        [row for patient_id, name in patients for row in name_index_rows(patient_id, name)]
+    )
+    raw.commit()
+
+
+def connect(path=None):
+    """Open a connection, creating the schema the first time a database is used in this process."""
+    path = path or os.getenv("SQLITE_PATH", DEFAULT_PATH)
+    if path not in _bootstrapped:
+        with _bootstrap_lock:
+            if path not in _bootstrapped:
+                keeper = _open(path)
+                if "mode=memory" not in path:
+                    # Readers do not block the writer in a file database
+                    keeper.execute("PRAGMA journal_mode = WAL")
+                create_schema(keeper, seed=os.getenv("SQLITE_SEED", "1").lower() not in ("0", "false", "no"))
+                if "mode=memory" in path:
+                    _keepalive[path] = keeper
+                else:
+                    keeper.close()
+                _bootstrapped.add(path)
+    return SQLiteConnection(_open(path))
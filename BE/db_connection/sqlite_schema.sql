@@ -0,0 +1,66 @@
+-- SQLite version of database/init.sql for DB_BACKEND=sqlite (tables and indexes only;
+-- demo rows are in sqlite_seed.sql). ENUM columns become CHECK constraints, JSON
+-- becomes TEXT, and text columns compared case-insensitively in MySQL use NOCASE.
+
+CREATE TABLE IF NOT EXISTS Patient (
+    patient_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL COLLATE NOCASE,
+    gender TEXT CHECK (gender IN ('Male', 'Female', 'Other')),
+    date_of_birth TEXT NOT NULL,
+    contact_info TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_patient_name ON Patient (name);
+CREATE INDEX IF NOT EXISTS idx_patient_gender_dob ON Patient (gender, date_of_birth);
+CREATE INDEX IF NOT EXISTS idx_patient_dob ON Patient (date_of_birth);
+
+CREATE TABLE IF NOT EXISTS PatientNameTrigram (
+    trigram TEXT NOT NULL,
+    patient_id TEXT NOT NULL REFERENCES Patient(patient_id) ON DELETE CASCADE,
+    PRIMARY KEY (trigram, patient_id)
+);
+CREATE INDEX IF NOT EXISTS idx_trigram_patient ON PatientNameTrigram (patient_id);
+
+CREATE TABLE IF NOT EXISTS MedicalHistory (
+    history_id TEXT PRIMARY KEY,
+    patient_id TEXT NOT NULL REFERENCES Patient(patient_id) ON DELETE CASCADE,
+    `condition` TEXT NOT NULL,
+    allergies TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_patient ON MedicalHistory (patient_id);
+
+CREATE TABLE IF NOT EXISTS PatientAllergy (
+    patient_id TEXT NOT NULL REFERENCES Patient(patient_id) ON DELETE CASCADE,
+    allergy TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (patient_id, allergy)
+);
+CREATE INDEX IF NOT EXISTS idx_allergy_patient ON PatientAllergy (allergy, patient_id);
+
+CREATE TABLE IF NOT EXISTS Staff (
+    staff_id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    contact_info TEXT NOT NULL,
+    role TEXT NOT NULL CHECK (role IN ('Doctor', 'Nurse')),
+    specialization TEXT,
+    department TEXT COLLATE NOCASE,
+    ward TEXT,
+    status TEXT NOT NULL CHECK (status IN ('active', 'inactive')),
+    shift TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_staff_role_status ON Staff (role, status);
+CREATE INDEX IF NOT EXISTS idx_staff_ward ON Staff (ward);
+CREATE INDEX IF NOT EXISTS idx_staff_department ON Staff (department);
+
+CREATE TABLE IF NOT EXISTS StaffShift (
+    day TEXT NOT NULL,
+    shift_type TEXT NOT NULL,
+    staff_id TEXT NOT NULL REFERENCES Staff(staff_id) ON DELETE CASCADE,
+    PRIMARY KEY (day, shift_type, staff_id)
+);
+CREATE INDEX IF NOT EXISTS idx_staffshift_staff ON StaffShift (staff_id);
+
+CREATE TABLE IF NOT EXISTS Users (
+    id TEXT PRIMARY KEY,
+    username TEXT UNIQUE NOT NULL COLLATE NOCASE,
+    password TEXT NOT NULL,
+    name TEXT
+);
@@ -0,0 +1,95 @@
+-- Demo rows of database/init.sql for DB_BACKEND=sqlite; the derived PatientAllergy and
+-- StaffShift rows are spelled out (the MySQL script derives them with JSON_TABLE).
+
+INSERT INTO Patient (patient_id, name, gender, date_of_birth, contact_info)
+VALUES 
+    ('P001', 'John Doe', 'Female', '1990-05-15', '1234567890'),
+    ('P002', 'Jane Smith', 'Male', '1985-08-25', '0987654321'),
+    ('P003', 'Emily Johnson', 'Female', '1992-03-10', '5551234567'),
+    ('P004', 'Michael Brown', 'Male', '1988-11-12', '4449876543'),
+    ('P005', 'Sarah Davis', 'Female', '1995-07-22', '7771112222'),
+    ('P006', 'David Wilson', 'Male', '1983-01-30', '6663334444'),
+    ('P007', 'Laura Martinez', 'Female', '1979-09-18', '8889990000'),
+    ('P008', 'James Taylor', 'Male', '2000-04-05', '9998887777'),
+    ('P009', 'Olivia Thomas', 'Female', '1998-06-14', '2225556666'),
+    ('P010', 'Daniel White', 'Male', '1991-12-01', '1114447777');
+
+INSERT INTO MedicalHistory (history_id, patient_id, `condition`, allergies)
+VALUES 
+    ('H001', 'P001', 'Diabetes', 'Peanuts,Dust'),
+    ('H002', 'P002', 'Asthma', 'Pollen,Smoke'),
+    ('H003', 'P003', 'Hypertension', 'None'),
+    ('H004', 'P004', 'Heart Disease', 'Penicillin'),
+    ('H005', 'P005', 'Migraines', 'Chocolate'),
+    ('H006', 'P006', 'Arthritis', 'None'),
+    ('H007', 'P007', 'Allergy', 'Shellfish'),
+    ('H008', 'P008', 'Depression', 'None'),
+    ('H009', 'P009', 'Anemia', 'Gluten'),
+    ('H010', 'P010', 'Chronic Pain', 'Latex');
+
+INSERT INTO Staff (staff_id, name, contact_info, role, status, specialization, department, ward, shift) VALUES
+('D002', 'Dr. Alice Nguyen', 'alice.nguyen@hospital.com', 'Doctor', 'active', 'Neurology', 'Neurology', 'ICU', 
+ '[["Tuesday", "Day"], ["Thursday", "Night"]]'),
+('D003', 'Dr. Michael Smith', 'michael.smith@hospital.com', 'Doctor', 'active', 'Pediatrics', 'Pediatrics', 'Pediatric', 
+ '[["Monday", "Night"], ["Wednesday", "Day"]]'),
+('D004', 'Dr. Linda Park', 'linda.park@hospital.com', 'Doctor', 'inactive', 'Orthopedics', 'Orthopedics', 'General', 
+ '[["Friday", "Day"], ["Saturday", "Night"]]'),
+('D005', 'Dr. David Chen', 'david.chen@hospital.com', 'Doctor', 'active', 'Dermatology', 'Dermatology', 'General', 
+ '[["Monday", "Day"], ["Thursday", "Day"]]'),
+('D006', 'Dr. Sophia Lee', 'sophia.lee@hospital.com', 'Doctor', 'active', 'Oncology', 'Oncology', 'Emergency', 
+ '[["Tuesday", "Night"], ["Friday", "Day"]]');
+
+INSERT INTO Staff (staff_id, name, contact_info, role, status, specialization, department, ward, shift) VALUES
+('N001', 'Nurse Emily Tran', 'emily.tran@hospital.com', 'Nurse', 'active', 'General', 'Emergency', 'Emergency', 
+ '[["Monday", "Day"], ["Wednesday", "Day"]]'),
+('N002', 'Nurse James Wong', 'james.wong@hospital.com', 'Nurse', 'active', 'ICU', 'ICU', 'ICU', 
+ '[["Tuesday", "Night"], ["Thursday", "Night"]]'),
+('N003', 'Nurse Grace Kim', 'grace.kim@hospital.com', 'Nurse', 'inactive', 'Surgery', 'Surgery', 'General', 
+ '[["Monday", "Night"], ["Friday", "Day"]]'),
+('N004', 'Nurse Robert Liu', 'robert.liu@hospital.com', 'Nurse', 'active', 'Recovery', 'Post-Op', 'Pediatric', 
+ '[["Wednesday", "Day"], ["Saturday", "Night"]]'),
+('N005', 'Nurse Olivia Patel', 'olivia.patel@hospital.com', 'Nurse', 'active', 'Maternity', 'Obstetrics', 'Emergency', 
+ '[["Thursday", "Day"], ["Sunday", "Night"]]');
+
+INSERT INTO Users (id, username, password, name)
+VALUES 
+    ('U001', 'admin@hospital.com', '$2b$12$Wv3kRQaB9fIjc9Nckl9eXOSkDdYuBf3cKoC38umEpFMUHvZB9QW2y', 'Admin User'),
+    ('U002', 'reception@hospital.com', '$2b$12$dJHJoQnrZGBNtwBTSqxz8euTiGAX6aYwN.qzLplCUoW9cvkT7EWEq', 'Receptionist'),
+    ('U003', 'doctor1@hospital.com', '$2b$12$olB3cKixRnXZpsWq1OCN0eGVwd4vmpxxYoZAH5qDBgL7QqtPMWpL2', 'Dr. A. Patel');
+INSERT INTO PatientAllergy (patient_id, allergy)
+VALUES
+    ('P001', 'Peanuts'),
+    ('P001', 'Dust'),
+    ('P002', 'Pollen'),
+    ('P002', 'Smoke'),
+    ('P003', 'None'),
+    ('P004', 'Penicillin'),
+    ('P005', 'Chocolate'),
+    ('P006', 'None'),
+    ('P007', 'Shellfish'),
+    ('P008', 'None'),
+    ('P009', 'Gluten'),
+    ('P010', 'Latex');
+
+INSERT INTO StaffShift (day, shift_type, staff_id)
+VALUES
+    ('Tuesday', 'Day', 'D002'),
+    ('Thursday', 'Night', 'D002'),
+    ('Monday', 'Night', 'D003'),
+    ('Wednesday', 'Day', 'D003'),
+    ('Friday', 'Day', 'D004'),
+    ('Saturday', 'Night', 'D004'),
+    ('Monday', 'Day', 'D005'),
+    ('Thursday', 'Day', 'D005'),
+    ('Tuesday', 'Night', 'D006'),
+    ('Friday', 'Day', 'D006'),
+    ('Monday', 'Day', 'N001'),
+    ('Wednesday', 'Day', 'N001'),
+    ('Tuesday', 'Night', 'N002'),
+    ('Thursday', 'Night', 'N002'),
+    ('Monday', 'Night', 'N003'),
+    ('Friday', 'Day', 'N003'),
+    ('Wednesday', 'Day', 'N004'),
+    ('Saturday', 'Night', 'N004'),
+    ('Thursday', 'Day', 'N005'),
+    ('Sunday', 'Night', 'N005');
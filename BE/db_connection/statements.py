@@ -0,0 +1,90 @@
+# statements.py
+#
+# Registry of named hot statements and the per-connection cache of their
+# server-side prepared versions. A statement is prepared the first time a
+# pooled connection runs it and re-executed from then on with only the
+# parameters on the wire, so the server skips the parse and the client skips
+# the %s interpolation. Lookups are counted on /metrics as hits and misses.
+#
+# DB_PREPARED_STATEMENTS=0 turns the cache off (plain cursors, same results).
+
+import os
+from collections import OrderedDict
+
+from modules.metrics import metrics
+
+PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "1").lower() not in ("0", "false", "no")
+STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "32"))
+
+# name -> SQL of every statement that may run prepared
+STATEMENTS = {}
+
+
+def register(name: str, sql: str) -> str:
+    """Add a named statement to the registry; returns the name for use with fetch_one / fetch_all."""
+    sql = " ".join(sql.split())
+    if STATEMENTS.get(name, sql) != sql:
+        raise ValueError(f"Statement '{name}' is already registered with different SQL.")
+    STATEMENTS[name] = sql
+    return name
+
+
+class StatementCache:
+    """Prepared cursors of one raw connection, least recently used closed first."""
+
+    def __init__(self, raw, capacity: int = STATEMENT_CACHE_SIZE):
+        self._raw = raw
+        self.capacity = capacity
+        self._cursors = OrderedDict()  # name -> prepared cursor
+
+    def __len__(self):
+        return len(self._cursors)
+
+    def cursor(self, name: str):
+        cursor = self._cursors.get(name)
+        metrics.statement_lookup(name, cursor is not None)
+        if cursor is not None:
+            self._cursors.move_to_end(name)
+            return cursor
+
+        # Prepared cursors cannot be buffered; fetch_one / fetch_all always drain them
+        cursor = self._cursors[name] = self._raw.cursor(prepared=True, dictionary=True, buffered=False)
+        if len(self._cursors) > self.capacity:
+            _, evicted = self._cursors.popitem(last=False)
+            _close_quietly(evicted)
+        return cursor
+
+    def close(self):
+        cursors, self._cursors = list(self._cursors.values()), OrderedDict()
+        for cursor in cursors:
+            _close_quietly(cursor)
+
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+
+def _execute(conn, name: str, params):
+    # Always the registry's own str object: the connector re-prepares whenever
+    # a cursor is handed a different object, even with equal text
+    sql = STATEMENTS[name]
+    if PREPARED_STATEMENTS:
+        cursor = conn.prepared(name)
+    else:
+        cursor = conn.cursor(dictionary=True)
+    cursor.execute(sql, tuple(params))
+    return cursor
+
+
+def fetch_all(conn, name: str, params=()) -> list:
+    """Run a registered statement and return its rows as dicts."""
+    return _execute(conn, name, params).fetchall()
+
+
+def fetch_one(conn, name: str, params=()):
+    """First row of a registered statement, or None."""
+    rows = fetch_all(conn, name, params)
+    return rows[0] if rows else None
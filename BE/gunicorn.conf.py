@@ -0,0 +1,78 @@
+# Production launcher settings: gunicorn -c gunicorn.conf.py server:app
+#
+# A prefork pool of gthread workers, one per CPU by default. Every value can be
+# overridden from the environment. Signals: HUP restarts the workers gracefully,
+# USR2 + QUIT on the old master swaps in new code with zero downtime.
+
+import glob
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Recycle each worker after N requests (plus jitter so they do not restart together)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+# Import the app once in the master and fork the workers from it
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() not in ("0", "false", "no")
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+# Workers publish their /metrics counters as snapshot files here (see modules/metrics.py)
+_metrics_dir = os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "hms-metrics"))
+
+
+# Shared version counters behind the ETags (see modules/versions.py) and the
+# ring of change records behind /events (modules/events.py). A fresh file per
+# master gives a fresh epoch, so tags and event ids from an earlier run never
+# match; a master re-executed with USR2 inherits the variables and shares them.
+_owned_files = []
+for _variable, _prefix in (("VERSIONS_FILE", "hms-versions"), ("EVENTS_FILE", "hms-events")):
+    if _variable not in os.environ:
+        _path = os.environ[_variable] = os.path.join(tempfile.gettempdir(), f"{_prefix}-{os.getpid()}")
+        if os.path.exists(_path):
+            os.remove(_path)  # left behind by a crashed master with the same pid
+        _owned_files.append(_path)
+
+# Every /events stream holds a worker thread until it ends, so a worker serves at most
+# EVENTS_MAX_SUBSCRIBERS streams and keeps the other threads for requests. The default
+# leaves one thread free: with 4 threads, 3 streams per worker and workers * 3 in all.
+# Each open browser tab holds one stream, so for many tabs raise GUNICORN_THREADS
+# (a thread per expected stream per worker, plus a few for requests).
+os.environ.setdefault("EVENTS_MAX_SUBSCRIBERS", str(max(1, threads - 1)))
+
+
+def on_starting(server):
+    # Before the workers fork, so a FLASK_DEBUG throwaway key is shared by all of them
+    from modules.auth import check_secret_key
+
+    check_secret_key()
+
+    # Counters start from zero with every master start
+    os.makedirs(_metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(_metrics_dir, "*.json*")):
+        os.remove(path)
+
+
+def post_fork(server, worker):
+    # Sockets must never be shared across processes: every worker builds its own pool
+    from db_connection.db import reset_pool
+
+    reset_pool()
+
+
+def on_exit(server):
+    for path in _owned_files:
+        if os.path.exists(path):
+            os.remove(path)
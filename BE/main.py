@@ -1,4 +1,5 @@
 from modules.staff import Staff, StaffRole, Ward
+from repository import StaffRepository
 
 # Create a new doctor staff member
 doctor = Staff(
@@ -30,15 +31,15 @@ print(nurse.to_dict())
 
 # Simulating database interactions
 print("\n--- Fetching Staff Details from Database ---")
-staff_details = Staff.get_staff_details("D001")
+staff_details = StaffRepository.get_details("D001")
 print(staff_details)
 
 # Update contact info
 print("\n--- Updating Doctor's Contact Info ---")
-doctor.update_info(contact_info="new.email@hospital.com")
-print("Updated Contact Info:", doctor.contact_info)
+StaffRepository.update_fields("D001", contact_info="new.email@hospital.com")
+print("Updated Contact Info:", StaffRepository.get_details("D001"))
 
 # Get availability (shifts)
 print("\n--- Fetching Availability for Doctor ---")
-availability = Staff.get_availability("D001")
+availability = StaffRepository.get_availability("D001")
 print("Doctor's Available Shifts:", availability)
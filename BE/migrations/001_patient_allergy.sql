@@ -0,0 +1,20 @@
+-- Normalized, indexed allergy storage for /patients/search?allergy=
+-- MedicalHistory.allergies stays as the comma-joined display copy.
+
+CREATE TABLE IF NOT EXISTS PatientAllergy (
+    patient_id VARCHAR(50) NOT NULL,
+    allergy VARCHAR(100) NOT NULL,
+    PRIMARY KEY (patient_id, allergy),
+    INDEX idx_allergy_patient (allergy, patient_id),
+    FOREIGN KEY (patient_id) REFERENCES Patient(patient_id) ON DELETE CASCADE
+);
+
+-- Backfill from the comma-joined column
+INSERT IGNORE INTO PatientAllergy (patient_id, allergy)
+SELECT h.patient_id, TRIM(j.allergy)
+FROM MedicalHistory h
+JOIN JSON_TABLE(
+    CONCAT('["', REPLACE(REPLACE(h.allergies, '"', '\\"'), ',', '","'), '"]'),
+    '$[*]' COLUMNS (allergy VARCHAR(100) PATH '$')
+) j
+WHERE TRIM(j.allergy) <> '';
@@ -0,0 +1,21 @@
+-- On-duty roster index for /staff/on_duty: one row per (day, shift_type, staff_id),
+-- derived from the Staff.shift JSON array of [day, shift_type] pairs.
+
+CREATE TABLE IF NOT EXISTS StaffShift (
+    day VARCHAR(20) NOT NULL,
+    shift_type VARCHAR(20) NOT NULL,
+    staff_id VARCHAR(50) NOT NULL,
+    PRIMARY KEY (day, shift_type, staff_id),
+    INDEX idx_staffshift_staff (staff_id),
+    FOREIGN KEY (staff_id) REFERENCES Staff(staff_id) ON DELETE CASCADE
+);
+
+-- Backfill; entries that are not [day, shift_type] pairs are skipped
+INSERT IGNORE INTO StaffShift (day, shift_type, staff_id)
+SELECT j.day, j.shift_type, s.staff_id
+FROM Staff s
+JOIN JSON_TABLE(
+    s.shift,
+    '$[*]' COLUMNS (day VARCHAR(20) PATH '$[0]', shift_type VARCHAR(20) PATH '$[1]')
+) j
+WHERE j.day IS NOT NULL AND j.shift_type IS NOT NULL;
@@ -0,0 +1,13 @@
+-- Patient name search for /patients/search?q=
+-- Prefix matches use idx_patient_name, typo-tolerant matches the trigram table.
+-- Backfill the trigrams afterwards with: python3 -m modules.search
+
+CREATE INDEX idx_patient_name ON Patient (name);
+
+CREATE TABLE IF NOT EXISTS PatientNameTrigram (
+    trigram CHAR(3) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+    patient_id VARCHAR(50) NOT NULL,
+    PRIMARY KEY (trigram, patient_id),
+    INDEX idx_trigram_patient (patient_id),
+    FOREIGN KEY (patient_id) REFERENCES Patient(patient_id) ON DELETE CASCADE
+);
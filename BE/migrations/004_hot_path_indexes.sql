@@ -0,0 +1,8 @@
+-- Secondary indexes for the filters and lookups of the list endpoints
+-- (Users.username is already covered by its UNIQUE constraint, Patient.name by 003).
+
+CREATE INDEX idx_staff_role_status ON Staff (role, status);
+CREATE INDEX idx_staff_ward ON Staff (ward);
+CREATE INDEX idx_staff_department ON Staff (department);
+CREATE INDEX idx_patient_gender_dob ON Patient (gender, date_of_birth);
+CREATE INDEX idx_patient_dob ON Patient (date_of_birth);
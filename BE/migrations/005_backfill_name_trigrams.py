@@ -0,0 +1,9 @@
+# Fill PatientNameTrigram for patients that existed before name search (003).
+
+from repository.patients import PatientRepository
+
+
+def upgrade(conn):
+    # On the runner's connection, so the backfill runs under its schema lock and is committed with the version row
+    PatientRepository.rebuild_name_index(conn)
+    PatientRepository.notify_bulk_write()
@@ -0,0 +1,137 @@
+import logging
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Optional
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Password hashing runs in a bounded process pool so a burst of logins cannot
+# starve the request threads; successful logins get a signed session token.
+
+logger = logging.getLogger(__name__)
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "64"))
+HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", "10"))
+SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", str(12 * 3600)))
+
+
+class HashQueueFull(Exception):
+    """Raised when too many hash jobs are already waiting (reported as HTTP 503)."""
+
+
+class HashTimeout(HashQueueFull):
+    """Raised when a hash job does not finish within HASH_TIMEOUT (reported as HTTP 503 like a full queue)."""
+
+
+class _HashPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._slots = threading.BoundedSemaphore(HASH_QUEUE_LIMIT)
+
+    def _get_executor(self):
+        # Created lazily, and again in every forked server worker
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=HASH_WORKERS,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashQueueFull("Too many password operations in progress, retry shortly.")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the job ends, so jobs left running after a timeout still count
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=HASH_TIMEOUT)
+        except FuturesTimeoutError:
+            future.cancel()
+            raise HashTimeout("Password operation timed out, retry shortly.")
+
+
+_hash_pool = _HashPool()
+
+
+def hash_password(password: str) -> str:
+    """generate_password_hash in the hashing pool."""
+    return _hash_pool.run(generate_password_hash, password)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """check_password_hash in the hashing pool."""
+    return _hash_pool.run(check_password_hash, password_hash, password)
+
+
+# Example values from docs and old .env files; tokens signed with them can be forged by anyone
+PLACEHOLDER_SECRET_KEYS = {"change-me-in-production", "changeme", "secret"}
+
+
+def check_secret_key():
+    """Refuse to start a server without a real SECRET_KEY (FLASK_DEBUG=1 gets a throwaway one).
+
+    Called at server startup, not on import, so tools and the spawned hash workers
+    that import this module do not need the key.
+    """
+    key = os.getenv("SECRET_KEY")
+    if key and key not in PLACEHOLDER_SECRET_KEYS:
+        return
+    if os.getenv("FLASK_DEBUG", "0") != "1":
+        raise RuntimeError(
+            "SECRET_KEY is unset or a placeholder. Set it to a random value, e.g. `openssl rand -hex 32` "
+            "(or run with FLASK_DEBUG=1 for a throwaway key)."
+        )
+    logger.warning("SECRET_KEY is not set; using a random key, session tokens will not survive a restart.")
+    # Through the environment, so workers started after this share the key
+    os.environ["SECRET_KEY"] = secrets.token_hex(32)
+
+
+_serializer = None
+_serializer_lock = threading.Lock()
+
+
+def _get_serializer() -> URLSafeTimedSerializer:
+    # Built on first use, after check_secret_key; a process that skipped the check signs with a key of its own
+    global _serializer
+    if _serializer is None:
+        with _serializer_lock:
+            if _serializer is None:
+                key = os.getenv("SECRET_KEY")
+                if not key or key in PLACEHOLDER_SECRET_KEYS:
+                    key = secrets.token_hex(32)
+                _serializer = URLSafeTimedSerializer(key, salt="hms-session")
+    return _serializer
+
+
+def issue_token(user: dict) -> str:
+    """Signed session token carrying the user's id, username and name."""
+    return _get_serializer().dumps({"id": user["id"], "username": user["username"], "name": user["name"]})
+
+
+def verify_token(token: str, max_age: int = SESSION_MAX_AGE) -> Optional[dict]:
+    """Return the user stored in a valid token, or None when it is forged or expired."""
+    try:
+        return _get_serializer().loads(token, max_age=max_age)
+    except (BadSignature, SignatureExpired):
+        return None
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """Extract the token from an `Authorization: Bearer <token>` header."""
+    if authorization and authorization.startswith("Bearer "):
+        return authorization[len("Bearer "):].strip()
+    return None
@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from db_connection.db import DB_ERRORS, get_db_connection
+
+# Batched bulk inserts used by /patients/bulk and /staff/bulk.
+
+DEFAULT_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+MAX_BATCH_SIZE = 10000
+
+
+def read_records(request) -> Iterator[dict]:
+    """Yield upload records from a JSON array, NDJSON or CSV request body.
+
+    NDJSON and CSV bodies are read from the request stream line by line, so the
+    upload never has to fit in memory as a whole. An unparsable NDJSON line is
+    yielded as the ValueError itself and reported as that row's error.
+    """
+    mimetype = request.mimetype
+    if mimetype in ("application/x-ndjson", "application/jsonl"):
+        for line in io.TextIOWrapper(request.stream, encoding="utf-8"):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as err:
+                    yield err
+    elif mimetype == "text/csv":
+        yield from csv.DictReader(io.TextIOWrapper(request.stream, encoding="utf-8", newline=""))
+    else:
+        records = request.get_json()
+        if not isinstance(records, list):
+            raise ValueError("Body must be a JSON array of records.")
+        yield from records
+
+
+def split_list(value) -> List[str]:
+    """Accept a JSON list or a comma-separated string (as CSV cells are)."""
+    if isinstance(value, list):
+        return value
+    return [item.strip() for item in str(value).split(",") if item.strip()]
+
+
+def bulk_insert(
+    records: Iterable[dict],
+    prepare: Callable[[dict], Dict[str, tuple]],
+    statements: Sequence[Tuple[str, str]],
+    key: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> dict:
+    """Insert records in transactional batches with executemany.
+
+    prepare(record) returns {statement name: params} or raises ValueError; every
+    statement in `statements` ([(name, sql)], run in order) gets one params tuple
+    per record, or a list of tuples for child rows (e.g. one per allergy). A batch that fails is retried row by row under savepoints so one
+    bad row only rejects itself. Returns inserted/failed counts and per-row errors.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    result = {"inserted": 0, "failed": 0, "errors": []}
+
+    def fail(index, record, error):
+        result["failed"] += 1
+        result["errors"].append({"row": index, key: record.get(key) if isinstance(record, dict) else None, "error": str(error)})
+
+    def flush(batch):
+        if not batch:
+            return
+        try:
+            for name, sql in statements:
+                rows = []
+                for _, _, params in batch:
+                    if isinstance(params[name], list):
+                        rows.extend(params[name])
+                    else:
+                        rows.append(params[name])
+                if rows:
+                    cursor.executemany(sql, rows)
+            conn.commit()
+            result["inserted"] += len(batch)
+            return
+        except DB_ERRORS:
+            conn.rollback()
+
+        # Isolate the offending rows; the good ones still commit together
+        for index, record, params in batch:
+            cursor.execute("SAVEPOINT bulk_row")
+            try:
+                for name, sql in statements:
+                    if isinstance(params[name], list):
+                        if params[name]:
+                            cursor.executemany(sql, params[name])
+                    else:
+                        cursor.execute(sql, params[name])
+                result["inserted"] += 1
+            except DB_ERRORS as err:
+                cursor.execute("ROLLBACK TO SAVEPOINT bulk_row")
+                fail(index, record, err)
+        conn.commit()
+
+    batch = []
+    try:
+        for index, record in enumerate(records):
+            try:
+                if isinstance(record, ValueError):
+                    raise record
+                if not isinstance(record, dict):
+                    raise ValueError("Record must be an object.")
+                batch.append((index, record, prepare(record)))
+            except (ValueError, KeyError) as err:
+                fail(index, record, err)
+                continue
+
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        flush(batch)
+    finally:
+        cursor.close()
+        conn.close()
+
+    return result
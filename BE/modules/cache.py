@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# In-process read-through cache for single-entity lookups (patient, staff).
+# Cached values are shared between requests and must be treated as read-only.
+# Callers key entries by (id, version) from modules.versions, so a write retires
+# the old entry by moving the version on; nothing is invalidated explicitly.
+# This replaces per-write-path invalidation calls: every repository write already
+# bumps the version (across workers, through the shared versions map), so no
+# write path can forget to retire the entry, and a load racing a write is stored
+# under the version it read, which the write has already moved past.
+
+_MISSING = object()
+
+
+class EntityCache:
+    """Bounded LRU cache with per-entry TTL and hit/miss/eviction counters."""
+
+    def __init__(self, name: str, maxsize: int = 10000, ttl: float = 30.0, enabled: bool = True):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_or_load(self, key, loader, cacheable=lambda value: True):
+        """Return the cached value for key, or call loader() and cache its result."""
+        if not self.enabled:
+            return loader()
+
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        value = loader()
+        if cacheable(value):
+            self._store(key, value)
+        return value
+
+    async def aget_or_load(self, key, loader, cacheable=lambda value: True):
+        """get_or_load() for the asyncio server; loader is a coroutine function."""
+        if not self.enabled:
+            return await loader()
+
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        value = await loader()
+        if cacheable(value):
+            self._store(key, value)
+        return value
+
+    def _lookup(self, key):
+        """Return the live cached value, or _MISSING."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return _MISSING
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def _cache_from_env(name: str) -> EntityCache:
+    return EntityCache(
+        name,
+        maxsize=int(os.getenv("ENTITY_CACHE_SIZE", "10000")),
+        ttl=float(os.getenv("ENTITY_CACHE_TTL", "30")),
+        enabled=os.getenv("ENTITY_CACHE_ENABLED", "1").lower() not in ("0", "false", "no"),
+    )
+
+
+patient_cache = _cache_from_env("patient")
+staff_cache = _cache_from_env("staff")
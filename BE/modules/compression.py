@@ -0,0 +1,102 @@
+import gzip
+import os
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+# Response compression negotiated from Accept-Encoding: brotli when the client
+# takes it and the brotli package is installed, else gzip. Bodies below
+# COMPRESS_MIN_SIZE bytes are sent as they are, since the headers would eat
+# the gain. Streamed (NDJSON) bodies are compressed chunk by chunk as they go,
+# each chunk flushed so the first rows still reach the client at once.
+
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+COMPRESSIBLE_TYPES = {"application/json", "application/x-ndjson", "text/plain", "text/csv", "text/html"}
+
+
+class _GzipStream:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync-flush every chunk, or zlib holds the output back until its buffer fills
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+# Content-Encoding -> (whole-body compressor, streaming compressor), most preferred first
+CODINGS = {}
+if brotli is not None:
+    CODINGS["br"] = (lambda data: brotli.compress(data, quality=BROTLI_QUALITY), _BrotliStream)
+CODINGS["gzip"] = (lambda data: gzip.compress(data, GZIP_LEVEL, mtime=0), _GzipStream)
+
+
+def negotiate(accept_encodings):
+    """Best coding the client accepts (q-values respected, server preference on ties), or None."""
+    return accept_encodings.best_match(list(CODINGS))
+
+
+def _stream(chunks, stream):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
+    finally:
+        # A client that disconnects mid-stream must still release the DB connection of the source
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    """after_request hook: compress the body when the type, size and Accept-Encoding allow it."""
+    if (response.status_code < 200 or response.status_code in (204, 304)
+            or response.mimetype not in COMPRESSIBLE_TYPES
+            or "Content-Encoding" in response.headers):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    coding = negotiate(request.accept_encodings)
+    if coding is None:
+        return response
+    compress, stream = CODINGS[coding]
+
+    if response.is_streamed:
+        response.response = _stream(response.response, stream())
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(compress(body))
+    response.headers["Content-Encoding"] = coding
+    return response
+
+
+def init_app(app):
+    """Compress the responses of a Flask app."""
+    app.after_request(compress_response)
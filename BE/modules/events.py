@@ -0,0 +1,246 @@
+import json
+import mmap
+import os
+import secrets
+import struct
+import threading
+import time
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+from modules.versions import FileLock
+
+# Change feed behind GET /events (server-sent events).
+#
+# Every write through the repositories publishes a compact change record
+# ({"entity", "id", "op", "fields"}) into a ring of the latest EVENT_RING_SIZE
+# records. Like the version counters the ring lives in a shared memory map:
+# EVENTS_FILE (set by gunicorn.conf.py per master) lets every worker see the
+# writes of the others, without it the map is private to the process. Each
+# record's sequence number, prefixed with the ring's epoch, is its SSE id, so a
+# reconnecting client resumes after its Last-Event-ID from the ring.
+#
+# Within a worker one dispatcher thread tails the ring and copies new records
+# into a bounded buffer per subscriber. A subscriber that falls more than
+# EVENTS_SUBSCRIBER_BUFFER records behind (or resumes from an id the ring no
+# longer holds) gets a "reset" event instead and should reload its lists.
+
+EVENT_RING_SIZE = int(os.getenv("EVENT_RING_SIZE", "4096"))
+EVENT_SLOT_SIZE = int(os.getenv("EVENT_SLOT_SIZE", "512"))
+SUBSCRIBER_BUFFER = int(os.getenv("EVENTS_SUBSCRIBER_BUFFER", "256"))
+# Streams per process; gunicorn.conf.py sets it to GUNICORN_THREADS - 1, as each stream holds a thread
+MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "16"))
+POLL_INTERVAL = float(os.getenv("EVENTS_POLL_INTERVAL", "0.5"))
+HEARTBEAT_INTERVAL = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+# Streams end after this long and the client reconnects with Last-Event-ID, so
+# a worker thread is never held forever (and worker recycling is not blocked)
+MAX_STREAM_SECONDS = float(os.getenv("EVENTS_MAX_STREAM_SECONDS", "300"))
+
+_HEADER = struct.Struct("<QQ")  # epoch, sequence number of the latest record
+_SLOT = struct.Struct("<QH")    # sequence number, payload length
+
+
+class FeedFull(Exception):
+    """Raised when a worker already streams to MAX_SUBSCRIBERS clients (reported as HTTP 503)."""
+
+
+class EventRing:
+    """The latest change records, as JSON, in fixed-size slots of a memory map."""
+
+    def __init__(self, path=None, capacity: int = EVENT_RING_SIZE, slot_size: int = EVENT_SLOT_SIZE):
+        self.capacity = capacity
+        self.slot_size = slot_size
+        size = _HEADER.size + capacity * slot_size
+        self._lock = threading.Lock()
+        self._fd = None
+        if path:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+        else:
+            self._map = mmap.mmap(-1, size)
+        with FileLock(self._lock, self._fd):
+            if not self.epoch:
+                _HEADER.pack_into(self._map, 0, secrets.randbits(32) or 1, 0)
+
+    @property
+    def epoch(self) -> int:
+        return _HEADER.unpack_from(self._map)[0]
+
+    @property
+    def head(self) -> int:
+        """Sequence number of the latest record (0 before the first)."""
+        return _HEADER.unpack_from(self._map)[1]
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch:08x}-{seq}"
+
+    def parse_id(self, event_id: str) -> Optional[int]:
+        """Sequence number of an id handed out by this ring, or None (another epoch, malformed)."""
+        epoch, _, seq = event_id.partition("-")
+        try:
+            if int(epoch, 16) != self.epoch:
+                return None
+            return int(seq)
+        except ValueError:
+            return None
+
+    def _offset(self, seq: int) -> int:
+        return _HEADER.size + (seq % self.capacity) * self.slot_size
+
+    def append(self, record: dict) -> int:
+        """Store a record; returns its sequence number."""
+        payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        if len(payload) > self.slot_size - _SLOT.size:
+            # Too long for a slot: without the field list the client reloads the whole entity
+            payload = json.dumps(dict(record, fields=None), separators=(",", ":")).encode("utf-8")
+        with FileLock(self._lock, self._fd):
+            epoch, seq = _HEADER.unpack_from(self._map)
+            seq += 1
+            offset = self._offset(seq)
+            _SLOT.pack_into(self._map, offset, seq, len(payload))
+            self._map[offset + _SLOT.size:offset + _SLOT.size + len(payload)] = payload
+            # The head moves last, so readers never see a slot before it is complete
+            _HEADER.pack_into(self._map, 0, epoch, seq)
+        return seq
+
+    def read(self, after: int, until: Optional[int] = None) -> Optional[List[Tuple[int, bytes]]]:
+        """(seq, payload) of the records after `after` (up to `until`), or None when some were overwritten."""
+        until = self.head if until is None else until
+        if after >= until:
+            return []
+        if until - after > self.capacity:
+            return None
+        records = []
+        for seq in range(after + 1, until + 1):
+            offset = self._offset(seq)
+            slot_seq, length = _SLOT.unpack_from(self._map, offset)
+            payload = self._map[offset + _SLOT.size:offset + _SLOT.size + length]
+            # A writer lapping the ring while we copy shows up as a changed sequence number
+            if slot_seq != seq or _SLOT.unpack_from(self._map, offset)[0] != seq:
+                return None
+            records.append((seq, payload))
+        return records
+
+
+class Subscriber:
+    """One /events client: a bounded buffer of records not yet sent."""
+
+    def __init__(self, capacity: int = SUBSCRIBER_BUFFER):
+        self.capacity = capacity
+        self.buffer = deque()
+        self.reset = False
+        self.ready = threading.Event()
+
+    def push(self, records):
+        if self.reset:
+            return
+        if len(self.buffer) + len(records) > self.capacity:
+            # Too far behind: drop the backlog, the client reloads instead
+            self.buffer.clear()
+            self.reset = True
+        else:
+            self.buffer.extend(records)
+        self.ready.set()
+
+    def overflow(self):
+        self.buffer.clear()
+        self.reset = True
+        self.ready.set()
+
+
+class ChangeFeed:
+    """Publishes change records and fans them out to the subscribers of this process."""
+
+    def __init__(self, ring: EventRing, max_subscribers: int = MAX_SUBSCRIBERS):
+        self.ring = ring
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._wakeup = threading.Event()
+        self._cursor = 0       # latest sequence number handed to the subscribers
+        self._thread = None    # started by the first subscriber of a (forked) worker
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def publish(self, entity: str, entity_id: Optional[str], operation: str, fields: Optional[Iterable[str]] = None) -> int:
+        """Record a committed write; `fields` names the changed response fields of an update."""
+        record = {"entity": entity, "id": entity_id, "op": operation}
+        if fields is not None:
+            record["fields"] = list(fields)
+        seq = self.ring.append(record)
+        # Subscribers in this worker hear at once, the others on their next poll
+        self._wakeup.set()
+        return seq
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscriber:
+        """Register a subscriber, replaying the records after last_event_id when the ring still has them."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise FeedFull("Too many open event streams; retry later.")
+            if self._thread is None or not self._thread.is_alive():
+                self._cursor = self.ring.head
+                self._thread = threading.Thread(target=self._dispatch_forever, name="hms-events", daemon=True)
+                self._thread.start()
+
+            subscriber = Subscriber()
+            if last_event_id:
+                after = self.ring.parse_id(last_event_id)
+                missed = self.ring.read(after, self._cursor) if after is not None and after <= self._cursor else None
+                if missed is None:
+                    subscriber.overflow()
+                elif missed:
+                    subscriber.push(missed)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _dispatch_forever(self):
+        while True:
+            self._wakeup.wait(POLL_INTERVAL)
+            self._wakeup.clear()
+            self._dispatch()
+
+    def _dispatch(self):
+        with self._lock:
+            head = self.ring.head
+            records = self.ring.read(self._cursor, head)
+            if records is None:
+                # This worker fell behind the ring itself: everyone starts over
+                for subscriber in self._subscribers:
+                    subscriber.overflow()
+            elif records:
+                for subscriber in self._subscribers:
+                    subscriber.push(records)
+            self._cursor = head
+
+    def stream(self, subscriber: Subscriber):
+        """SSE text of a subscriber until MAX_STREAM_SECONDS pass or the client goes away."""
+        deadline = time.monotonic() + MAX_STREAM_SECONDS
+        try:
+            yield "retry: 2000\n\n"
+            while time.monotonic() < deadline:
+                subscriber.ready.wait(min(HEARTBEAT_INTERVAL, max(0.0, deadline - time.monotonic())))
+                with self._lock:
+                    subscriber.ready.clear()
+                    records, subscriber.buffer = list(subscriber.buffer), deque()
+                    reset, subscriber.reset = subscriber.reset, False
+                    cursor = self._cursor
+
+                if reset:
+                    yield f"id: {self.ring.event_id(cursor)}\nevent: reset\ndata: {{}}\n\n"
+                for seq, payload in records:
+                    yield f"id: {self.ring.event_id(seq)}\ndata: {payload.decode('utf-8')}\n\n"
+                if not reset and not records:
+                    # Keeps proxies from closing an idle stream and finds clients that left
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+
+change_feed = ChangeFeed(EventRing(os.getenv("EVENTS_FILE")))
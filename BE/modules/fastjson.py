@@ -0,0 +1,80 @@
+import json
+import os
+from typing import Callable, Dict, Optional
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library encoder is used instead
+    orjson = None
+
+# JSON encoding for API responses. Encoders are pluggable by name and share
+# one signature, encode(obj, default, sort_keys, indent) -> UTF-8 bytes, so
+# every backend produces the same documents (non-ASCII kept as UTF-8, dates
+# handed to the Flask provider's default()). JSON_ENCODER picks one; orjson is
+# the default when it is installed.
+
+Encoder = Callable[..., bytes]
+
+
+def _stdlib_encode(obj, default, sort_keys: bool, indent=None) -> bytes:
+    separators = None if indent else (",", ":")
+    return json.dumps(
+        obj, default=default, sort_keys=sort_keys, indent=indent, separators=separators, ensure_ascii=False
+    ).encode("utf-8")
+
+
+def _orjson_encode(obj, default, sort_keys: bool, indent=None) -> bytes:
+    # Dates go through default() like with the stdlib encoder, not orjson's ISO format
+    option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(obj, default=default, option=option)
+
+
+ENCODERS: Dict[str, Encoder] = {"stdlib": _stdlib_encode}
+if orjson is not None:
+    ENCODERS["orjson"] = _orjson_encode
+
+JSON_ENCODER = os.getenv("JSON_ENCODER", "orjson" if orjson is not None else "stdlib")
+
+
+def register_encoder(name: str, encode: Encoder):
+    """Make another encoder selectable with JSON_ENCODER=name."""
+    ENCODERS[name] = encode
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with the configured encoder, straight to bytes."""
+
+    ensure_ascii = False
+
+    def __init__(self, app, encoder: Optional[str] = None):
+        super().__init__(app)
+        name = encoder or JSON_ENCODER
+        if name not in ENCODERS:
+            raise ValueError(f"Unknown JSON encoder '{name}'. Available: {', '.join(sorted(ENCODERS))}")
+        self.encoder = name
+        self._encode = ENCODERS[name]
+
+    def dump_bytes(self, obj, indent=None) -> bytes:
+        return self._encode(obj, self.default, self.sort_keys, indent)
+
+    def dumps(self, obj, **kwargs) -> str:
+        # Callers asking for json.dumps options get the stdlib path
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dump_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs or self.encoder != "orjson":
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        return self._app.response_class(self.dump_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,356 @@
+import atexit
+import fcntl
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from flask import g, request
+
+# Request and DB instrumentation exposed in the Prometheus text format on /metrics.
+#
+# Counters are plain dicts under one lock, so recording a request costs a few
+# dict updates. Under gunicorn every worker writes a snapshot to METRICS_DIR at
+# most once per METRICS_FLUSH_INTERVAL seconds and /metrics adds them up, so a
+# scrape sees the whole server whichever worker answers it. The snapshots of
+# exited workers (max_requests recycling) are folded into one EXITED_FILE and
+# deleted, so the directory holds one file per live worker.
+#
+# A streamed (NDJSON) response is recorded when its body has been sent, so its
+# latency is the time to the last byte and its DB stats include the queries of
+# the stream.
+
+slow_query_logger = logging.getLogger("hms.slow_query")
+
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_MS", "200")) / 1000
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+EXITED_FILE = "exited.json"
+
+# name -> (help, buckets, label names)
+HISTOGRAMS = {
+    "hms_request_duration_seconds": ("Request latency by route and status code.", LATENCY_BUCKETS, ("method", "route", "status")),
+    "hms_request_db_queries": ("DB queries issued per request.", QUERY_COUNT_BUCKETS, ("route",)),
+    "hms_request_db_seconds": ("Time spent executing DB queries per request.", LATENCY_BUCKETS, ("route",)),
+    "hms_request_db_acquire_seconds": ("Time spent waiting for a pooled DB connection per request.", LATENCY_BUCKETS, ("route",)),
+}
+COUNTERS = {
+    "hms_slow_queries_total": ("Queries slower than SLOW_QUERY_MS.", ("route",)),
+    "hms_prepared_statement_lookups_total": ("Prepared statement cache lookups by statement and hit/miss.", ("statement", "result")),
+}
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+
+def redact_sql(sql) -> str:
+    """Collapse whitespace and replace literals with ?, so no patient data reaches the log."""
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode("utf-8", "replace")
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return " ".join(sql.split()).replace("%s", "?")
+
+
+class RequestStats:
+    """DB work of one request, kept in flask.g."""
+
+    __slots__ = ("queries", "db_time", "acquire_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.acquire_time = 0.0
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {name: {} for name in HISTOGRAMS}   # name -> labels -> [bucket counts..., sum, count]
+        self._counters = {name: {} for name in COUNTERS}       # name -> labels -> value
+        self._gauge_sources = []
+        self._last_flush = 0.0
+
+    def _observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        series = self._histograms[name].get(labels)
+        if series is None:
+            series = self._histograms[name][labels] = [0] * len(buckets) + [0.0, 0]
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def observe_request(self, method, route, status, elapsed, stats=None):
+        with self._lock:
+            self._observe("hms_request_duration_seconds", (method, route, str(status)), elapsed)
+            if stats is not None:
+                self._observe("hms_request_db_queries", (route,), stats.queries)
+                self._observe("hms_request_db_seconds", (route,), stats.db_time)
+                self._observe("hms_request_db_acquire_seconds", (route,), stats.acquire_time)
+        self.maybe_flush()
+
+    def slow_query(self, route, sql, params, elapsed):
+        with self._lock:
+            counter = self._counters["hms_slow_queries_total"]
+            counter[(route,)] = counter.get((route,), 0) + 1
+        slow_query_logger.warning(
+            "slow query %.3fs route=%s params=%d sql=%s",
+            elapsed, route, len(params) if params else 0, redact_sql(sql)
+        )
+
+    def statement_lookup(self, name, hit):
+        key = (name, "hit" if hit else "miss")
+        with self._lock:
+            counter = self._counters["hms_prepared_statement_lookups_total"]
+            counter[key] = counter.get(key, 0) + 1
+
+    def register_gauges(self, source):
+        """source() returns {(metric name, labels tuple of (name, value) pairs): value}."""
+        self._gauge_sources.append(source)
+
+    def _gauges(self):
+        gauges = {}
+        for source in self._gauge_sources:
+            try:
+                gauges.update(source())
+            except Exception:
+                logging.getLogger(__name__).exception("Metrics gauge source failed")
+        return gauges
+
+    def snapshot(self):
+        with self._lock:
+            histograms = {name: [[list(labels), list(series)] for labels, series in values.items()]
+                          for name, values in self._histograms.items()}
+            counters = {name: [[list(labels), value] for labels, value in values.items()]
+                        for name, values in self._counters.items()}
+        gauges = [[name, [list(pair) for pair in labels], value] for (name, labels), value in self._gauges().items()]
+        return {"pid": os.getpid(), "histograms": histograms, "counters": counters, "gauges": gauges}
+
+    def maybe_flush(self, force=False):
+        directory = os.getenv("METRICS_DIR")
+        now = time.monotonic()
+        if not directory or (not force and now - self._last_flush < METRICS_FLUSH_INTERVAL):
+            return
+        self._last_flush = now
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        try:
+            with open(path + ".tmp", "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            logging.getLogger(__name__).exception("Could not write metrics snapshot to %s", directory)
+
+    def _snapshots(self):
+        directory = os.getenv("METRICS_DIR")
+        if not directory:
+            return [self.snapshot()]
+        self.maybe_flush(force=True)
+        _fold_exited(directory)
+        snapshots = []
+        for filename in os.listdir(directory):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        histograms = {name: {} for name in HISTOGRAMS}
+        counters = {name: {} for name in COUNTERS}
+        gauges = {}
+        for snapshot in self._snapshots():
+            _merge(histograms, counters, snapshot)
+            # Counters of exited workers still count, their gauges (pool, cache) do not
+            if snapshot["pid"] and _alive(snapshot["pid"]):
+                for name, labels, value in snapshot["gauges"]:
+                    key = (name, tuple(tuple(pair) for pair in labels))
+                    gauges[key] = gauges.get(key, 0) + value
+        # A ratio cannot be summed across workers, so it is derived after the merge
+        lookups = counters["hms_prepared_statement_lookups_total"]
+        if lookups:
+            hits = sum(value for (_, result), value in lookups.items() if result == "hit")
+            gauges[("hms_prepared_statement_hit_ratio", ())] = hits / sum(lookups.values())
+
+        lines = []
+        for name, (help_text, buckets, label_names) in HISTOGRAMS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for labels, series in sorted(histograms[name].items()):
+                base = list(zip(label_names, labels))
+                cumulative = 0
+                for bound, count in zip(buckets, series):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(base + [('le', _number(bound))])} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(base + [('le', '+Inf')])} {series[-1]}")
+                lines.append(f"{name}_sum{_labels(base)} {_number(series[-2])}")
+                lines.append(f"{name}_count{_labels(base)} {series[-1]}")
+        for name, (help_text, label_names) in COUNTERS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{name}{_labels(list(zip(label_names, labels)))} {_number(value)}")
+        typed = set()
+        for (name, labels), value in sorted(gauges.items()):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{_labels(list(labels))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge(histograms, counters, snapshot):
+    """Add the histograms and counters of a snapshot to the merged dicts."""
+    for name, series_list in snapshot["histograms"].items():
+        for labels, series in series_list:
+            merged = histograms.setdefault(name, {}).setdefault(tuple(labels), [0] * len(series))
+            for i, value in enumerate(series):
+                merged[i] += value
+    for name, values in snapshot["counters"].items():
+        for labels, value in values:
+            key = tuple(labels)
+            counters.setdefault(name, {})[key] = counters.get(name, {}).get(key, 0) + value
+
+
+def _fold_exited(directory):
+    """Add the snapshots of exited workers to EXITED_FILE and delete them."""
+    exited = [
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".json") and filename[:-5].isdigit() and not _alive(int(filename[:-5]))
+    ]
+    if not exited:
+        return
+    # One folder at a time, or two scrapes could add the same snapshot twice
+    with open(os.path.join(directory, "fold.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        histograms, counters, folded = {}, {}, []
+        for filename in [EXITED_FILE] + exited:
+            try:
+                with open(os.path.join(directory, filename)) as f:
+                    _merge(histograms, counters, json.load(f))
+            except FileNotFoundError:
+                continue  # no earlier aggregate, or folded by another scrape already
+            except ValueError:
+                pass  # a torn snapshot cannot be added; it is dropped
+            if filename != EXITED_FILE:
+                folded.append(filename)
+        if not folded:
+            return
+        aggregate = {
+            "pid": 0,
+            "histograms": {name: [[list(labels), series] for labels, series in values.items()] for name, values in histograms.items()},
+            "counters": {name: [[list(labels), value] for labels, value in values.items()] for name, values in counters.items()},
+            "gauges": [],
+        }
+        path = os.path.join(directory, EXITED_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(aggregate, f)
+        os.replace(path + ".tmp", path)
+        for filename in folded:
+            os.remove(os.path.join(directory, filename))
+
+
+def _alive(pid) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+metrics = Metrics()
+atexit.register(metrics.maybe_flush, force=True)
+
+
+def route_label() -> str:
+    """URL rule of the current request; unmatched paths share one label to bound cardinality."""
+    return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+
+def init_app(app):
+    """Time every request of a Flask app and collect its DB stats."""
+
+    @app.before_request
+    def start_request_metrics():
+        g._request_started = time.perf_counter()
+        g._request_stats = RequestStats()
+        g._metrics_route = route_label()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get("_request_started")
+        if started is None:
+            return response
+        record = functools.partial(
+            _record_request, request.method, g._metrics_route, response.status_code, started, g.get("_request_stats")
+        )
+        if response.is_streamed:
+            # The body (and the DB queries of a stream) is produced after this hook
+            response.call_on_close(record)
+        else:
+            record()
+        return response
+
+
+def _record_request(method, route, status, started, stats):
+    metrics.observe_request(method, route, status, time.perf_counter() - started, stats)
+
+
+class InstrumentedCursor:
+    """Cursor wrapper that counts and times execute() calls into the request's stats."""
+
+    def __init__(self, cursor, stats, route):
+        self._cursor = cursor
+        self._stats = stats
+        self._route = route
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _timed(self, method, operation, params):
+        started = time.perf_counter()
+        try:
+            return method(operation, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._stats.queries += 1
+            self._stats.db_time += elapsed
+            if elapsed >= SLOW_QUERY_SECONDS:
+                metrics.slow_query(self._route, operation, params, elapsed)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        return self._timed(lambda op, p: self._cursor.execute(op, p, *args, **kwargs), operation, params)
+
+    def executemany(self, operation, seq_params):
+        return self._timed(self._cursor.executemany, operation, seq_params)
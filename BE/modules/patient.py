@@ -1,49 +1,73 @@
 from datetime import date
-import mysql.connector
+import uuid
 from typing import List, Optional
 from enum import Enum
 
-# Database connection function
-from db_connection.db import get_db_connection
+# Patient domain model; the SQL lives in repository.patients
+from modules.bulk import split_list
+from modules.search import name_index_rows
 
 class PatientGender(Enum):
     MALE = "Male"
     FEMALE = "Female"
     OTHER = "Other"
 
+# value -> member table for row conversion: a dict lookup instead of an Enum call per row
+GENDER_BY_VALUE = {gender.value: gender for gender in PatientGender}
+
+
+def _history_dict(row):
+    if not row["history_id"]:
+        return None
+    allergies = row["allergies"]
+    return {
+        "history_id": row["history_id"],
+        "patient_id": row["patient_id"],
+        "condition": row["condition"],
+        "allergies": allergies.split(",") if allergies else [],
+    }
+
+
+# Response field -> its value in a joined row; the whitelist of ?fields=
+PATIENT_FIELDS = {
+    "patient_id": lambda row: row["patient_id"],
+    "name": lambda row: row["name"],
+    "gender": lambda row: row["gender"],
+    "date_of_birth": lambda row: str(row["date_of_birth"]),
+    "contact_info": lambda row: row["contact_info"],
+    "medical_history": _history_dict,
+}
+
 # MedicalHistory Class
 class MedicalHistory:
+    __slots__ = ("history_id", "patient_id", "condition", "allergies")
+
     def __init__(self, history_id: str, patient_id: str, condition: str, allergies: List[str]):
         self.history_id = history_id
         self.patient_id = patient_id
         self.condition = condition
         self.allergies = allergies
 
-    @staticmethod
-    def update_condition(self, new_condition: str):
-        """Update medical condition in the database."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE MedicalHistory SET `condition` = %s WHERE history_id = %s", (new_condition, self.history_id))
-        conn.commit()
-        conn.close()
-        self.condition = new_condition
+    def to_dict(self):
+        """Convert medical history data to a dictionary."""
+        return {
+            "history_id": self.history_id,
+            "patient_id": self.patient_id,
+            "condition": self.condition,
+            "allergies": self.allergies,
+        }
 
 
-    @staticmethod
-    def update_allergies(self, new_allergies: List[str]):
-        """Update allergies in the database."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("UPDATE MedicalHistory SET `allergies` = %s WHERE history_id = %s", (",".join(new_allergies), self.history_id))
-        conn.commit()
-        conn.close()
-        self.allergies = new_allergies
+def allergy_rows(patient_id: str, allergies: List[str]):
+    """PatientAllergy rows for a list of allergies (trimmed, blanks dropped)."""
+    return [(patient_id, allergy.strip()) for allergy in allergies if allergy and allergy.strip()]
 
 
 # Patient Class
 class Patient:
-    def __init__(self, patient_id: str, name: str, gender: PatientGender, date_of_birth: str, contact_info: str, medical_history: Optional[MedicalHistory] = None):
+    __slots__ = ("patient_id", "name", "gender", "date_of_birth", "contact_info", "medical_history")
+
+    def __init__(self, patient_id: str, name: str, gender: Optional[PatientGender], date_of_birth: str, contact_info: str, medical_history: Optional[MedicalHistory] = None):
         self.patient_id = patient_id
         self.name = name
         self.gender = gender
@@ -52,28 +76,9 @@ class Patient:
         self.medical_history = medical_history
 
     @staticmethod
-    def get_patient_details(patient_id: Optional[str] = None, name: Optional[str] = None):
-        """Retrieve patient details from MySQL."""
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        if patient_id:
-            cursor.execute("SELECT * FROM Patient WHERE patient_id = %s", (patient_id,))
-        elif name:
-            cursor.execute("SELECT * FROM Patient WHERE name = %s", (name,))
-        else:
-            return "Provide a search parameter (patient_id or name)."
-
-        patient_data = cursor.fetchone()
-        if not patient_data:
-            return "No patient found."
-        
-        gender = PatientGender(patient_data["gender"])
-
-        # Get medical history
-        cursor.execute("SELECT * FROM MedicalHistory WHERE patient_id = %s", (patient_data["patient_id"],))
-        history_data = cursor.fetchone()
-        conn.close()
+    def details_from_rows(patient_data, history_data):
+        """Build the get_patient_details payload from a Patient row and its MedicalHistory row."""
+        gender = GENDER_BY_VALUE.get(patient_data["gender"])
 
         if not history_data:
             return {"patient_id": patient_data["patient_id"], "message": "No medical history found."}
@@ -93,47 +98,86 @@ class Patient:
             gender=gender,
             date_of_birth=str(patient_data["date_of_birth"]),
             contact_info=patient_data["contact_info"],
-            medical_history=medical_history  # Ensure medical_history is an instance of MedicalHistory
+            medical_history=medical_history
         )
 
         return patient.to_dict()
 
-    def update_patient_info(self, name: Optional[str] = None, contact_info: Optional[str] = None, gender:Optional[str] = None, date_of_birth:Optional[date] = None):
-        """Update patient info in MySQL."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        if name:
-            cursor.execute("UPDATE Patient SET name = %s WHERE patient_id = %s", (name, self.patient_id))
-            self.name = name
+    @staticmethod
+    def joined_row_to_dict(row, fields: Optional[List[str]] = None) -> dict:
+        """to_dict() of a PATIENT_WITH_HISTORY_SQL row without building the Patient and MedicalHistory objects.
 
-        if contact_info:
-            cursor.execute("UPDATE Patient SET contact_info = %s WHERE patient_id = %s", (contact_info, self.patient_id))
-            self.contact_info = contact_info
+        With fields (a sparse fieldset) only those keys are built, from a row that may hold only their columns.
+        """
+        if fields is not None:
+            return {field: PATIENT_FIELDS[field](row) for field in fields}
+        return {
+            "patient_id": row["patient_id"],
+            "name": row["name"],
+            "gender": row["gender"],
+            "date_of_birth": str(row["date_of_birth"]),
+            "contact_info": row["contact_info"],
+            "medical_history": _history_dict(row),
+        }
 
-        if gender:
-            cursor.execute("UPDATE Patient SET gender = %s WHERE patient_id = %s", (gender, self.patient_id))
-            self.gender = gender
+    @staticmethod
+    def _lower_history(current, row):
+        """Of two joined rows of one patient, the one with the lower history_id (a row without history loses)."""
+        history_id = row.get("history_id")
+        if history_id and (not current.get("history_id") or history_id < current["history_id"]):
+            return row
+        return current
 
-        if date_of_birth:
-            cursor.execute("UPDATE Patient SET date_of_birth = %s WHERE patient_id = %s", (date_of_birth, self.patient_id))
-            self.date_of_birth = date_of_birth
+    @staticmethod
+    def _merge_rows(rows, fields: Optional[List[str]] = None):
+        """Yield patient dicts from joined rows grouped by patient, keeping the lowest history_id of each.
+
+        The rows of one patient arrive together but in no particular history order.
+        """
+        current = None
+        for row in rows:
+            if current is not None and row["patient_id"] == current["patient_id"]:
+                current = Patient._lower_history(current, row)
+                continue
+            if current is not None:
+                yield Patient.joined_row_to_dict(current, fields)
+            current = row
+        if current is not None:
+            yield Patient.joined_row_to_dict(current, fields)
 
-        conn.commit()
-        conn.close()
+    @staticmethod
+    def bulk_params(record: dict) -> dict:
+        """Validate one bulk-import record; returns params for the PATIENT_BULK_STATEMENTS of repository.patients."""
+        missing = [field for field in ("patient_id", "name", "date_of_birth", "contact_info", "condition", "allergies") if not record.get(field)]
+        if missing:
+            raise ValueError(f"Missing fields: {', '.join(missing)}")
+
+        gender = record.get("gender") or None
+        if gender and gender not in PatientGender._value2member_map_:
+            raise ValueError(f"Invalid gender '{gender}'. Must be one of: {list(PatientGender._value2member_map_.keys())}")
+
+        date_of_birth = date.fromisoformat(str(record["date_of_birth"]))
+        patient_id = record["patient_id"]
+        allergies = split_list(record["allergies"])
+        return {
+            "patient": (patient_id, record["name"], date_of_birth, record["contact_info"], gender),
+            "history": (str(uuid.uuid4()), patient_id, record["condition"], ",".join(allergies)),
+            "allergies": allergy_rows(patient_id, allergies),
+            "trigrams": name_index_rows(patient_id, record["name"]),
+        }
 
     def to_dict(self):
         """Convert patient data to a dictionary."""
         return {
             "patient_id": self.patient_id,
             "name": self.name,
-            "gender": self.gender.value,
+            "gender": self.gender.value if self.gender else None,
             "date_of_birth": self.date_of_birth,
             "contact_info": self.contact_info,
-            "medical_history": self.medical_history.__dict__ if self.medical_history else None
+            "medical_history": self.medical_history.to_dict() if self.medical_history else None
         }
 
 # Example Usage
 # if __name__ == "__main__":
-#     # Retrieve patient details from MySQL
-#     print(Patient.get_patient_details(patient_id="P001"))
+#     # Retrieve patient details from the database
+#     print(PatientRepository.get_details(patient_id="P001"))
@@ -0,0 +1,155 @@
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+# Helpers shared by the model classes: keyset pagination, filter clauses, sparse fieldsets and partial updates.
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 1000
+
+
+class QueryArgError(ValueError):
+    """Raised when a list query parameter is invalid (reported as HTTP 400)."""
+
+
+class Page:
+    """Keyset page request: rows strictly after `after` in key order."""
+
+    def __init__(self, after: Optional[str] = None, limit: Optional[int] = None, descending: bool = False):
+        self.after = after
+        self.limit = limit
+        self.descending = descending
+
+    @property
+    def direction(self) -> str:
+        return "DESC" if self.descending else "ASC"
+
+    @classmethod
+    def from_args(cls, args) -> "Page":
+        """Parse ?after=&limit=&order= ; without after/limit the whole table is returned."""
+        after = args.get("after") or None
+        limit = args.get("limit")
+        order = args.get("order", "asc").lower()
+
+        if order not in ("asc", "desc"):
+            raise QueryArgError("order must be 'asc' or 'desc'.")
+
+        if limit is None:
+            limit = DEFAULT_PAGE_LIMIT if after else None
+        else:
+            try:
+                limit = int(limit)
+            except ValueError:
+                raise QueryArgError("limit must be an integer.")
+            if not 1 <= limit <= MAX_PAGE_LIMIT:
+                raise QueryArgError(f"limit must be between 1 and {MAX_PAGE_LIMIT}.")
+
+        return cls(after=after, limit=limit, descending=order == "desc")
+
+
+def equals_filter(args, name: str, column: Optional[str] = None) -> List[Tuple[str, str]]:
+    """`column = %s` filter for ?name= when it is given."""
+    value = args.get(name)
+    return [(f"{column or name} = %s", value)] if value else []
+
+
+def enum_filter(args, name: str, enum, column: Optional[str] = None) -> List[Tuple[str, str]]:
+    """`column = %s` filter for ?name=, validated against the enum values."""
+    value = args.get(name)
+    if not value:
+        return []
+    if value not in enum._value2member_map_:
+        raise QueryArgError(f"Invalid {name} '{value}'. Must be one of: {list(enum._value2member_map_.keys())}")
+    return [(f"{column or name} = %s", value)]
+
+
+def date_filter(args, name: str, column: str, op: str) -> List[Tuple[str, date]]:
+    """`column <op> %s` filter for an ISO date parameter."""
+    value = args.get(name)
+    if not value:
+        return []
+    try:
+        return [(f"{column} {op} %s", date.fromisoformat(value))]
+    except ValueError:
+        raise QueryArgError(f"{name} must be a date in YYYY-MM-DD format.")
+
+
+def parse_fields(args, allowed: Iterable[str], key: str) -> Optional[List[str]]:
+    """Sparse fieldset from ?fields=a,b, checked against the allowed whitelist.
+
+    Returns the requested fields in whitelist order, always including the key
+    (the cursor of the next page is read from it), or None without ?fields=.
+    """
+    value = args.get("fields")
+    if value is None:
+        return None
+    allowed = list(allowed)
+    requested = {field.strip() for field in value.split(",") if field.strip()}
+    if not requested:
+        raise QueryArgError(f"fields must name at least one of: {allowed}")
+    unknown = requested - set(allowed)
+    if unknown:
+        raise QueryArgError(f"Unknown field(s): {', '.join(sorted(unknown))}. Must be among: {allowed}")
+    requested.add(key)
+    return [field for field in allowed if field in requested]
+
+
+def field_columns(fields: Optional[List[str]], default: str = "*") -> str:
+    """SELECT list of a sparse fieldset whose fields are the table's own column names."""
+    if fields is None:
+        return default
+    return ", ".join(f"`{field}`" for field in fields)
+
+
+def select_page(table: str, key: str, page: Page, filters: Iterable[Tuple[str, object]] = (), columns: str = "*", lookahead: bool = True):
+    """Build the SELECT for one keyset page.
+
+    With lookahead one extra row is fetched so split_page() can tell whether a next page exists.
+    """
+    clauses = [clause for clause, _ in filters]
+    params = [value for _, value in filters]
+
+    if page.after is not None:
+        clauses.append(f"{key} {'<' if page.descending else '>'} %s")
+        params.append(page.after)
+
+    sql = f"SELECT {columns} FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {key} {page.direction}"
+    if page.limit:
+        sql += " LIMIT %s"
+        params.append(page.limit + 1 if lookahead else page.limit)
+
+    return sql, tuple(params)
+
+
+def split_page(items: list, key: str, page: Page):
+    """Drop the look-ahead row and return (items, next_cursor)."""
+    if not page.limit or len(items) <= page.limit:
+        return items, None
+    items = items[:page.limit]
+    return items, items[-1][key]
+
+
+def update_columns(cursor, table: str, key_column: str, key, changes: dict, allowed: Iterable[str]) -> bool:
+    """Write every non-empty value in changes with a single UPDATE.
+
+    Column names are checked against the allowed whitelist. Returns True when the
+    row exists; the connection uses FOUND_ROWS so rowcount counts matched rows even
+    when the new values equal the old ones.
+    """
+    unknown = set(changes) - set(allowed)
+    if unknown:
+        raise ValueError(f"Cannot update {table} column(s): {', '.join(sorted(unknown))}")
+
+    changes = {column: value for column, value in changes.items() if value}
+    if not changes:
+        cursor.execute(f"SELECT 1 FROM {table} WHERE {key_column} = %s", (key,))
+        return cursor.fetchone() is not None
+
+    assignments = ", ".join(f"`{column}` = %s" for column in changes)
+    cursor.execute(
+        f"UPDATE {table} SET {assignments} WHERE {key_column} = %s",
+        (*changes.values(), key)
+    )
+    return cursor.rowcount > 0
@@ -0,0 +1,84 @@
+import re
+import unicodedata
+from typing import List, Set, Tuple
+
+# Patient name search for /patients/search?q=: prefix matches come from the
+# index on Patient.name, word-prefix (e.g. surname) and typo-tolerant matches
+# from the PatientNameTrigram table. This module holds the trigram maths; the
+# queries live in repository.patients.
+
+# Minimum share of the query's trigrams a name must contain to be a fuzzy match
+MIN_SIMILARITY = 0.5
+# Fuzzy candidates fetched per requested result before re-ranking in Python
+CANDIDATE_FACTOR = 5
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and turn everything but letters and digits into spaces."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of every word, padded like pg_trgm ("  jo", " jon", "jon", "on ")."""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def query_trigrams(text: str) -> Set[str]:
+    """Trigrams of a search query; the last word is still being typed, so it gets no end padding."""
+    words = normalize(text).split()
+    grams = trigrams(" ".join(words[:-1]))
+    if words:
+        padded = f"  {words[-1]}"
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def is_word_prefix(query: str, name: str) -> bool:
+    """True when every word of the query starts a word of the name ("doe" in "John Doe")."""
+    name_words = normalize(name).split()
+    query_words = normalize(query).split()
+    return bool(query_words) and all(any(word.startswith(part) for word in name_words) for part in query_words)
+
+
+def similarity(query: Set[str], name: Set[str]) -> float:
+    """Share of the query trigrams found in the name, so a partial name can still score 1.0."""
+    if not query:
+        return 0.0
+    return len(query & name) / len(query)
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def name_index_rows(patient_id: str, name: str) -> List[Tuple[str, str]]:
+    """PatientNameTrigram rows for one patient name."""
+    return [(gram, patient_id) for gram in sorted(trigrams(name))]
+
+
+def rank_matches(query: str, rows, limit: int) -> List[dict]:
+    """Score fuzzy candidate rows against the query and keep the best `limit` matches."""
+    grams = query_trigrams(query)
+    fuzzy = []
+    for row in rows:
+        name_grams = trigrams(row["name"])
+        score = similarity(grams, name_grams)
+        if score >= MIN_SIMILARITY:
+            fuzzy.append((score, jaccard(grams, name_grams), dict(row, score=round(score, 3))))
+    # Closer overall names win ties on the query score
+    fuzzy.sort(key=lambda match: match[:2], reverse=True)
+    return [row for _, _, row in fuzzy[:limit]]
+
+
+if __name__ == "__main__":
+    from repository.patients import PatientRepository
+
+    print(f"Indexed {PatientRepository.rebuild_name_index()} patient names.")
@@ -1,8 +1,8 @@
-import mysql.connector
 import json
 from enum import Enum
 from typing import List, Optional, Tuple
-from db_connection.db import get_db_connection  # Assuming you have a db connection module
+
+# Staff domain model; the SQL lives in repository.staff
 
 # Enums for Staff Role & Ward
 class StaffRole(Enum):
@@ -19,8 +19,67 @@ class Ward(Enum):
     PEDIATRIC = "Pediatric"
     EMERGENCY = "Emergency"
 
+class ShiftType(Enum):
+    DAY = "Day"
+    NIGHT = "Night"
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# value -> member tables for row conversion: a dict lookup instead of an Enum call per row
+ROLE_BY_VALUE = {role.value: role for role in StaffRole}
+STATUS_BY_VALUE = {status.value: status for status in StaffStatus}
+WARD_BY_VALUE = {ward.value: ward for ward in Ward}
+
+# Response field -> its value in a Staff row; the whitelist of ?fields=
+STAFF_FIELDS = {
+    "staff_id": lambda record: record["staff_id"],
+    "name": lambda record: record["name"],
+    "contact_info": lambda record: record["contact_info"],
+    "role": lambda record: record["role"],
+    "status": lambda record: record["status"],
+    "specialization": lambda record: record["specialization"],
+    "department": lambda record: record["department"],
+    "ward": lambda record: record["ward"] or None,
+    "shift": lambda record: json.loads(record["shift"]) if record["shift"] else [],
+}
+
+def normalize_shift(shift) -> list:
+    """Turn "Monday,Day" / "Monday Day" entries into [day, shift_type] pairs; other entries are kept as they are."""
+    normalized = []
+    for entry in shift or []:
+        if isinstance(entry, str):
+            parts = entry.replace(",", " ").split()
+            if len(parts) == 2:
+                entry = parts
+        normalized.append(entry)
+    return normalized
+
+
+def shift_error(shift) -> Optional[str]:
+    """400 message for a shift list that is not made of [weekday, shift_type] pairs, or None."""
+    if not isinstance(shift, list):
+        return "shift must be a list of [day, shift_type] pairs."
+    for entry in normalize_shift(shift):
+        if not (isinstance(entry, (list, tuple)) and len(entry) == 2
+                and entry[0] in WEEKDAYS and entry[1] in ShiftType._value2member_map_):
+            return (f"Invalid shift entry {entry!r}. Must be [day, shift_type] with day one of {list(WEEKDAYS)} "
+                    f"and shift_type one of {list(ShiftType._value2member_map_.keys())}.")
+    return None
+
+
+def shift_rows(staff_id: str, shift) -> List[Tuple[str, str, str]]:
+    """StaffShift roster rows for every [day, shift_type] pair of a shift list."""
+    return [
+        (entry[0], entry[1], staff_id)
+        for entry in shift or []
+        if isinstance(entry, (list, tuple)) and len(entry) == 2 and all(isinstance(part, str) for part in entry)
+    ]
+
+
 # Staff Class (Combining Doctor & Nurse)
 class Staff:
+    __slots__ = ("staff_id", "name", "contact_info", "role", "specialization", "department", "ward", "status", "shift")
+
     def __init__(
         self,
         staff_id: str,
@@ -43,104 +102,81 @@ class Staff:
         self.status = status
         self.shift = shift or []  # List of shifts (day, shift_type)
 
-    def update_info(self, name: Optional[str] = None, contact_info: Optional[str] = None, role: Optional[str] = None, status: Optional[str] = None, specialization: Optional[str] = None, department: Optional[str] = None, ward: Optional[str] = None):
-        """Update staff details in the database."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        if name:
-            cursor.execute("UPDATE Staff SET name = %s WHERE staff_id = %s", (name, self.staff_id))
-            self.name = name
-
-        if contact_info:
-            cursor.execute("UPDATE Staff SET contact_info = %s WHERE staff_id = %s", (contact_info, self.staff_id))
-            self.contact_info = contact_info
-
-        if role:
-            cursor.execute("UPDATE Staff SET role = %s WHERE staff_id = %s", (role, self.staff_id))
-            self.role = role
-
-        if status:
-            cursor.execute("UPDATE Staff SET status = %s WHERE staff_id = %s", (status, self.staff_id))
-            self.status = status
-
-        if specialization:
-            cursor.execute("UPDATE Staff SET specialization = %s WHERE staff_id = %s", (specialization, self.staff_id))
-            self.specialization = specialization
-
-        if department:
-            cursor.execute("UPDATE Staff SET department = %s WHERE staff_id = %s", (department, self.staff_id))
-            self.department = department
-
-        if ward:
-            cursor.execute("UPDATE Staff SET ward = %s WHERE staff_id = %s", (ward, self.staff_id))
-            self.ward = ward
-
-        conn.commit()
-        conn.close()
-
-    def update_shift(self, new_shift: List[Tuple[str, str]]):
-        """Update the staff's shift schedule in the database."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Convert list of tuples to JSON format
-        shift_json = json.dumps(new_shift)
-
-        cursor.execute("UPDATE Staff SET shift = %s WHERE staff_id = %s", (shift_json, self.staff_id))
-        conn.commit()
-        conn.close()
-
-        self.shift = new_shift  # Update local object
-
     @staticmethod
-    def get_availability(staff_id: str) -> List[Tuple[str, str]]:
-        """Retrieve the available shifts of a staff member from the database."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT shift FROM Staff WHERE staff_id = %s", (staff_id,))
-        shifts = cursor.fetchone()
-        conn.close()
-
-        if not shifts or not shifts[0]:
-            return []
-
-        return json.loads(shifts[0])  # Convert JSON back to list of tuples
+    def from_list_row(record) -> "Staff":
+        """Build a Staff object from a raw Staff row as served by the list endpoint."""
+        return Staff(
+            staff_id=record["staff_id"],
+            name=record["name"],
+            contact_info=record["contact_info"],
+            role=ROLE_BY_VALUE[record["role"]],
+            status=STATUS_BY_VALUE[record["status"]],
+            specialization=record.get("specialization"),
+            department=record.get("department"),
+            ward=WARD_BY_VALUE[record["ward"]] if record.get("ward") else None,
+            shift=json.loads(record["shift"]) if record.get("shift") else []
+        )
 
     @staticmethod
-    def get_staff_details(staff_id: str):
-        """Retrieve staff details from MySQL."""
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM Staff WHERE staff_id = %s", (staff_id,))
-        staff_data = cursor.fetchone()
-        conn.close()
+    def row_to_dict(record, fields: Optional[List[str]] = None) -> dict:
+        """to_dict() of a raw Staff row without building the Staff object, for the list endpoints.
+
+        With fields (a sparse fieldset) only those keys are built, from a row that may hold only their columns.
+        """
+        if fields is not None:
+            return {field: STAFF_FIELDS[field](record) for field in fields}
+        shift = record.get("shift")
+        return {
+            "staff_id": record["staff_id"],
+            "name": record["name"],
+            "contact_info": record["contact_info"],
+            "role": record["role"],
+            "status": record["status"],
+            "specialization": record.get("specialization"),
+            "department": record.get("department"),
+            "ward": record.get("ward") or None,
+            "shift": json.loads(shift) if shift else [],
+        }
 
+    @staticmethod
+    def details_from_row(staff_data):
+        """Build the get_staff_details payload from a Staff row (or None)."""
         if not staff_data:
             return "No staff member found."
 
-        # Convert role & ward from string to Enum
-        role = StaffRole(staff_data["role"])
-        status = StaffStatus(staff_data["status"])
-        ward = Ward(staff_data["ward"]) if staff_data["ward"] else None
-
-        # Deserialize shift JSON string into list of tuples
-        shift = json.loads(staff_data["shift"]) if staff_data["shift"] else []
-
-        # Create a Staff object
-        staff = Staff(
-            staff_id=staff_data["staff_id"],
-            name=staff_data["name"],
-            contact_info=staff_data["contact_info"],
-            role=role,
-            status=status,
-            specialization=staff_data.get("specialization"),
-            department=staff_data.get("department"),
-            ward=ward,
-            shift=shift,
-        )
-        return staff.to_dict()
+        return Staff.from_list_row(staff_data).to_dict()
 
+    @staticmethod
+    def bulk_params(record: dict) -> dict:
+        """Validate one bulk-import record; returns params for the STAFF_BULK_STATEMENTS of repository.staff."""
+        missing = [field for field in ("staff_id", "name", "contact_info", "role") if not record.get(field)]
+        if missing:
+            raise ValueError(f"Missing fields: {', '.join(missing)}")
+
+        role = record["role"]
+        status = record.get("status") or StaffStatus.ACTIVE.value
+        ward = record.get("ward") or None
+        for value, table, field in ((role, ROLE_BY_VALUE, "role"), (status, STATUS_BY_VALUE, "status"), (ward, WARD_BY_VALUE, "ward")):
+            if value and value not in table:
+                raise ValueError(f"Invalid {field} '{value}'. Must be one of: {list(table)}")
+
+        # CSV cells carry the shift list as a JSON string
+        shift = record.get("shift") or []
+        if isinstance(shift, str):
+            shift = json.loads(shift)
+        message = shift_error(shift)
+        if message:
+            raise ValueError(message)
+        shift = normalize_shift(shift)
+
+        return {
+            "staff": (
+                record["staff_id"], record["name"], record["contact_info"], role, status,
+                record.get("specialization") or None, record.get("department") or None, ward,
+                json.dumps(shift),
+            ),
+            "roster": shift_rows(record["staff_id"], shift),
+        }
 
     def to_dict(self):
         """Convert staff data to a dictionary."""
@@ -0,0 +1,93 @@
+import fcntl
+import mmap
+import os
+import secrets
+import threading
+import zlib
+
+# Version counters behind the ETags of /patient, /staff, /patients and /staffs.
+#
+# Every write through the repositories bumps the counter of the entity and of
+# its collection; a GET tags its response with the counter it read *before*
+# loading, so a tag can only ever be older than the data it came with, never
+# newer. The counters live in a shared memory map: VERSIONS_FILE (set by
+# gunicorn.conf.py and reset with every master start) lets all workers see each
+# other's bumps, without it the map is anonymous and shared only with processes
+# forked after import. Entities hash onto VERSION_SLOTS slots, so a collision
+# costs a spurious refetch, never a stale 304. The seed script and migrations
+# bump through the repositories' notify_bulk_write, which reaches a running
+# server when they are started with its VERSIONS_FILE; other writes made straight
+# to the database (SQL consoles) do not bump anything, restart the server after them.
+
+VERSION_SLOTS = int(os.getenv("VERSION_SLOTS", "65536"))
+
+# Slot 0 holds the epoch, a random number per versions file, so tags handed
+# out before a restart never match counters that started again from zero.
+COLLECTIONS = ("patients", "staff")
+_HEADER = 1 + len(COLLECTIONS)
+
+
+class VersionTable:
+    def __init__(self, path=None, slots: int = VERSION_SLOTS):
+        self.slots = slots
+        size = 8 * (_HEADER + slots)
+        self._lock = threading.Lock()
+        self._fd = None
+        if path:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+        else:
+            self._map = mmap.mmap(-1, size)
+        self._counters = memoryview(self._map).cast("Q")
+        with self._locked():
+            if not self._counters[0]:
+                self._counters[0] = secrets.randbits(32) or 1
+
+    @property
+    def epoch(self) -> int:
+        return self._counters[0]
+
+    def _slot(self, collection: str, key=None) -> int:
+        if key is None:
+            return 1 + COLLECTIONS.index(collection)
+        return _HEADER + zlib.crc32(f"{collection}:{key}".encode()) % self.slots
+
+    def _locked(self):
+        return FileLock(self._lock, self._fd)
+
+    def get(self, collection: str, key=None) -> int:
+        """Current version of a collection, or of one entity in it."""
+        return self._counters[self._slot(collection, key)]
+
+    def bump(self, collection: str, *keys):
+        """Record a write to the given entities (none for inserts of unknown ids) and their collection."""
+        with self._locked():
+            for slot in {self._slot(collection), *(self._slot(collection, key) for key in keys)}:
+                self._counters[slot] += 1
+
+    def etag(self, version: int) -> str:
+        """ETag of a version read with get()."""
+        return f"{self.epoch:08x}-{version}"
+
+
+class FileLock:
+    """Thread lock plus, for a versions file, a POSIX record lock across processes."""
+
+    def __init__(self, lock, fd):
+        self._lock = lock
+        self._fd = fd
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._fd is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+
+versions = VersionTable(os.getenv("VERSIONS_FILE"))
@@ -0,0 +1,9 @@
+# Data access for the HTTP layer: every query of the API lives in these
+# repositories. They run on whichever backend db_connection is configured for
+# (DB_BACKEND=mysql or sqlite), so the routes never touch SQL or a driver.
+
+from repository.patients import PatientRepository
+from repository.staff import StaffRepository
+from repository.users import UserRepository
+
+__all__ = ["PatientRepository", "StaffRepository", "UserRepository"]
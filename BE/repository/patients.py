@@ -0,0 +1,410 @@
+import math
+import re
+import uuid
+from typing import List, Optional
+
+from db_connection.db import after_commit, get_db_connection, get_stream_connection, in_transaction
+from db_connection.statements import fetch_one, register
+from modules.bulk import DEFAULT_BATCH_SIZE, bulk_insert
+from modules.cache import patient_cache
+from modules.events import change_feed
+from modules.patient import Patient, allergy_rows
+from modules.query import Page, select_page, split_page, update_columns
+from modules.search import CANDIDATE_FACTOR, MIN_SIMILARITY, is_word_prefix, name_index_rows, query_trigrams, rank_matches
+from modules.versions import versions
+
+PATIENT_INSERT_SQL = "INSERT INTO Patient (patient_id, name, date_of_birth, contact_info, gender) VALUES (%s, %s, %s, %s, %s)"
+HISTORY_INSERT_SQL = "INSERT INTO MedicalHistory (history_id, patient_id, `condition`, allergies) VALUES (%s, %s, %s, %s)"
+ALLERGY_INSERT_SQL = "INSERT IGNORE INTO PatientAllergy (patient_id, allergy) VALUES (%s, %s)"
+TRIGRAM_INSERT_SQL = "INSERT IGNORE INTO PatientNameTrigram (trigram, patient_id) VALUES (%s, %s)"
+
+# Hot lookups, run as prepared statements (db_connection.statements)
+PATIENT_BY_ID = register("patient_by_id", "SELECT * FROM Patient WHERE patient_id = %s")
+PATIENT_BY_NAME = register("patient_by_name", "SELECT * FROM Patient WHERE name = %s LIMIT 1")
+HISTORY_BY_PATIENT = register(
+    "history_by_patient", "SELECT * FROM MedicalHistory WHERE patient_id = %s ORDER BY history_id LIMIT 1"
+)
+
+# bulk_insert statements for Patient.bulk_params records
+PATIENT_BULK_STATEMENTS = [
+    ("patient", PATIENT_INSERT_SQL),
+    ("history", HISTORY_INSERT_SQL),
+    ("allergies", ALLERGY_INSERT_SQL),
+    ("trigrams", TRIGRAM_INSERT_SQL),
+]
+
+# The history a patient's reads return when there are several: the lowest history_id.
+# Writes target that one row; the aggregate is materialized, which MySQL needs to
+# select from the table being updated.
+PATIENT_HISTORY_FILTER = (
+    "history_id = (SELECT history_id FROM"
+    " (SELECT MIN(history_id) AS history_id FROM MedicalHistory WHERE patient_id = %s) h)"
+)
+
+# Columns that update_fields may write
+PATIENT_UPDATABLE_FIELDS = ("name", "contact_info", "gender", "date_of_birth")
+
+# Patient columns joined with their medical history, one row per history record.
+# {patients} is the Patient table or a derived table selecting one page of it.
+# Ordered by patient_id alone, so the unbounded stream is read off the primary
+# key without a filesort; Patient._merge_rows picks the history of each patient.
+PATIENT_WITH_HISTORY_SQL = """
+    SELECT p.patient_id, p.name, p.gender, p.date_of_birth, p.contact_info,
+           h.history_id, h.`condition`, h.allergies
+    FROM {patients} p
+    LEFT JOIN MedicalHistory h ON h.patient_id = p.patient_id
+"""
+
+# Patient columns behind each response field of a sparse fieldset (?fields=);
+# medical_history adds the join and HISTORY_COLUMNS
+PATIENT_FIELD_COLUMNS = {
+    "patient_id": "p.patient_id",
+    "name": "p.name",
+    "gender": "p.gender",
+    "date_of_birth": "p.date_of_birth",
+    "contact_info": "p.contact_info",
+}
+HISTORY_COLUMNS = "h.history_id, h.`condition`, h.allergies"
+
+
+def replace_allergies(cursor, patient_id: str, allergies: List[str]):
+    """Rewrite the normalized allergy rows of a patient; the caller commits."""
+    cursor.execute("DELETE FROM PatientAllergy WHERE patient_id = %s", (patient_id,))
+    rows = allergy_rows(patient_id, allergies)
+    if rows:
+        cursor.executemany(ALLERGY_INSERT_SQL, rows)
+
+
+def replace_name_index(cursor, patient_id: str, name: str):
+    """Rewrite the trigram rows of a patient; the caller commits."""
+    cursor.execute("DELETE FROM PatientNameTrigram WHERE patient_id = %s", (patient_id,))
+    rows = name_index_rows(patient_id, name)
+    if rows:
+        cursor.executemany(TRIGRAM_INSERT_SQL, rows)
+
+
+def _like_prefix(text: str) -> str:
+    return re.sub(r"([\\%_])", r"\\\1", text) + "%"
+
+
+class PatientRepository:
+    """Patients, their medical history and the allergy and name search indexes."""
+
+    @staticmethod
+    def get_details(patient_id: Optional[str] = None, name: Optional[str] = None):
+        """Retrieve patient details, served from the entity cache when looked up by patient_id."""
+        if patient_id:
+            # Keyed by version, so a write in any worker retires the cached copy
+            return patient_cache.get_or_load(
+                (patient_id, versions.get("patients", patient_id)),
+                lambda: PatientRepository._fetch_details(patient_id=patient_id),
+                cacheable=lambda details: isinstance(details, dict) and not in_transaction()
+            )
+        return PatientRepository._fetch_details(name=name)
+
+    @staticmethod
+    def _fetch_details(patient_id: Optional[str] = None, name: Optional[str] = None):
+        if patient_id:
+            statement, key = PATIENT_BY_ID, patient_id
+        elif name:
+            statement, key = PATIENT_BY_NAME, name
+        else:
+            return "Provide a search parameter (patient_id or name)."
+
+        conn = get_db_connection()
+        patient_data = fetch_one(conn, statement, (key,))
+        if not patient_data:
+            conn.close()
+            return "No patient found."
+
+        # Get medical history
+        history_data = fetch_one(conn, HISTORY_BY_PATIENT, (patient_data["patient_id"],))
+        conn.close()
+
+        return Patient.details_from_rows(patient_data, history_data)
+
+    @staticmethod
+    def page_query(page: Page, filters=(), lookahead: bool = True, fields: Optional[List[str]] = None):
+        """SQL and params joining one keyset page of patients with their history.
+
+        fields (a sparse fieldset, see Patient.joined_row_to_dict) narrows the SELECT,
+        and without medical_history the join is left out altogether.
+        """
+        if fields is None:
+            patients_sql, params = select_page("Patient", "patient_id", page, filters, lookahead=lookahead)
+            sql = (
+                PATIENT_WITH_HISTORY_SQL.format(patients=f"({patients_sql})")
+                + f" ORDER BY p.patient_id {page.direction}"
+            )
+            return sql, params
+
+        columns = ", ".join(PATIENT_FIELD_COLUMNS[field] for field in fields if field in PATIENT_FIELD_COLUMNS)
+        patients_sql, params = select_page("Patient p", "p.patient_id", page, filters, columns=columns, lookahead=lookahead)
+        if "medical_history" not in fields:
+            return patients_sql, params
+        sql = (
+            f"SELECT p.*, {HISTORY_COLUMNS} FROM ({patients_sql}) p"
+            " LEFT JOIN MedicalHistory h ON h.patient_id = p.patient_id"
+            f" ORDER BY p.patient_id {page.direction}"
+        )
+        return sql, params
+
+    @staticmethod
+    def fields_query(fields: List[str], patient_id: Optional[str] = None, name: Optional[str] = None):
+        """SQL and params reading a sparse fieldset of one patient, by patient_id or name."""
+        key_filter = ("p.patient_id = %s", patient_id) if patient_id else ("p.name = %s", name)
+        return PatientRepository.page_query(Page(limit=1), [key_filter], lookahead=False, fields=fields)
+
+    @staticmethod
+    def get_fields(fields: List[str], patient_id: Optional[str] = None, name: Optional[str] = None):
+        """A sparse fieldset of one patient from a narrowed SELECT (not cached), or "No patient found."."""
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(*PatientRepository.fields_query(fields, patient_id, name))
+        patients = list(Patient._merge_rows(cursor, fields))
+        cursor.close()
+        conn.close()
+        return patients[0] if patients else "No patient found."
+
+    @staticmethod
+    def allergy_page_query(allergy: str, page: Page):
+        """SQL and params for one page of patients with an allergy, via the (allergy, patient_id) index."""
+        patients_sql, params = select_page(
+            "PatientAllergy a JOIN Patient p ON p.patient_id = a.patient_id",
+            "a.patient_id", page, [("a.allergy = %s", allergy)], columns="p.*"
+        )
+        sql = (
+            PATIENT_WITH_HISTORY_SQL.format(patients=f"({patients_sql})")
+            + f" ORDER BY p.patient_id {page.direction}"
+        )
+        return sql, params
+
+    @staticmethod
+    def _fetch_page(sql, params, page: Page, fields: Optional[List[str]] = None):
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        patients = list(Patient._merge_rows(cursor, fields))
+        cursor.close()
+        conn.close()
+        return split_page(patients, "patient_id", page)
+
+    @staticmethod
+    def get_page(page: Optional[Page] = None, filters=(), fields: Optional[List[str]] = None):
+        """One keyset page of patients with their medical history, from a single query.
+
+        Returns (patients, next_cursor); next_cursor is None on the last page.
+        """
+        page = page or Page()
+        return PatientRepository._fetch_page(*PatientRepository.page_query(page, filters, fields=fields), page, fields)
+
+    @staticmethod
+    def stream(page: Optional[Page] = None, filters=(), fields: Optional[List[str]] = None):
+        """Yield patient dicts straight from an unbuffered server-side cursor."""
+        page = page or Page()
+        sql, params = PatientRepository.page_query(page, filters, lookahead=False, fields=fields)
+
+        conn = get_stream_connection()
+        finished = False
+        try:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            cursor.execute(sql, params)
+            yield from Patient._merge_rows(cursor, fields)
+            cursor.close()
+            finished = True
+        finally:
+            # A stream abandoned mid-way still has unread rows on the wire
+            if finished:
+                conn.close()
+            else:
+                conn.invalidate()
+
+    @staticmethod
+    def search_by_allergy(allergy: str, page: Page):
+        """Patients with the given allergy; returns (patients, next_cursor) like get_page."""
+        return PatientRepository._fetch_page(*PatientRepository.allergy_page_query(allergy, page), page)
+
+    @staticmethod
+    def search_names(q: str, limit: int = 10) -> List[dict]:
+        """Prefix matches first (score 1.0): of the whole name, then of its words; then fuzzy trigram matches."""
+        q = q.strip()
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        # Range scan on idx_patient_name
+        cursor.execute(
+            "SELECT patient_id, name, date_of_birth FROM Patient WHERE name LIKE %s ORDER BY name LIMIT %s",
+            (_like_prefix(q), limit)
+        )
+        results = [dict(row, score=1.0) for row in cursor.fetchall()]
+
+        # Word prefixes hold every trigram of the query, so they come back first from the trigram table
+        grams = query_trigrams(q)
+        if len(results) < limit and grams:
+            placeholders = ", ".join(["%s"] * len(grams))
+            min_hits = max(1, math.ceil(len(grams) * MIN_SIMILARITY))
+            cursor.execute(
+                f"""
+                SELECT p.patient_id, p.name, p.date_of_birth
+                FROM (
+                    SELECT patient_id, COUNT(*) AS hits
+                    FROM PatientNameTrigram
+                    WHERE trigram IN ({placeholders})
+                    GROUP BY patient_id
+                    HAVING hits >= %s
+                    ORDER BY hits DESC
+                    LIMIT %s
+                ) t
+                JOIN Patient p ON p.patient_id = t.patient_id
+                """,
+                (*sorted(grams), min_hits, limit * CANDIDATE_FACTOR)
+            )
+            seen = {row["patient_id"] for row in results}
+            candidates = [row for row in cursor.fetchall() if row["patient_id"] not in seen]
+            word_prefixes = sorted((row for row in candidates if is_word_prefix(q, row["name"])), key=lambda row: row["name"])
+            results.extend(dict(row, score=1.0) for row in word_prefixes[:limit - len(results)])
+            fuzzy = [row for row in candidates if not is_word_prefix(q, row["name"])]
+            results.extend(rank_matches(q, fuzzy, limit - len(results)))
+
+        cursor.close()
+        conn.close()
+        for row in results:
+            row["date_of_birth"] = str(row["date_of_birth"])
+        return results
+
+    @staticmethod
+    def rebuild_name_index(conn=None, batch_size: int = 5000) -> int:
+        """Recompute PatientNameTrigram for every patient (backfill / repair).
+
+        Patients are read in keyset batches that are fully fetched before their rows
+        are written, so one connection does both. A given conn (e.g. a migration's) is
+        left open and uncommitted for its owner; otherwise every batch is committed.
+        """
+        owned = conn is None
+        conn = conn or get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM PatientNameTrigram")
+        total, last_id = 0, ""
+        while True:
+            cursor.execute(
+                "SELECT patient_id, name FROM Patient WHERE patient_id > %s ORDER BY patient_id LIMIT %s",
+                (last_id, batch_size)
+            )
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            rows = [row for patient_id, name in batch for row in name_index_rows(patient_id, name)]
+            if rows:
+                cursor.executemany(TRIGRAM_INSERT_SQL, rows)
+            if owned:
+                conn.commit()
+            total += len(batch)
+            last_id = batch[-1][0]
+
+        cursor.close()
+        if owned:
+            conn.close()
+        return total
+
+    @staticmethod
+    def add(patient_id: str, name: str, date_of_birth, contact_info: str, gender: Optional[str], condition: str, allergies: List[str]):
+        """Insert a patient with its medical history and search index rows."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(PATIENT_INSERT_SQL, (patient_id, name, date_of_birth, contact_info, gender))
+        # Medical history under a generated history_id; allergies joined into the display string
+        cursor.execute(HISTORY_INSERT_SQL, (str(uuid.uuid4()), patient_id, condition, ",".join(allergies)))
+        # Indexed copies for allergy and name search
+        replace_allergies(cursor, patient_id, allergies)
+        replace_name_index(cursor, patient_id, name)
+        conn.commit()
+        conn.close()
+        after_commit(versions.bump, "patients", patient_id)
+        after_commit(change_feed.publish, "patient", patient_id, "create")
+
+    @staticmethod
+    def bulk_add(records, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+        """Insert /patients/bulk records in batches; see modules.bulk.bulk_insert."""
+        try:
+            return bulk_insert(records, Patient.bulk_params, PATIENT_BULK_STATEMENTS, "patient_id", batch_size=batch_size)
+        finally:
+            # Rows of the batches committed before a failure are in too
+            PatientRepository.notify_bulk_write()
+
+    @staticmethod
+    def notify_bulk_write():
+        """Move the patients list version on and publish a "bulk" change, after rows were written in bulk.
+
+        Also called by the seed script and migrations, which write past the repository methods; they
+        reach a running server when started with its VERSIONS_FILE and EVENTS_FILE.
+        """
+        versions.bump("patients")
+        change_feed.publish("patient", None, "bulk")
+
+    @staticmethod
+    def update_fields(patient_id: str, **changes) -> bool:
+        """Write the non-empty fields in one UPDATE; returns False when the patient does not exist."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        found = update_columns(cursor, "Patient", "patient_id", patient_id, changes, PATIENT_UPDATABLE_FIELDS)
+        if found and changes.get("name"):
+            replace_name_index(cursor, patient_id, changes["name"])
+        conn.commit()
+        conn.close()
+        after_commit(versions.bump, "patients", patient_id)
+        if found:
+            after_commit(change_feed.publish, "patient", patient_id, "update", [field for field, value in changes.items() if value])
+        return found
+
+    @staticmethod
+    def update_condition(patient_id: str, condition: str) -> bool:
+        """Update the condition of the patient's medical history (the one reads return); False when there is none."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"UPDATE MedicalHistory SET `condition` = %s WHERE {PATIENT_HISTORY_FILTER}", (condition, patient_id))
+        found = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        if found:
+            after_commit(versions.bump, "patients", patient_id)
+            after_commit(change_feed.publish, "patient", patient_id, "update", ["medical_history"])
+        return found
+
+    @staticmethod
+    def update_allergies(patient_id: str, allergies: List[str]) -> bool:
+        """Update allergies (display column and PatientAllergy index); returns False when there is no history."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            f"UPDATE MedicalHistory SET `allergies` = %s WHERE {PATIENT_HISTORY_FILTER}", (",".join(allergies), patient_id)
+        )
+        found = cursor.rowcount > 0
+        if found:
+            replace_allergies(cursor, patient_id, allergies)
+        conn.commit()
+        conn.close()
+        if found:
+            after_commit(versions.bump, "patients", patient_id)
+            after_commit(change_feed.publish, "patient", patient_id, "update", ["medical_history"])
+        return found
+
+    @staticmethod
+    def delete(patient_id: str) -> bool:
+        """Delete a patient and their medical history; returns False when the patient does not exist."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            # MedicalHistory first (to avoid foreign key constraint issues)
+            cursor.execute("DELETE FROM MedicalHistory WHERE patient_id = %s", (patient_id,))
+            cursor.execute("DELETE FROM Patient WHERE patient_id = %s", (patient_id,))
+            found = cursor.rowcount > 0
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        after_commit(versions.bump, "patients", patient_id)
+        if found:
+            after_commit(change_feed.publish, "patient", patient_id, "delete")
+        return found
@@ -0,0 +1,225 @@
+import json
+from typing import List, Optional, Tuple
+
+from db_connection.db import after_commit, get_db_connection, get_stream_connection, in_transaction
+from db_connection.statements import fetch_one, register
+from modules.bulk import DEFAULT_BATCH_SIZE, bulk_insert
+from modules.cache import staff_cache
+from modules.events import change_feed
+from modules.query import Page, field_columns, select_page, split_page, update_columns
+from modules.staff import Staff, normalize_shift, shift_rows
+from modules.versions import versions
+
+STAFF_INSERT_SQL = """
+    INSERT INTO Staff (
+        staff_id, name, contact_info, role, status, specialization, department, ward, shift
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+SHIFT_INSERT_SQL = "INSERT IGNORE INTO StaffShift (day, shift_type, staff_id) VALUES (%s, %s, %s)"
+
+# Hot lookups, run as prepared statements (db_connection.statements)
+STAFF_BY_ID = register("staff_by_id", "SELECT * FROM Staff WHERE staff_id = %s")
+STAFF_EXISTS = register("staff_exists", "SELECT 1 AS found FROM Staff WHERE staff_id = %s")
+
+# bulk_insert statements for Staff.bulk_params records
+STAFF_BULK_STATEMENTS = [("staff", STAFF_INSERT_SQL), ("roster", SHIFT_INSERT_SQL)]
+
+# Columns that update_fields may write
+STAFF_UPDATABLE_FIELDS = ("name", "contact_info", "role", "status", "specialization", "department", "ward", "shift")
+
+
+def replace_shift_rows(cursor, staff_id: str, shift):
+    """Rewrite the roster rows of a staff member; the caller commits."""
+    cursor.execute("DELETE FROM StaffShift WHERE staff_id = %s", (staff_id,))
+    rows = shift_rows(staff_id, shift)
+    if rows:
+        cursor.executemany(SHIFT_INSERT_SQL, rows)
+
+
+class StaffRepository:
+    """Staff members and the StaffShift roster index."""
+
+    @staticmethod
+    def get_details(staff_id: str):
+        """Retrieve staff details, served from the entity cache when possible."""
+        # Keyed by version, so a write in any worker retires the cached copy
+        return staff_cache.get_or_load(
+            (staff_id, versions.get("staff", staff_id)),
+            lambda: StaffRepository._fetch_details(staff_id),
+            cacheable=lambda details: isinstance(details, dict) and not in_transaction()
+        )
+
+    @staticmethod
+    def _fetch_details(staff_id: str):
+        conn = get_db_connection()
+        staff_data = fetch_one(conn, STAFF_BY_ID, (staff_id,))
+        conn.close()
+
+        return Staff.details_from_row(staff_data)
+
+    @staticmethod
+    def fields_query(staff_id: str, fields: List[str]):
+        """SQL and params reading a sparse fieldset of one staff member."""
+        return f"SELECT {field_columns(fields)} FROM Staff WHERE staff_id = %s", (staff_id,)
+
+    @staticmethod
+    def get_fields(staff_id: str, fields: List[str]):
+        """A sparse fieldset of one staff member from a narrowed SELECT (not cached), or "No staff member found."."""
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(*StaffRepository.fields_query(staff_id, fields))
+        staff_data = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        return Staff.row_to_dict(staff_data, fields) if staff_data else "No staff member found."
+
+    @staticmethod
+    def exists(staff_id: str) -> bool:
+        conn = get_db_connection()
+        found = fetch_one(conn, STAFF_EXISTS, (staff_id,)) is not None
+        conn.close()
+        return found
+
+    @staticmethod
+    def page_query(page: Page, filters=(), lookahead: bool = True, fields: Optional[List[str]] = None):
+        """SQL and params for one keyset page of staff, narrowed to a sparse fieldset when given."""
+        return select_page("Staff", "staff_id", page, filters, columns=field_columns(fields), lookahead=lookahead)
+
+    @staticmethod
+    def get_page(page: Page, filters=(), fields: Optional[List[str]] = None):
+        """One keyset page of raw staff rows; returns (rows, next_cursor)."""
+        sql, params = StaffRepository.page_query(page, filters, fields=fields)
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        staff_data = cursor.fetchall()
+        conn.close()
+        return split_page(staff_data, "staff_id", page)
+
+    @staticmethod
+    def stream(page: Page, filters=(), fields: Optional[List[str]] = None):
+        """Yield staff dicts straight from an unbuffered server-side cursor."""
+        sql, params = StaffRepository.page_query(page, filters, lookahead=False, fields=fields)
+        conn = get_stream_connection()
+        finished = False
+        try:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            cursor.execute(sql, params)
+            for record in cursor:
+                yield Staff.row_to_dict(record, fields)
+            cursor.close()
+            finished = True
+        finally:
+            # A stream abandoned mid-way still has unread rows on the wire
+            if finished:
+                conn.close()
+            else:
+                conn.invalidate()
+
+    @staticmethod
+    def get_on_duty(day: str, shift_type: str, page: Page, filters=()):
+        """Staff rostered on (day, shift_type), read from the StaffShift index.
+
+        filters apply to the joined Staff row `s`. Returns (staff dicts, next_cursor).
+        """
+        sql, params = select_page(
+            "StaffShift r JOIN Staff s ON s.staff_id = r.staff_id",
+            "r.staff_id", page,
+            [("r.day = %s", day), ("r.shift_type = %s", shift_type), *filters],
+            columns="s.*"
+        )
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        conn.close()
+
+        staff_list, next_cursor = split_page(rows, "staff_id", page)
+        return [Staff.row_to_dict(row) for row in staff_list], next_cursor
+
+    @staticmethod
+    def get_availability(staff_id: str) -> List[Tuple[str, str]]:
+        """The shift list of a staff member."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT shift FROM Staff WHERE staff_id = %s", (staff_id,))
+        shifts = cursor.fetchone()
+        conn.close()
+
+        if not shifts or not shifts[0]:
+            return []
+
+        return json.loads(shifts[0])
+
+    @staticmethod
+    def add(staff_id: str, name: str, contact_info: str, role: str, status: str, specialization: Optional[str],
+            department: Optional[str], ward: Optional[str], shift):
+        """Insert a staff member and their roster rows."""
+        shift = normalize_shift(shift)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(STAFF_INSERT_SQL, (
+            staff_id, name, contact_info, role, status,
+            specialization, department, ward, json.dumps(shift)
+        ))
+        # Roster index rows for /staff/on_duty
+        replace_shift_rows(cursor, staff_id, shift)
+        conn.commit()
+        conn.close()
+        after_commit(versions.bump, "staff", staff_id)
+        after_commit(change_feed.publish, "staff", staff_id, "create")
+
+    @staticmethod
+    def bulk_add(records, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+        """Insert /staff/bulk records in batches; see modules.bulk.bulk_insert."""
+        try:
+            return bulk_insert(records, Staff.bulk_params, STAFF_BULK_STATEMENTS, "staff_id", batch_size=batch_size)
+        finally:
+            # Rows of the batches committed before a failure are in too
+            StaffRepository.notify_bulk_write()
+
+    @staticmethod
+    def notify_bulk_write():
+        """Move the staff list version on and publish a "bulk" change, after rows were written in bulk.
+
+        Also called by the seed script and migrations, which write past the repository methods; they
+        reach a running server when started with its VERSIONS_FILE and EVENTS_FILE.
+        """
+        versions.bump("staff")
+        change_feed.publish("staff", None, "bulk")
+
+    @staticmethod
+    def update_fields(staff_id: str, shift=None, **changes) -> bool:
+        """Write the non-empty fields in one UPDATE; returns False when the staff member does not exist.
+
+        A shift list goes into the same UPDATE, and its roster index rows into the same transaction.
+        """
+        if shift:
+            shift = normalize_shift(shift)
+            changes["shift"] = json.dumps(shift)
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        found = update_columns(cursor, "Staff", "staff_id", staff_id, changes, STAFF_UPDATABLE_FIELDS)
+        if found and shift:
+            replace_shift_rows(cursor, staff_id, shift)
+        conn.commit()
+        conn.close()
+        after_commit(versions.bump, "staff", staff_id)
+        if found:
+            after_commit(change_feed.publish, "staff", staff_id, "update", [field for field, value in changes.items() if value])
+        return found
+
+    @staticmethod
+    def delete(staff_id: str) -> bool:
+        """Delete a staff member (roster rows cascade); returns False when they do not exist."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM Staff WHERE staff_id = %s", (staff_id,))
+        found = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        after_commit(versions.bump, "staff", staff_id)
+        if found:
+            after_commit(change_feed.publish, "staff", staff_id, "delete")
+        return found
@@ -0,0 +1,97 @@
+from typing import List, Optional
+
+from db_connection.db import after_commit, get_db_connection
+from db_connection.statements import fetch_one, register
+from modules.events import change_feed
+from modules.query import Page, field_columns, select_page, split_page, update_columns
+
+USER_INSERT_SQL = "INSERT INTO Users (id, username, password, name) VALUES (%s, %s, %s, %s)"
+
+# Hot lookups, run as prepared statements (db_connection.statements)
+USER_BY_USERNAME = register("user_by_username", "SELECT id, username, name FROM Users WHERE username = %s")
+USER_CREDENTIALS = register("user_credentials", "SELECT id, username, password, name FROM Users WHERE username = %s")
+USER_PASSWORD = register("user_password", "SELECT password FROM Users WHERE id = %s")
+
+# Columns a user listing may return; the whitelist of ?fields=
+USER_FIELDS = ("id", "username", "name")
+
+# Columns that update_fields may write (password is stored hashed)
+USER_UPDATABLE_FIELDS = ("username", "name", "password")
+
+
+class UserRepository:
+    """Login accounts; password hashes never leave this class except for verification."""
+
+    @staticmethod
+    def get_by_username(username: str) -> Optional[dict]:
+        """id, username and name of a user."""
+        conn = get_db_connection()
+        user = fetch_one(conn, USER_BY_USERNAME, (username,))
+        conn.close()
+        return user
+
+    @staticmethod
+    def get_credentials(username: str) -> Optional[dict]:
+        """The user row including the password hash, for login."""
+        conn = get_db_connection()
+        user = fetch_one(conn, USER_CREDENTIALS, (username,))
+        conn.close()
+        return user
+
+    @staticmethod
+    def get_password_hash(user_id: str) -> Optional[str]:
+        conn = get_db_connection()
+        row = fetch_one(conn, USER_PASSWORD, (user_id,))
+        conn.close()
+        return row["password"] if row else None
+
+    @staticmethod
+    def page_query(page: Page, fields: Optional[List[str]] = None):
+        """SQL and params for one keyset page of users, narrowed to a sparse fieldset when given."""
+        return select_page("Users", "id", page, columns=field_columns(fields, ", ".join(USER_FIELDS)))
+
+    @staticmethod
+    def get_page(page: Page, fields: Optional[List[str]] = None):
+        """One keyset page of users (without passwords); returns (rows, next_cursor)."""
+        sql, params = UserRepository.page_query(page, fields)
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        users = cursor.fetchall()
+        conn.close()
+        return split_page(users, "id", page)
+
+    @staticmethod
+    def add(user_id: str, username: str, password_hash: str, name: str):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute(USER_INSERT_SQL, (user_id, username, password_hash, name))
+        conn.commit()
+        conn.close()
+        after_commit(change_feed.publish, "user", user_id, "create")
+
+    @staticmethod
+    def update_fields(user_id: str, **changes) -> bool:
+        """Write the non-empty fields in one UPDATE; returns False when the user does not exist."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        found = update_columns(cursor, "Users", "id", user_id, changes, USER_UPDATABLE_FIELDS)
+        conn.commit()
+        conn.close()
+        if found:
+            # A new password is not a field anyone can see
+            after_commit(change_feed.publish, "user", user_id, "update", [field for field in USER_FIELDS if changes.get(field)])
+        return found
+
+    @staticmethod
+    def delete(user_id: str) -> bool:
+        """Delete a user; returns False when the user does not exist."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM Users WHERE id = %s", (user_id,))
+        found = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        if found:
+            after_commit(change_feed.publish, "user", user_id, "delete")
+        return found
@@ -1,16 +1,125 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from flask_cors import CORS
-from werkzeug.security import check_password_hash
-from werkzeug.security import generate_password_hash
-from modules.patient import Patient, MedicalHistory, get_db_connection, PatientGender
-from modules.staff import Staff, StaffRole, Ward, StaffStatus
-from modules.user import User
-import mysql.connector
-import uuid, json
+from modules.auth import HashQueueFull, bearer_token, check_secret_key, hash_password, issue_token, verify_password, verify_token
+from modules.patient import PATIENT_FIELDS, PatientGender
+from modules.staff import STAFF_FIELDS, Staff, StaffRole, Ward, StaffStatus, shift_error
+from modules.bulk import DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, read_records
+from modules.query import Page, QueryArgError, date_filter, enum_filter, equals_filter, parse_fields
+from modules.cache import patient_cache, staff_cache
+from modules.events import FeedFull, change_feed
+from modules.metrics import init_app as init_metrics, metrics
+from modules.compression import init_app as init_compression
+from modules.fastjson import FastJSONProvider
+from modules.versions import versions
+from repository import PatientRepository, StaffRepository, UserRepository
+from repository.users import USER_FIELDS
+from db_connection.db import DB_ERRORS, get_pool_stats, init_app as init_db, transaction
+import os
+from datetime import date
 
 app = Flask(__name__)
 # Enable CORS for all routes and all origins
-CORS(app, resources={r"/*": {"origins": "*"}})
+CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=["X-Next-Cursor"])
+# One pooled DB connection per request, returned to the pool on teardown
+init_db(app)
+# Per-route latency and DB query histograms, served on /metrics
+init_metrics(app)
+# orjson (when installed) for jsonify, gzip/brotli for large responses
+app.json = FastJSONProvider(app)
+init_compression(app)
+
+POOL_GAUGES = ("opened", "idle", "in_use", "checkouts", "wait_time_total", "timeouts", "recycled", "ping_failures", "prepared_statements")
+CACHE_GAUGES = ("size", "hits", "misses", "evictions", "expirations")
+
+def runtime_gauges():
+    """Pool and entity cache counters of this process, for /metrics."""
+    pool = get_pool_stats()
+    gauges = {(f"hms_db_pool_{name}", ()): pool[name] for name in POOL_GAUGES}
+    for cache in (patient_cache, staff_cache):
+        stats = cache.stats()
+        gauges.update({(f"hms_entity_cache_{name}", (("cache", cache.name),)): stats[name] for name in CACHE_GAUGES})
+    gauges[("hms_event_subscribers", ())] = len(change_feed)
+    return gauges
+
+metrics.register_gauges(runtime_gauges)
+
+def busy_response(error):
+    """503 for a saturated password-hashing pool or event feed."""
+    response = jsonify({"error": str(error)})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+def page_response(items, next_cursor, etag=None):
+    """JSON list response; the keyset cursor of the next page goes in X-Next-Cursor."""
+    response = jsonify(items)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if etag is not None:
+        tag_response(response, etag)
+    return response, 200
+
+def tag_response(response, etag):
+    """Attach a version ETag; clients revalidate every time and get a 304 while it still matches."""
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "no-cache"
+    # /patients and /staffs also answer in NDJSON, which is not tagged
+    response.vary.add("Accept")
+    return response
+
+def not_modified(etag):
+    """304 response when If-None-Match holds etag, else None; checked before any DB access."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    return tag_response(Response(status=304), etag)
+
+def enum_error(name, value, enum):
+    """400 message for a value outside an Enum, or None when it is one of its values."""
+    if isinstance(value, str) and value in enum._value2member_map_:
+        return None
+    return f"Invalid {name} '{value}'. Must be one of: {list(enum._value2member_map_.keys())}"
+
+NDJSON = "application/x-ndjson"
+DEFAULT_NAME_RESULTS = 10
+MAX_NAME_RESULTS = 50
+
+def wants_ndjson():
+    """True when the client prefers newline-delimited JSON over a JSON array."""
+    return request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON
+
+def ndjson_response(items):
+    """Stream one JSON document per line as the generator produces them."""
+    return Response(
+        stream_with_context(app.json.dump_bytes(item) + b"\n" for item in items),
+        mimetype=NDJSON
+    )
+
+# Prometheus scrape endpoint
+# http://127.0.0.1:5000/metrics
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+# Change feed of patient, staff and user writes, as server-sent events
+# http://127.0.0.1:5000/events
+# Each message is {"entity": "patient", "id": "P001", "op": "update", "fields": ["name"]};
+# an "event: reset" message means the client missed changes and should reload its lists.
+@app.route("/events", methods=["GET"])
+def get_events():
+    # EventSource sends Last-Event-ID when it reconnects; ?last_event_id= works for a first connection
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        subscriber = change_feed.subscribe(last_event_id)
+    except FeedFull as e:
+        return busy_response(e)
+
+    response = Response(change_feed.stream(subscriber), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 # Get user by username
 # http://127.0.0.1:5000/user?username=admin@hospital.com
 @app.route("/user", methods=["GET"])
@@ -20,11 +129,7 @@ def get_user_by_username():
         return jsonify({"error": "username is required as a query parameter."}), 400
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id, username, name FROM Users WHERE username = %s", (username,))
-        user = cursor.fetchone()
-        conn.close()
+        user = UserRepository.get_by_username(username)
 
         if not user:
             return jsonify({"error": f"No user found with username: {username}"}), 404
@@ -37,20 +142,22 @@ def get_user_by_username():
 
 # Show all users
 # http://127.0.0.1:5000/users
+# Keyset pagination: http://127.0.0.1:5000/users?after=U002&limit=50&order=asc
+# Sparse fieldset: http://127.0.0.1:5000/users?fields=name
 @app.route("/users", methods=["GET"])
 def get_all_users():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id, username, name FROM Users")
-        users = cursor.fetchall()
-        conn.close()
+        page = Page.from_args(request.args)
+        fields = parse_fields(request.args, USER_FIELDS, "id")
+        users, next_cursor = UserRepository.get_page(page, fields)
 
-        if not users:
+        if not users and not request.args:
             return jsonify({"error": "No users found."}), 404
 
-        return jsonify(users), 200
+        return page_response(users, next_cursor)
 
+    except QueryArgError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -73,26 +180,17 @@ def add_user():
     if missing:
         return jsonify({"error": f"Missing fields: {', '.join(missing)}"}), 400
     
-    hashed_password = generate_password_hash(data["password"])
+    try:
+        hashed_password = hash_password(data["password"])
+    except HashQueueFull as e:
+        return busy_response(e)
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO Users (id, username, password, name)
-            VALUES (%s, %s, %s, %s)
-        """, (
-            data["id"],
-            data["username"],
-            hashed_password,  # Assumed to be hashed
-            data["name"]
-        ))
-        conn.commit()
-        conn.close()
+        UserRepository.add(data["id"], data["username"], hashed_password, data["name"])
 
         return jsonify({"message": "User added successfully!"}), 201
 
-    except mysql.connector.Error as err:
+    except DB_ERRORS as err:
         return jsonify({"error": str(err)}), 500
 
 # Login endpoint
@@ -112,26 +210,34 @@ def login():
         return jsonify({"error": "Username and password are required."}), 400
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT id, username, password, name FROM Users WHERE username = %s", (username,))
-        user = cursor.fetchone()
-        conn.close()
+        user = UserRepository.get_credentials(username)
 
         if not user:
             return jsonify({"error": "Invalid username or password."}), 401
 
-        # Check hashed password
-        if not check_password_hash(user["password"], password):
+        # Check hashed password (in the hashing pool, off the request thread)
+        if not verify_password(user["password"], password):
             return jsonify({"error": "Invalid username or password."}), 401
 
         # Remove password before sending response
         user.pop("password")
-        return jsonify({"message": "Login successful!", "user": user}), 200
+        return jsonify({"message": "Login successful!", "user": user, "token": issue_token(user)}), 200
 
+    except HashQueueFull as e:
+        return busy_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Current session from the token returned by /login
+# http://127.0.0.1:5000/session
+# Header: Authorization: Bearer <token>
+@app.route("/session", methods=["GET"])
+def get_session():
+    user = verify_token(bearer_token(request.headers.get("Authorization")) or "")
+    if not user:
+        return jsonify({"error": "Invalid or expired session token."}), 401
+    return jsonify({"user": user}), 200
+
 # Delete user
 # http://127.0.0.1:5000/user/delete?id=U004
 @app.route("/user/delete", methods=["DELETE"])
@@ -141,18 +247,12 @@ def delete_user():
         return jsonify({"error": "id is required as a query parameter."}), 400
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM Users WHERE id = %s", (user_id,))
-        conn.commit()
-        conn.close()
-
-        if cursor.rowcount == 0:
+        if not UserRepository.delete(user_id):
             return jsonify({"error": "User not found."}), 404
 
         return jsonify({"message": "User deleted successfully!"}), 200
 
-    except mysql.connector.Error as err:
+    except DB_ERRORS as err:
         return jsonify({"error": str(err)}), 500
 
 
@@ -172,12 +272,7 @@ def update_user():
     if not user_id:
         return jsonify({"error": "User ID is required."}), 400
 
-    # Kết nối đến DB
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    fields = []
-    values = []
+    changes = {}
 
     try:
         # Nếu muốn cập nhật mật khẩu, bắt buộc phải có old_password
@@ -188,52 +283,36 @@ def update_user():
                 return jsonify({"error": "Old password is required to update password."}), 400
 
             # Lấy password hash từ DB để so sánh
-            cursor.execute("SELECT password FROM Users WHERE id = %s", (user_id,))
-            result = cursor.fetchone()
+            stored_password_hash = UserRepository.get_password_hash(user_id)
 
-            if not result:
+            if not stored_password_hash:
                 return jsonify({"error": "User not found."}), 404
 
-            stored_password_hash = result[0]
-
-            if not check_password_hash(stored_password_hash, old_password):
+            if not verify_password(stored_password_hash, old_password):
                 return jsonify({"error": "Old password is incorrect."}), 403
 
             # Nếu đúng thì hash password mới và thêm vào danh sách cập nhật
             new_password = data["password"]
-            hashed_password = generate_password_hash(new_password)
-            fields.append("password = %s")
-            values.append(hashed_password)
+            changes["password"] = hash_password(new_password)
 
         # Cập nhật các trường khác
         for field in ["username", "name"]:
             if field in data and data[field]:
-                fields.append(f"{field} = %s")
-                values.append(data[field])
+                changes[field] = data[field]
 
-        if not fields:
+        if not changes:
             return jsonify({"error": "No fields to update."}), 400
 
-        values.append(user_id)
-
-        cursor.execute(
-            f"UPDATE Users SET {', '.join(fields)} WHERE id = %s",
-            tuple(values)
-        )
-        conn.commit()
-
-        if cursor.rowcount == 0:
+        if not UserRepository.update_fields(user_id, **changes):
             return jsonify({"error": "User not found or no changes made."}), 404
 
         return jsonify({"message": "User updated successfully!"}), 200
 
-    except mysql.connector.Error as err:
+    except HashQueueFull as e:
+        return busy_response(e)
+    except DB_ERRORS as err:
         return jsonify({"error": str(err)}), 500
 
-    finally:
-        cursor.close()
-        conn.close()
-
 # Example: http://127.0.0.1:5000/staff/add
 # body
 # {
@@ -263,6 +342,8 @@ def add_staff():
         specialization = data.get("specialization")
         department = data.get("department")
         ward = data.get("ward")
+        # Staff.status is NOT NULL; new staff are active unless the body says otherwise
+        status = data.get("status") or StaffStatus.ACTIVE.value
         shift = data.get("shift", [])
 
         # Validate role
@@ -273,28 +354,20 @@ def add_staff():
         if ward and ward not in Ward._value2member_map_:
             return jsonify({"error": f"Invalid ward '{ward}'. Must be one of: {list(Ward._value2member_map_.keys())}"}), 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        # Validate status if provided
+        if status not in StaffStatus._value2member_map_:
+            return jsonify({"error": f"Invalid status '{status}'. Must be one of: {list(StaffStatus._value2member_map_.keys())}"}), 400
+
+        # Validate shift if provided
+        error = shift and shift_error(shift)
+        if error:
+            return jsonify({"error": error}), 400
 
         # Check for duplicate staff_id
-        cursor.execute("SELECT 1 FROM Staff WHERE staff_id = %s", (staff_id,))
-        if cursor.fetchone():
-            conn.close()
+        if StaffRepository.exists(staff_id):
             return jsonify({"error": f"Staff ID '{staff_id}' already exists."}), 409
 
-        # Insert new staff
-        cursor.execute("""
-            INSERT INTO Staff (
-                staff_id, name, contact_info, role, specialization, department, ward, shift
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            staff_id, name, contact_info, role,
-            specialization, department, ward,
-            json.dumps(shift)
-        ))
-
-        conn.commit()
-        conn.close()
+        StaffRepository.add(staff_id, name, contact_info, role, status, specialization, department, ward, shift)
 
         return jsonify({"message": "Staff member added successfully!"}), 201
 
@@ -303,6 +376,7 @@ def add_staff():
       
 # Endpoint to get a specific staff member by staff_id
 # Example: http://127.0.0.1:5000/staff?staff_id=S001
+# Sparse fieldset: http://127.0.0.1:5000/staff?staff_id=S001&fields=name,ward
 @app.route("/staff", methods=["GET"])
 def get_staff_by_id():
     """Retrieve staff details by staff_id."""
@@ -311,12 +385,26 @@ def get_staff_by_id():
     if not staff_id:
         return jsonify({"error": "staff_id is required as a query parameter."}), 400
 
-    staff_data = Staff.get_staff_details(staff_id)
+    try:
+        fields = parse_fields(request.args, STAFF_FIELDS, "staff_id")
+    except QueryArgError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Version read before the data, so the tag is never newer than the body
+    etag = versions.etag(versions.get("staff", staff_id))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    if fields is None:
+        staff_data = StaffRepository.get_details(staff_id)
+    else:
+        staff_data = StaffRepository.get_fields(staff_id, fields)
 
     if isinstance(staff_data, str) and "No staff member found" in staff_data:
         return jsonify({"error": staff_data}), 404
 
-    return jsonify(staff_data), 200
+    return tag_response(jsonify(staff_data), etag), 200
 
 # Endpoint to delete a specific staff member by staff_id
 # Example: http://127.0.0.1:5000/staff/delete?staff_id=S001
@@ -329,56 +417,75 @@ def delete_staff():
         return jsonify({"error": "staff_id is required."}), 400
 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Check if staff exists
-        cursor.execute("SELECT * FROM Staff WHERE staff_id = %s", (staff_id,))
-        existing = cursor.fetchone()
-        if not existing:
+        if not StaffRepository.delete(staff_id):
             return jsonify({"error": f"No staff found with ID: {staff_id}"}), 404
 
-        # Delete staff
-        cursor.execute("DELETE FROM Staff WHERE staff_id = %s", (staff_id,))
-        conn.commit()
-        conn.close()
-
         return jsonify({"message": f"Staff with ID {staff_id} deleted successfully!"}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-# http://127.0.0.1:5000/staff
+# http://127.0.0.1:5000/staffs
+# Keyset pagination and filters:
+# http://127.0.0.1:5000/staffs?after=D003&limit=50&role=Nurse&status=active&ward=ICU&department=ICU
+# Sparse fieldset, e.g. for a dropdown: http://127.0.0.1:5000/staffs?fields=staff_id,name
 @app.route("/staffs", methods=["GET"])
 def get_all_staff():
     """Retrieve all staff members."""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    try:
+        page = Page.from_args(request.args)
+        fields = parse_fields(request.args, STAFF_FIELDS, "staff_id")
+        filters = (
+            enum_filter(request.args, "role", StaffRole)
+            + enum_filter(request.args, "status", StaffStatus)
+            + enum_filter(request.args, "ward", Ward)
+            + equals_filter(request.args, "department")
+        )
+    except QueryArgError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Accept: application/x-ndjson streams rows as they are read from MySQL
+    if wants_ndjson():
+        return ndjson_response(StaffRepository.stream(page, filters, fields))
+
+    etag = versions.etag(versions.get("staff"))
+    cached = not_modified(etag)
+    if cached:
+        return cached
 
-    cursor.execute("SELECT * FROM Staff")
-    staff_data = cursor.fetchall()
-    conn.close()
+    staff_data, next_cursor = StaffRepository.get_page(page, filters, fields)
 
-    if not staff_data:
+    if not staff_data and not request.args:
         return jsonify({"error": "No staff members found."}), 404
 
-    staff_list = []
-    for record in staff_data:
-        staff = Staff(
-            staff_id=record["staff_id"],
-            name=record["name"],
-            contact_info=record["contact_info"],
-            role=StaffRole(record["role"]),
-            status=StaffStatus(record["status"]),
-            specialization=record.get("specialization"),
-            department=record.get("department"),
-            ward=Ward(record["ward"]) if record.get("ward") else None,
-            shift=record["shift"].split(",") if record.get("shift") else []
-        )
-        staff_list.append(staff.to_dict())
+    staff_list = [Staff.row_to_dict(record, fields) for record in staff_data]
 
-    return jsonify(staff_list), 200
+    return page_response(staff_list, next_cursor, etag)
   
+# Who is on duty, answered from the StaffShift roster index
+# http://127.0.0.1:5000/staff/on_duty?day=Tuesday&shift=Night&ward=ICU&role=Nurse
+@app.route("/staff/on_duty", methods=["GET"])
+def get_staff_on_duty():
+    """Retrieve staff rostered on a day and shift."""
+    day = request.args.get("day")
+    shift_type = request.args.get("shift")
+    if not day or not shift_type:
+        return jsonify({"error": "day and shift are required as query parameters."}), 400
+
+    try:
+        page = Page.from_args(request.args)
+        filters = (
+            enum_filter(request.args, "role", StaffRole, "s.role")
+            + enum_filter(request.args, "status", StaffStatus, "s.status")
+            + enum_filter(request.args, "ward", Ward, "s.ward")
+            + equals_filter(request.args, "department", "s.department")
+        )
+    except QueryArgError as e:
+        return jsonify({"error": str(e)}), 400
+
+    staff_list, next_cursor = StaffRepository.get_on_duty(day, shift_type, page, filters)
+    return page_response(staff_list, next_cursor)
+
 # Endpoint to update staff info (name or contact_info)
 # http://127.0.0.1:5000/staff/update_info
 # Body:
@@ -405,34 +512,32 @@ def update_staff_info():
     if not staff_id:
         return jsonify({"error": "staff_id is required."}), 400
 
-    # Retrieve staff
-    staff_data = Staff.get_staff_details(staff_id)
+    if shift == "not changed":
+        shift = None
 
-    if isinstance(staff_data, str) and "No staff member found" in staff_data:
-        return jsonify({"error": staff_data}), 404
+    # Nothing is read before the UPDATE, so every value is checked here; empty ones are left unchanged
+    for field, value, enum in (("role", role, StaffRole), ("status", status, StaffStatus), ("ward", ward, Ward)):
+        error = value and enum_error(field, value, enum)
+        if error:
+            return jsonify({"error": error}), 400
+    error = shift and shift_error(shift)
+    if error:
+        return jsonify({"error": error}), 400
 
-    # Create a Staff object from the returned dictionary
-    staff = Staff(
-        staff_id=staff_data["staff_id"],
-        name=staff_data["name"],
-        contact_info=staff_data["contact_info"],
-        role=StaffRole(staff_data["role"]),
-        status=StaffStatus(staff_data["status"]),
-        specialization=staff_data.get("specialization"),
-        department=staff_data.get("department"),
-        ward=Ward(staff_data["ward"]) if staff_data.get("ward") else None,
-        shift=staff_data["shift"]
-    )
+    try:
+        # One UPDATE (plus the roster rows of a new shift); the matched row count tells whether the staff member exists
+        found = StaffRepository.update_fields(staff_id, name=name, contact_info=contact_info, role=role, status=status,
+                                              specialization=specialization, department=department, ward=ward, shift=shift)
+    except DB_ERRORS as err:
+        return jsonify({"error": str(err)}), 500
 
-    # Perform update
-    staff.update_info(name=name, contact_info=contact_info, role=role, status=status, specialization=specialization, department=department, ward=ward)
-    if shift != "not changed":
-        if shift:
-            staff.update_shift(new_shift=shift)
+    if not found:
+        return jsonify({"error": "No staff member found."}), 404
     return jsonify({"message": "Staff info updated successfully!"}), 200
 
 # Endpoint to get a specific patient's details by patient_id or name
 # http://127.0.0.1:5000/patient?patient_id=P001
+# Sparse fieldset (no MedicalHistory read): http://127.0.0.1:5000/patient?patient_id=P001&fields=name,gender
 @app.route("/patient", methods=["GET"])
 def get_patient():
     """Retrieve patient details by patient_id or name."""
@@ -442,56 +547,89 @@ def get_patient():
     if not patient_id and not name:
         return jsonify({"error": "Provide a search parameter (patient_id or name)."}), 400
 
+    try:
+        fields = parse_fields(request.args, PATIENT_FIELDS, "patient_id")
+    except QueryArgError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # A lookup by name may resolve to another patient after any write, so it follows the list version
+    etag = versions.etag(versions.get("patients", patient_id))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     # Retrieve patient details using the class method
-    patient = Patient.get_patient_details(patient_id=patient_id, name=name)
+    if fields is None:
+        patient = PatientRepository.get_details(patient_id=patient_id, name=name)
+    else:
+        patient = PatientRepository.get_fields(fields, patient_id=patient_id, name=name)
 
     if isinstance(patient, str) and "No patient found" in patient:
         return jsonify({"error": patient}), 404
 
-    return jsonify(patient)
+    return tag_response(jsonify(patient), etag)
 
 # http://127.0.0.1:5000/patients
+# Keyset pagination and filters:
+# http://127.0.0.1:5000/patients?after=P0100&limit=50&gender=Female&born_after=1980-01-01&born_before=1999-12-31
+# Sparse fieldset, joined with MedicalHistory only when medical_history is asked for:
+# http://127.0.0.1:5000/patients?fields=patient_id,name
 # Endpoint to get all patients
 @app.route("/patients", methods=["GET"])
 def get_all_patients():
     """Retrieve all patients."""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    try:
+        page = Page.from_args(request.args)
+        fields = parse_fields(request.args, PATIENT_FIELDS, "patient_id")
+        filters = (
+            enum_filter(request.args, "gender", PatientGender)
+            + date_filter(request.args, "born_after", "date_of_birth", ">=")
+            + date_filter(request.args, "born_before", "date_of_birth", "<=")
+        )
+    except QueryArgError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Accept: application/x-ndjson streams rows as they are read from MySQL
+    if wants_ndjson():
+        return ndjson_response(PatientRepository.stream(page, filters, fields))
 
-    cursor.execute("SELECT * FROM Patient")  # Get all patients from the database
-    patients_data = cursor.fetchall()
+    etag = versions.etag(versions.get("patients"))
+    cached = not_modified(etag)
+    if cached:
+        return cached
 
-    if not patients_data:
+    # Patients and their medical history come back from one joined query
+    patients, next_cursor = PatientRepository.get_page(page, filters, fields)
+
+    if not patients and not request.args:
         return jsonify({"error": "No patients found."}), 404
 
-    # Get the medical history for each patient
-    patients = []
-    for patient_data in patients_data:
-        cursor.execute("SELECT * FROM MedicalHistory WHERE patient_id = %s", (patient_data["patient_id"],))
-        history_data = cursor.fetchone()
-
-        # Create MedicalHistory object
-        medical_history = MedicalHistory(
-            history_id=history_data["history_id"],
-            patient_id=history_data["patient_id"],
-            condition=history_data["condition"],
-            allergies=history_data["allergies"].split(",") if history_data else []
-        ) if history_data else None
-
-        # Create Patient object
-        patient = Patient(
-            patient_id=patient_data["patient_id"],
-            name=patient_data["name"],
-            gender=PatientGender(patient_data["gender"]),
-            date_of_birth=str(patient_data["date_of_birth"]),
-            contact_info=patient_data["contact_info"],
-            medical_history=medical_history
-        )
+    return page_response(patients, next_cursor, etag)
 
-        patients.append(patient.to_dict())
+# http://127.0.0.1:5000/patients/search?allergy=Penicillin&limit=50
+# Patients with an allergy, answered from the PatientAllergy index
+# http://127.0.0.1:5000/patients/search?q=jon&limit=10
+# Autocomplete on patient name: prefix matches first, then typo-tolerant trigram matches
+@app.route("/patients/search", methods=["GET"])
+def search_patients():
+    """Search patients by allergy or by (partial) name."""
+    allergy = request.args.get("allergy")
+    q = request.args.get("q")
+    if not allergy and not q:
+        return jsonify({"error": "allergy or q is required as a query parameter."}), 400
 
-    conn.close()
-    return jsonify(patients)
+    try:
+        page = Page.from_args(request.args)
+    except QueryArgError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if q:
+        if page.limit and page.limit > MAX_NAME_RESULTS:
+            return jsonify({"error": f"limit must be at most {MAX_NAME_RESULTS} for name search."}), 400
+        return jsonify(PatientRepository.search_names(q, page.limit or DEFAULT_NAME_RESULTS)), 200
+
+    patients, next_cursor = PatientRepository.search_by_allergy(allergy.strip(), page)
+    return page_response(patients, next_cursor)
 
 # Endpoint to update patient's general information (name or contact_info)
 # http://127.0.0.1:5000/patient/update_info
@@ -515,16 +653,25 @@ def update_patient_info():
     if not patient_id:
         return jsonify({"error": "patient_id is required."}), 400
 
-    # Retrieve the patient
-    patient = Patient.get_patient_details(patient_id=patient_id)
-
-    if isinstance(patient, str) and "No patient found" in patient:
-        return jsonify({"error": patient}), 404
+    # Nothing is read before the UPDATE, so every value is checked here; empty ones are left unchanged
+    error = gender and enum_error("gender", gender, PatientGender)
+    if error:
+        return jsonify({"error": error}), 400
+    if date_of_birth:
+        try:
+            date_of_birth = date.fromisoformat(date_of_birth)
+        except (TypeError, ValueError):
+            return jsonify({"error": "date_of_birth must be a date in YYYY-MM-DD format."}), 400
 
-    # Update patient info
-    patient = Patient(patient_id=patient_id, name=patient["name"], contact_info=patient["contact_info"], gender=patient["gender"], date_of_birth=patient["date_of_birth"], medical_history=patient["medical_history"])
+    try:
+        # One UPDATE; the matched row count tells whether the patient exists
+        found = PatientRepository.update_fields(patient_id, name=name, contact_info=contact_info, gender=gender,
+                                                date_of_birth=date_of_birth)
+    except DB_ERRORS as err:
+        return jsonify({"error": str(err)}), 500
 
-    patient.update_patient_info(name=name, contact_info=contact_info, gender=gender, date_of_birth=date_of_birth)
+    if not found:
+        return jsonify({"error": "No patient found."}), 404
 
     return jsonify({"message": "Patient info updated successfully!"})
 
@@ -540,29 +687,19 @@ def update_condition():
     patient_id = request.json.get('patient_id')
     new_condition = request.json.get('condition')
 
-    # Retrieve patient details and medical history
-    patient = Patient.get_patient_details(patient_id=patient_id)
-    
-    if isinstance(patient, str):
-        return jsonify({"error": patient}), 400  # Return error message if no patient found
-    
-    if patient["medical_history"]:
-        medical_history = patient["medical_history"]
-        
-        # Ensure medical_history is an instance of the MedicalHistory class
-        if isinstance(medical_history, dict):
-            medical_history = MedicalHistory(
-                history_id=medical_history["history_id"],
-                patient_id=medical_history["patient_id"],
-                condition=medical_history["condition"],
-                allergies=medical_history["allergies"].split(",") if isinstance(medical_history["allergies"], str) else medical_history["allergies"]
-            )
-
-        medical_history.update_condition(self=medical_history, new_condition=new_condition)  # Now this should work
-
-        return jsonify({"message": "Condition updated successfully."}), 200
-    else:
-        return jsonify({"error": "No medical history found."}), 400
+    if not patient_id or not new_condition:
+        return jsonify({"error": "patient_id and condition are required."}), 400
+
+    # Single UPDATE of the patient's medical history; no matched row means no patient or no history
+    try:
+        found = PatientRepository.update_condition(patient_id, new_condition)
+    except DB_ERRORS as err:
+        return jsonify({"error": str(err)}), 500
+
+    if not found:
+        return jsonify({"error": "No medical history found for this patient."}), 404
+
+    return jsonify({"message": "Condition updated successfully."}), 200
 
 # http://127.0.0.1:5000/patient/update_allergies
 # body
@@ -575,31 +712,19 @@ def update_allergies():
     patient_id = request.json.get("patient_id")
     new_allergies = request.json.get("new_allergies")
 
-    # Retrieve patient by patient_id from the database
-    patient = Patient.get_patient_details(patient_id=patient_id)  # Fetch patient details
-
-    if isinstance(patient, str) and "No patient found" in patient:
-        return jsonify({"error": patient}), 404  # Patient not found
+    if not patient_id or not isinstance(new_allergies, list):
+        return jsonify({"error": "patient_id and a new_allergies list are required."}), 400
 
-    # Retrieve medical history
-    medical_history = patient.get("medical_history")
-
-    if medical_history:
-        # Ensure medical_history is an instance of the MedicalHistory class
-        if isinstance(medical_history, dict):
-            medical_history = MedicalHistory(
-                history_id=medical_history["history_id"],
-                patient_id=medical_history["patient_id"],
-                condition=medical_history["condition"],
-                allergies=medical_history["allergies"] if isinstance(medical_history["allergies"], list) else medical_history["allergies"].split(",")
-            )
+    # Display column and PatientAllergy index rows in one transaction, without reading the patient first
+    try:
+        found = PatientRepository.update_allergies(patient_id, new_allergies)
+    except DB_ERRORS as err:
+        return jsonify({"error": str(err)}), 500
 
-        # Update the allergies using the method from MedicalHistory
-        medical_history.update_allergies(self=medical_history, new_allergies=new_allergies)  # Call the method on the MedicalHistory instance
+    if not found:
+        return jsonify({"error": "No medical history found for this patient."}), 404
 
-        return jsonify({"message": "Allergies updated successfully!"}), 200
-    else:
-        return jsonify({"error": "No medical history found."}), 400
+    return jsonify({"message": "Allergies updated successfully!"}), 200
 
 # http://127.0.0.1:5000/patient/add
 # body
@@ -623,27 +748,14 @@ def add_patient():
     if not patient_id or not condition or not allergies:
         return jsonify({"error": "patient_id, condition, and allergies are required."}), 400
 
-    # Generate a unique history_id using UUID
-    history_id = str(uuid.uuid4())  # UUID as a string
-
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Insert patient information
-        cursor.execute("INSERT INTO Patient (patient_id, name, date_of_birth, contact_info, gender) VALUES (%s, %s, %s, %s, %s)",
-                       (patient_id, data["name"], data["date_of_birth"], data["contact_info"], data["gender"]))
-        
-        # Insert medical history information with the generated history_id
-        cursor.execute("INSERT INTO MedicalHistory (history_id, patient_id, `condition`, allergies) VALUES (%s, %s, %s, %s)",
-                       (history_id, patient_id, condition, ",".join(allergies)))  # Join allergies list into a string
-
-        conn.commit()
-        conn.close()
+        # The medical history gets a generated UUID history_id
+        PatientRepository.add(patient_id, data["name"], data["date_of_birth"], data["contact_info"], data["gender"],
+                              condition, allergies)
 
         return jsonify({"message": "Patient and medical history added successfully!"}), 201
 
-    except mysql.connector.Error as err:
+    except DB_ERRORS as err:
         return jsonify({"error": str(err)}), 500
 
 # http://127.0.0.1:5000/patient/delete
@@ -657,26 +769,134 @@ def delete_patient():
     if not patient_id:
         return jsonify({"error": "patient_id is required."}), 400
 
-    # Delete from MedicalHistory first (to avoid foreign key constraint issues)
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     try:
-        cursor.execute("DELETE FROM MedicalHistory WHERE patient_id = %s", (patient_id,))
-        conn.commit()
-
-        # Then delete from Patient table
-        cursor.execute("DELETE FROM Patient WHERE patient_id = %s", (patient_id,))
-        conn.commit()
+        if not PatientRepository.delete(patient_id):
+            return jsonify({"error": "No patient found."}), 404
 
         return jsonify({"message": "Patient and medical history deleted successfully!"}), 200
-    except mysql.connector.Error as err:
-        conn.rollback()  # Rollback if an error occurs
+    except DB_ERRORS as err:
         return jsonify({"error": str(err)}), 500
-    finally:
-        conn.close()
 
 
-# Start the Flask app
+def bulk_import(bulk_add):
+    """Shared body of the bulk endpoints: parse ?batch_size= and run a repository bulk_add."""
+    try:
+        batch_size = int(request.args.get("batch_size", DEFAULT_BATCH_SIZE))
+    except ValueError:
+        return jsonify({"error": "batch_size must be an integer."}), 400
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        return jsonify({"error": f"batch_size must be between 1 and {MAX_BATCH_SIZE}."}), 400
+
+    try:
+        result = bulk_add(read_records(request), batch_size=batch_size)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except DB_ERRORS as err:
+        return jsonify({"error": str(err)}), 500
+
+    return jsonify(result), 201 if not result["failed"] else 207
+
+# http://127.0.0.1:5000/patients/bulk?batch_size=1000
+# body: JSON array of /patient/add bodies, or the same records as
+# NDJSON (Content-Type: application/x-ndjson) or CSV (Content-Type: text/csv,
+# allergies as a comma-separated cell)
+@app.route("/patients/bulk", methods=["POST"])
+def bulk_add_patients():
+    """Insert many patients and their medical history in batches."""
+    return bulk_import(PatientRepository.bulk_add)
+
+# http://127.0.0.1:5000/staff/bulk?batch_size=1000
+# body: JSON array of /staff/add bodies, or NDJSON / CSV (shift as a JSON cell)
+@app.route("/staff/bulk", methods=["POST"])
+def bulk_add_staff():
+    """Insert many staff members in batches."""
+    return bulk_import(StaffRepository.bulk_add)
+
+
+# Write routes a /batch operation may call
+BATCH_ROUTES = {
+    ("POST", "/patient/add"), ("PUT", "/patient/update_info"), ("PUT", "/patient/update_condition"),
+    ("PUT", "/patient/update_allergies"), ("DELETE", "/patient/delete"),
+    ("POST", "/staff/add"), ("PUT", "/staff/update_info"), ("DELETE", "/staff/delete"),
+    ("POST", "/user/add"), ("PUT", "/user/update"), ("DELETE", "/user/delete"),
+}
+MAX_BATCH_OPERATIONS = int(os.getenv("BATCH_MAX_OPERATIONS", "100"))
+
+class BatchAbort(Exception):
+    """Ends a /batch transaction at the first failed operation."""
+
+def run_batch_operation(operation):
+    """(status, body) of one /batch operation, run by its route on the batch's connection."""
+    method = str(operation.get("method", "")).upper()
+    path = operation.get("path")
+    query, body = operation.get("query"), operation.get("body")
+    if (method, path) not in BATCH_ROUTES:
+        return 400, {"error": f"{method} {path} cannot be batched. Allowed: {sorted(' '.join(route) for route in BATCH_ROUTES)}"}
+    if query is not None and not isinstance(query, dict):
+        return 400, {"error": "query must be an object."}
+
+    # A nested request context shares g, and with it the request's connection and open transaction.
+    # full_dispatch_request runs the before/after_request hooks like a real request: the operation
+    # is timed on /metrics under its own route (its DB queries count on /batch, whose connection
+    # it uses, so its own query histograms read zero), CORS headers are added, and its body stays uncompressed since the nested request
+    # carries no Accept-Encoding. The hooks keep per-request state in g, so the batch's is restored.
+    saved = dict(vars(g))
+    with app.test_request_context(path, method=method, query_string=query, json=body,
+                                  headers={"Authorization": request.headers.get("Authorization", "")}):
+        try:
+            response = app.full_dispatch_request()
+        except DB_ERRORS:
+            raise
+        except Exception as e:
+            # A route's unhandled error fails the operation (and the batch) instead of the request
+            app.logger.exception("Batch operation %s %s failed", method, path)
+            return 500, {"error": str(e)}
+        finally:
+            vars(g).clear()
+            vars(g).update(saved)
+    return response.status_code, response.get_json(silent=True)
+
+# http://127.0.0.1:5000/batch
+# body: ordered operations on the patient, staff and user write routes, run in one transaction
+# {
+#   "operations": [
+#     {"method": "PUT", "path": "/patient/update_info", "body": {"patient_id": "P001", "name": "John Doe"}},
+#     {"method": "PUT", "path": "/patient/update_condition", "body": {"patient_id": "P001", "condition": "Asthma"}},
+#     {"method": "DELETE", "path": "/staff/delete", "query": {"staff_id": "D003"}}
+#   ]
+# }
+@app.route("/batch", methods=["POST"])
+def run_batch():
+    """Run several write operations all-or-nothing; returns the status and body of each."""
+    data = request.get_json(silent=True)
+    operations = data.get("operations") if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations or not all(isinstance(op, dict) for op in operations):
+        return jsonify({"error": "operations must be a non-empty array of objects."}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({"error": f"A batch takes at most {MAX_BATCH_OPERATIONS} operations."}), 400
+
+    results = []
+    try:
+        with transaction():
+            for index, operation in enumerate(operations):
+                status, body = run_batch_operation(operation)
+                results.append({"status": status, "body": body})
+                if status >= 400:
+                    raise BatchAbort(index)
+    except BatchAbort as abort:
+        failed = abort.args[0]
+        return jsonify({
+            "error": f"Operation {failed} failed; no changes were applied.",
+            "failed": failed,
+            "results": results,
+        }), results[failed]["status"]
+    except DB_ERRORS as err:
+        return jsonify({"error": str(err), "failed": len(results), "results": results}), 500
+
+    return jsonify({"results": results}), 200
+
+
+# Start the Flask development server; production runs gunicorn -c gunicorn.conf.py server:app
 if __name__ == "__main__":
-    app.run(host='0.0.0.0',debug=True)
+    check_secret_key()
+    app.run(host='0.0.0.0', debug=os.getenv("FLASK_DEBUG", "0") == "1")
@@ -0,0 +1,55 @@
+import os
+import uuid
+
+import pytest
+
+# In-process tests on the embedded SQLite backend; set before the app modules are imported
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ.pop("METRICS_DIR", None)
+# Cache entries are keyed by version counters, which outlive the per-test databases
+os.environ["ENTITY_CACHE_ENABLED"] = "0"
+
+from db_connection.db import get_db_connection, reset_pool  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def database(monkeypatch):
+    """A fresh in-memory database, seeded with the demo rows, for every test."""
+    monkeypatch.setenv("SQLITE_PATH", f"file:hms-test-{uuid.uuid4().hex}?mode=memory&cache=shared")
+    reset_pool()
+    yield
+    reset_pool()
+
+
+@pytest.fixture
+def client():
+    from server import app
+
+    return app.test_client()
+
+
+@pytest.fixture
+def query():
+    """Run a SELECT straight on the test database and return its rows as dicts."""
+    def run(sql, params=()):
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        cursor.close()
+        conn.close()
+        return rows
+
+    return run
+
+
+@pytest.fixture
+def execute():
+    """Run and commit a write straight on the test database, past the repositories."""
+    def run(sql, params=()):
+        conn = get_db_connection()
+        conn.cursor().execute(sql, params)
+        conn.commit()
+        conn.close()
+
+    return run
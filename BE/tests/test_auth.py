@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from modules import auth
+
+
+def test_token_round_trip():
+    user = {"id": "U001", "username": "admin@hospital.com", "name": "Admin"}
+    assert auth.verify_token(auth.issue_token(user)) == user
+
+
+def test_expired_token_is_rejected(monkeypatch):
+    token = auth.issue_token({"id": "U001", "username": "admin@hospital.com", "name": "Admin"})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + auth.SESSION_MAX_AGE + 5)
+    assert auth.verify_token(token) is None
+
+
+def test_forged_token_is_rejected():
+    token = auth.issue_token({"id": "U001", "username": "admin@hospital.com", "name": "Admin"})
+    assert auth.verify_token(token + "x") is None
+    assert auth.verify_token("") is None
+
+
+def test_session_reads_the_bearer_token(client):
+    token = auth.issue_token({"id": "U001", "username": "admin@hospital.com", "name": "Admin"})
+    response = client.get("/session", headers={"Authorization": f"Bearer {token}"})
+    assert response.get_json()["user"]["id"] == "U001"
+    assert client.get("/session", headers={"Authorization": "Bearer nope"}).status_code == 401
+
+
+def test_full_hash_queue_answers_503_with_retry_after(client, monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    slots.acquire()
+    monkeypatch.setattr(auth._hash_pool, "_slots", slots)
+
+    for response in (
+        client.post("/login", json={"username": "admin@hospital.com", "password": "12345"}),
+        client.post("/user/add", json={"id": "U900", "username": "x@hospital.com", "password": "x", "name": "X"}),
+    ):
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+
+def test_hash_timeout_answers_503_and_frees_the_slot(client, monkeypatch):
+    class StuckExecutor:
+        def submit(self, fn, *args):
+            return Future()
+
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(auth._hash_pool, "_slots", slots)
+    monkeypatch.setattr(auth._hash_pool, "_get_executor", lambda: StuckExecutor())
+    monkeypatch.setattr(auth, "HASH_TIMEOUT", 0.01)
+
+    response = client.post("/login", json={"username": "admin@hospital.com", "password": "12345"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    # The cancelled job gave its slot back
+    assert slots.acquire(blocking=False)
+
+
+@pytest.mark.parametrize("key, debug", [(None, "0"), ("change-me-in-production", "0")])
+def test_server_refuses_to_start_without_a_secret_key(monkeypatch, key, debug):
+    if key is None:
+        monkeypatch.delenv("SECRET_KEY", raising=False)
+    else:
+        monkeypatch.setenv("SECRET_KEY", key)
+    monkeypatch.setenv("FLASK_DEBUG", debug)
+    with pytest.raises(RuntimeError):
+        auth.check_secret_key()
+
+
+def test_debug_server_gets_a_throwaway_key(monkeypatch):
+    monkeypatch.delenv("SECRET_KEY", raising=False)
+    monkeypatch.setenv("FLASK_DEBUG", "1")
+    auth.check_secret_key()
+    assert len(os.environ["SECRET_KEY"]) == 64
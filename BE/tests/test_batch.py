@@ -0,0 +1,63 @@
+def operations(*ops):
+    return {"operations": list(ops)}
+
+
+def test_batch_applies_every_operation(client):
+    response = client.post("/batch", json=operations(
+        {"method": "PUT", "path": "/patient/update_info", "body": {"patient_id": "P001", "name": "Johnny Doe"}},
+        {"method": "DELETE", "path": "/staff/delete", "query": {"staff_id": "D003"}},
+    ))
+    assert response.status_code == 200
+    assert [result["status"] for result in response.get_json()["results"]] == [200, 200]
+    assert client.get("/patient?patient_id=P001").get_json()["name"] == "Johnny Doe"
+    assert client.get("/staff?staff_id=D003").status_code == 404
+
+
+def test_failing_operation_rolls_back_the_earlier_ones(client):
+    response = client.post("/batch", json=operations(
+        {"method": "PUT", "path": "/patient/update_info", "body": {"patient_id": "P002", "name": "Should Roll Back"}},
+        {"method": "DELETE", "path": "/staff/delete", "query": {"staff_id": "D004"}},
+        {"method": "DELETE", "path": "/staff/delete", "query": {"staff_id": "NOPE"}},
+    ))
+    assert response.status_code == 404
+    body = response.get_json()
+    assert body["failed"] == 2
+    assert [result["status"] for result in body["results"]] == [200, 200, 404]
+
+    assert client.get("/patient?patient_id=P002").get_json()["name"] == "Jane Smith"
+    assert client.get("/staff?staff_id=D004").status_code == 200
+
+
+def test_rolled_back_batch_publishes_no_events(client):
+    from modules.events import change_feed
+
+    head = change_feed.ring.head
+    client.post("/batch", json=operations(
+        {"method": "PUT", "path": "/patient/update_condition", "body": {"patient_id": "P001", "condition": "Flu"}},
+        {"method": "PUT", "path": "/patient/update_condition", "body": {"patient_id": "NOPE", "condition": "Flu"}},
+    ))
+    assert change_feed.ring.head == head
+
+
+def test_batch_rejects_routes_outside_the_whitelist(client):
+    response = client.post("/batch", json=operations({"method": "GET", "path": "/patients"}))
+    assert response.status_code == 400
+    assert client.post("/batch", json={}).status_code == 400
+
+
+def test_operations_pass_through_the_request_hooks(client):
+    from modules.metrics import metrics
+
+    durations = metrics._histograms["hms_request_duration_seconds"]
+
+    def count(labels):
+        series = durations.get(labels)
+        return series[-1] if series else 0
+
+    operation, batch = ("PUT", "/patient/update_info", "200"), ("POST", "/batch", "200")
+    before = count(operation), count(batch)
+    response = client.post("/batch", json=operations(
+        {"method": "PUT", "path": "/patient/update_info", "body": {"patient_id": "P001", "name": "Johnny Doe"}},
+    ))
+    assert response.status_code == 200
+    assert (count(operation), count(batch)) == (before[0] + 1, before[1] + 1)
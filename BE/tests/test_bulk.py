@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from db_connection.db import _RequestConnection
+
+
+def staff_record(staff_id, **changes):
+    return {"staff_id": staff_id, "name": "Bulk Nurse", "contact_info": "555-0100", "role": "Nurse",
+            "ward": "ICU", "shift": [["Monday", "Day"]], **changes}
+
+
+def test_staff_bulk_rejects_an_invalid_shift(client):
+    response = client.post("/staff/bulk", json=[
+        staff_record("B001"),
+        staff_record("B002", shift=[["Funday", "Teatime"]]),
+    ])
+    assert response.status_code == 207
+    body = response.get_json()
+    assert (body["inserted"], body["failed"]) == (1, 1)
+    assert body["errors"][0]["row"] == 1 and body["errors"][0]["staff_id"] == "B002"
+    assert "Invalid shift entry" in body["errors"][0]["error"]
+    assert client.get("/staff?staff_id=B002").status_code == 404
+
+
+def patient_record(patient_id, **changes):
+    return {"patient_id": patient_id, "name": f"Bulk {patient_id}", "date_of_birth": "1990-01-01", "contact_info": "555-0100",
+            "gender": "Female", "condition": "Flu", "allergies": ["Dust", "Mold"], **changes}
+
+
+@pytest.fixture
+def commits(monkeypatch):
+    """Count the commits made on request connections."""
+    count = [0]
+    commit = _RequestConnection.commit
+
+    def counted(self):
+        count[0] += 1
+        commit(self)
+
+    monkeypatch.setattr(_RequestConnection, "commit", counted)
+    return count
+
+
+def test_patient_bulk_reports_failed_rows_with_207(client):
+    response = client.post("/patients/bulk", json=[
+        patient_record("B001"),
+        patient_record("B002", gender="Unknown"),
+        patient_record("P001"),
+        "not a record",
+        patient_record("B003", condition=""),
+    ])
+    assert response.status_code == 207
+    body = response.get_json()
+    assert (body["inserted"], body["failed"]) == (1, 4)
+    assert [(error["row"], error["patient_id"]) for error in body["errors"]] == [(1, "B002"), (3, None), (4, "B003"), (2, "P001")]
+    assert client.get("/patient?patient_id=B001").get_json()["medical_history"]["allergies"] == ["Dust", "Mold"]
+    assert client.get("/patient?patient_id=B002").status_code == 404
+
+
+def test_all_good_rows_get_201(client):
+    response = client.post("/patients/bulk", json=[patient_record("B001"), patient_record("B002")])
+    assert response.status_code == 201
+    assert response.get_json() == {"inserted": 2, "failed": 0, "errors": []}
+
+
+def test_patient_bulk_reads_ndjson(client):
+    body = "\n".join([json.dumps(patient_record("B001")), "{not json", "", json.dumps(patient_record("B002"))])
+    response = client.post("/patients/bulk", data=body, content_type="application/x-ndjson")
+    assert response.status_code == 207
+    result = response.get_json()
+    assert (result["inserted"], result["failed"]) == (2, 1)
+    assert result["errors"][0]["row"] == 1
+    assert client.get("/patient?patient_id=B002").status_code == 200
+
+
+def test_bulk_reads_csv(client):
+    patients = (
+        "patient_id,name,date_of_birth,contact_info,gender,condition,allergies\n"
+        'B001,Csv Patient,1990-01-01,555,Male,Flu,"Dust, Pollen"\n'
+    )
+    response = client.post("/patients/bulk", data=patients, content_type="text/csv")
+    assert response.status_code == 201
+    assert client.get("/patient?patient_id=B001").get_json()["medical_history"]["allergies"] == ["Dust", "Pollen"]
+
+    staff = (
+        "staff_id,name,contact_info,role,ward,shift\n"
+        'B100,Csv Nurse,555,Nurse,ICU,"[[""Monday"", ""Night""]]"\n'
+    )
+    response = client.post("/staff/bulk", data=staff, content_type="text/csv")
+    assert response.status_code == 201
+    assert client.get("/staff?staff_id=B100").get_json()["shift"] == [["Monday", "Night"]]
+
+
+def test_batch_size_splits_the_commits(client, commits):
+    response = client.post("/staff/bulk?batch_size=2", json=[staff_record(f"B{i:03d}") for i in range(5)])
+    assert response.status_code == 201
+    assert response.get_json()["inserted"] == 5
+    assert commits[0] == 3
+
+
+def test_failed_batch_keeps_its_good_rows(client):
+    response = client.post("/staff/bulk?batch_size=3", json=[staff_record("B001"), staff_record("D002"), staff_record("B002")])
+    assert response.status_code == 207
+    body = response.get_json()
+    assert (body["inserted"], body["failed"]) == (2, 1)
+    assert body["errors"][0]["staff_id"] == "D002"
+    assert client.get("/staff?staff_id=B002").status_code == 200
+
+
+@pytest.mark.parametrize("query", ["batch_size=0", "batch_size=many", "batch_size=100000"])
+def test_invalid_batch_size_is_400(client, query):
+    assert client.post(f"/staff/bulk?{query}", json=[staff_record("B001")]).status_code == 400
+
+
+def test_bulk_body_must_be_an_array(client):
+    assert client.post("/patients/bulk", json={"patient_id": "B001"}).status_code == 400
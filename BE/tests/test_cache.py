@@ -0,0 +1,52 @@
+from collections import OrderedDict
+
+import pytest
+
+from modules.cache import EntityCache, patient_cache, staff_cache
+from repository import PatientRepository, StaffRepository
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    """The entity caches switched on, empty, for one test."""
+    for cache in (patient_cache, staff_cache):
+        monkeypatch.setattr(cache, "enabled", True)
+        monkeypatch.setattr(cache, "_entries", OrderedDict())
+
+
+def test_lookups_are_served_from_the_cache(caches, execute):
+    assert PatientRepository.get_details(patient_id="P001")["name"] == "John Doe"
+    # Past the repository: no version bump, so the cached copy is still served
+    execute("UPDATE Patient SET name = 'Changed Behind' WHERE patient_id = 'P001'")
+    assert PatientRepository.get_details(patient_id="P001")["name"] == "John Doe"
+    assert patient_cache.stats()["hits"] >= 1
+
+
+def test_repository_writes_retire_the_cached_entry(caches):
+    PatientRepository.get_details(patient_id="P001")
+    StaffRepository.get_details("D002")
+
+    assert PatientRepository.update_fields("P001", name="Johnny Doe")
+    assert PatientRepository.update_condition("P001", "Recovered")
+    assert StaffRepository.update_fields("D002", ward="ICU")
+
+    patient = PatientRepository.get_details(patient_id="P001")
+    assert (patient["name"], patient["medical_history"]["condition"]) == ("Johnny Doe", "Recovered")
+    assert StaffRepository.get_details("D002")["ward"] == "ICU"
+
+
+def test_deleted_entity_is_not_served_from_the_cache(caches):
+    PatientRepository.get_details(patient_id="P001")
+    assert PatientRepository.delete("P001")
+    assert PatientRepository.get_details(patient_id="P001") == "No patient found."
+
+
+def test_cache_evicts_the_least_recently_used():
+    cache = EntityCache("test", maxsize=2)
+    for key in ("a", "b"):
+        cache.get_or_load(key, lambda: key.upper())
+    cache.get_or_load("a", lambda: "reloaded")
+    cache.get_or_load("c", lambda: "C")
+    assert cache.get_or_load("a", lambda: "reloaded") == "A"
+    assert cache.get_or_load("b", lambda: "reloaded") == "reloaded"
+    assert cache.stats()["evictions"] == 2
@@ -0,0 +1,80 @@
+import pytest
+
+import db_connection.db
+
+PATIENT_URLS = ["/patient?patient_id=P001", "/patients"]
+STAFF_URLS = ["/staff?staff_id=D002", "/staffs"]
+
+
+def etag(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+@pytest.mark.parametrize("url", PATIENT_URLS + STAFF_URLS)
+def test_current_etag_gets_304_without_db_access(client, monkeypatch, url):
+    tag = etag(client, url)
+
+    def no_database():
+        raise AssertionError("a 304 must not touch the database")
+
+    monkeypatch.setattr(db_connection.db, "get_pool", no_database)
+    response = client.get(url, headers={"If-None-Match": tag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == tag
+    assert response.data == b""
+
+
+def test_stale_etag_gets_the_body(client):
+    response = client.get("/patients", headers={"If-None-Match": 'W/"0-0"'})
+    assert response.status_code == 200
+    assert response.get_json()
+
+
+def batch(*ops):
+    return {"operations": list(ops)}
+
+
+@pytest.mark.parametrize("method, path, kwargs, urls", [
+    ("put", "/patient/update_info", {"json": {"patient_id": "P001", "name": "Johnny Doe"}}, PATIENT_URLS),
+    ("put", "/patient/update_condition", {"json": {"patient_id": "P001", "condition": "Flu"}}, PATIENT_URLS),
+    ("put", "/patient/update_allergies", {"json": {"patient_id": "P001", "new_allergies": ["Dust"]}}, PATIENT_URLS),
+    ("delete", "/patient/delete", {"query_string": {"patient_id": "P001"}}, PATIENT_URLS),
+    ("put", "/staff/update_info", {"json": {"staff_id": "D002", "ward": "ICU"}}, STAFF_URLS),
+    ("delete", "/staff/delete", {"query_string": {"staff_id": "D002"}}, STAFF_URLS),
+    ("post", "/batch", {"json": batch(
+        {"method": "PUT", "path": "/patient/update_info", "body": {"patient_id": "P001", "name": "Johnny Doe"}},
+        {"method": "PUT", "path": "/staff/update_info", "body": {"staff_id": "D002", "ward": "ICU"}},
+    )}, PATIENT_URLS + STAFF_URLS),
+])
+def test_writes_change_the_etags(client, method, path, kwargs, urls):
+    before = {url: etag(client, url) for url in urls}
+    response = getattr(client, method)(path, **kwargs)
+    assert response.status_code == 200
+    for url in urls:
+        after = client.get(url, headers={"If-None-Match": before[url]})
+        # A deleted entity answers 404, untagged
+        assert after.status_code != 304
+        assert after.headers.get("ETag") != before[url]
+
+
+def test_inserts_change_the_collection_etags(client):
+    before = etag(client, "/patients"), etag(client, "/staffs")
+    assert client.post("/patients/bulk", json=[{
+        "patient_id": "P900", "name": "Bulk Patient", "date_of_birth": "1990-01-01", "contact_info": "555",
+        "gender": "Female", "condition": "Flu", "allergies": ["Dust"],
+    }]).status_code == 201
+    assert client.post("/staff/bulk", json=[{
+        "staff_id": "B900", "name": "Bulk Nurse", "contact_info": "555", "role": "Nurse",
+    }]).status_code == 201
+    assert etag(client, "/patients") != before[0] and etag(client, "/staffs") != before[1]
+
+
+def test_rolled_back_batch_keeps_the_etags(client):
+    before = etag(client, "/patients")
+    client.post("/batch", json=batch(
+        {"method": "PUT", "path": "/patient/update_info", "body": {"patient_id": "P001", "name": "Johnny Doe"}},
+        {"method": "PUT", "path": "/patient/update_info", "body": {"patient_id": "NOPE", "name": "Nobody"}},
+    ))
+    assert etag(client, "/patients") == before
@@ -0,0 +1,92 @@
+import pytest
+
+from db_connection.db import get_pool
+from modules.events import ChangeFeed, EventRing, FeedFull
+
+
+@pytest.fixture
+def feed():
+    return ChangeFeed(EventRing(capacity=4), max_subscribers=2)
+
+
+def payloads(subscriber):
+    return [payload for _, payload in subscriber.buffer]
+
+
+def test_subscriber_replays_the_records_after_its_last_event_id(feed):
+    first = feed.publish("patient", "P001", "update", ["name"])
+    feed.publish("patient", "P002", "delete")
+    feed.publish("staff", "D002", "update", ["ward"])
+
+    subscriber = feed.subscribe(feed.ring.event_id(first))
+    assert not subscriber.reset
+    assert payloads(subscriber) == [
+        b'{"entity":"patient","id":"P002","op":"delete"}',
+        b'{"entity":"staff","id":"D002","op":"update","fields":["ward"]}',
+    ]
+
+
+def test_subscriber_without_last_event_id_gets_only_new_records(feed):
+    feed.publish("patient", "P001", "update")
+    subscriber = feed.subscribe()
+    assert not subscriber.buffer and not subscriber.reset
+
+    feed.publish("patient", "P002", "update")
+    feed._dispatch()
+    assert payloads(subscriber) == [b'{"entity":"patient","id":"P002","op":"update"}']
+
+
+@pytest.mark.parametrize("last_event_id", ["lapped", "00000000-1", "garbage"])
+def test_subscriber_gets_a_reset_when_its_id_left_the_ring(feed, last_event_id):
+    first = feed.publish("patient", "P001", "update")
+    for i in range(feed.ring.capacity + 1):
+        feed.publish("patient", f"P{i:03d}", "update")
+    if last_event_id == "lapped":
+        last_event_id = feed.ring.event_id(first)
+
+    subscriber = feed.subscribe(last_event_id)
+    assert subscriber.reset
+    assert not subscriber.buffer
+    reset = next(part for part in feed.stream(subscriber) if "event:" in part)
+    assert reset == f"id: {feed.ring.event_id(feed.ring.head)}\nevent: reset\ndata: {{}}\n\n"
+
+
+def test_feed_refuses_subscribers_above_the_cap(feed):
+    subscribers = [feed.subscribe(), feed.subscribe()]
+    with pytest.raises(FeedFull):
+        feed.subscribe()
+    feed.unsubscribe(subscribers[0])
+    feed.subscribe()
+
+
+def test_events_answers_503_above_the_cap(client, monkeypatch):
+    from modules.events import change_feed
+
+    monkeypatch.setattr(change_feed, "max_subscribers", len(change_feed))
+    response = client.get("/events")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_batch_publishes_only_after_commit(client, monkeypatch):
+    from modules.events import change_feed
+
+    seen = []
+    publish = change_feed.publish
+
+    def record(entity, entity_id, *args, **kwargs):
+        # Read on a connection of its own: it sees only committed rows
+        conn = get_pool().connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM Patient WHERE patient_id = %s", ("P001",))
+        seen.append((entity, entity_id, cursor.fetchone()[0]))
+        conn.close()
+        return publish(entity, entity_id, *args, **kwargs)
+
+    monkeypatch.setattr(change_feed, "publish", record)
+    response = client.post("/batch", json={"operations": [
+        {"method": "PUT", "path": "/patient/update_info", "body": {"patient_id": "P001", "name": "Johnny Doe"}},
+        {"method": "PUT", "path": "/staff/update_info", "body": {"staff_id": "D002", "ward": "ICU"}},
+    ]})
+    assert response.status_code == 200
+    assert seen == [("patient", "P001", "Johnny Doe"), ("staff", "D002", "Johnny Doe")]
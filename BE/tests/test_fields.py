@@ -0,0 +1,53 @@
+import pytest
+
+from modules.query import Page
+from repository import PatientRepository
+
+
+@pytest.mark.parametrize("url", [
+    "/patient?patient_id=P001&fields=name,ssn",
+    "/patients?fields=password",
+    "/staff?staff_id=D002&fields=salary",
+    "/staffs?fields=name,shoe_size",
+    "/users?fields=password",
+    "/patients?fields=,",
+])
+def test_unknown_field_is_400(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("url, key, field", [
+    ("/patient?patient_id=P002", "patient_id", "name"),
+    ("/staff?staff_id=D002", "staff_id", "ward"),
+])
+def test_the_id_is_always_included(client, url, key, field):
+    full = client.get(url).get_json()
+    assert client.get(f"{url}&fields={field}").get_json() == {key: full[key], field: full[field]}
+
+
+def test_list_fields_keep_the_id_for_the_cursor(client):
+    full = client.get("/patients?limit=2").get_json()
+    response = client.get("/patients?fields=gender&limit=2")
+    assert response.get_json() == [{"patient_id": p["patient_id"], "gender": p["gender"]} for p in full]
+    assert response.headers["X-Next-Cursor"] == "P002"
+    assert all(set(user) == {"id", "name"} for user in client.get("/users?fields=name").get_json())
+
+
+def test_patients_are_joined_with_history_only_when_requested():
+    for sql, _ in (PatientRepository.page_query(Page(limit=5), fields=["patient_id", "name"]),
+                   PatientRepository.fields_query(["patient_id", "name"], patient_id="P001")):
+        assert "MedicalHistory" not in sql
+    sql, _ = PatientRepository.page_query(Page(limit=5), fields=["patient_id", "medical_history"])
+    assert "MedicalHistory" in sql
+
+
+def test_patient_sparse_fields_skip_the_history():
+    assert PatientRepository.get_fields(["patient_id", "name"], patient_id="P002") == {"patient_id": "P002", "name": "Jane Smith"}
+
+
+def test_requested_history_is_served(client):
+    patient = client.get("/patient?patient_id=P001&fields=medical_history").get_json()
+    assert set(patient) == {"patient_id", "medical_history"}
+    assert patient["medical_history"]["history_id"] == "H001"
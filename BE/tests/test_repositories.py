@@ -0,0 +1,97 @@
+from modules.query import Page
+from repository import PatientRepository, StaffRepository, UserRepository
+
+
+def test_patient_details_with_history():
+    patient = PatientRepository.get_details(patient_id="P001")
+    assert patient["name"] == "John Doe"
+    assert patient["medical_history"]["history_id"] == "H001"
+    assert patient["medical_history"]["allergies"] == ["Peanuts", "Dust"]
+
+
+def test_patient_details_unknown():
+    assert PatientRepository.get_details(patient_id="NOPE") == "No patient found."
+
+
+def test_patient_pages_follow_the_cursor():
+    first, cursor = PatientRepository.get_page(Page(limit=3))
+    assert [p["patient_id"] for p in first] == ["P001", "P002", "P003"]
+    assert cursor == "P003"
+    second, _ = PatientRepository.get_page(Page(after=cursor, limit=3))
+    assert [p["patient_id"] for p in second] == ["P004", "P005", "P006"]
+
+
+def test_patient_stream_yields_every_patient():
+    assert [p["patient_id"] for p in PatientRepository.stream()] == [f"P{i:03d}" for i in range(1, 11)]
+
+
+def test_add_patient_is_searchable():
+    PatientRepository.add("P100", "Zoe Quinn", "1990-01-01", "123", "Female", "Flu", ["Penicillin", "Mold"])
+    patients, _ = PatientRepository.search_by_allergy("Mold", Page())
+    assert [p["patient_id"] for p in patients] == ["P100"]
+    assert PatientRepository.search_names("quinn")[0]["patient_id"] == "P100"
+
+
+def test_update_fields_reports_missing_patient():
+    assert PatientRepository.update_fields("NOPE", name="Nobody") is False
+
+
+def test_update_fields_reindexes_the_name():
+    assert PatientRepository.update_fields("P001", name="Johnny Walker") is True
+    assert PatientRepository.get_details(patient_id="P001")["name"] == "Johnny Walker"
+    assert PatientRepository.search_names("walker")[0]["patient_id"] == "P001"
+
+
+def test_update_condition_touches_one_history(query, execute):
+    execute("INSERT INTO MedicalHistory (history_id, patient_id, `condition`, allergies) VALUES ('H900', 'P003', 'Old', 'None')")
+
+    assert PatientRepository.update_condition("P003", "Recovered") is True
+    rows = query("SELECT history_id, `condition` FROM MedicalHistory WHERE patient_id = %s ORDER BY history_id", ("P003",))
+    assert rows == [{"history_id": "H003", "condition": "Recovered"}, {"history_id": "H900", "condition": "Old"}]
+    assert PatientRepository.get_details(patient_id="P003")["medical_history"]["condition"] == "Recovered"
+
+
+
+def test_update_condition_reports_missing_history():
+    assert PatientRepository.update_condition("NOPE", "Flu") is False
+
+
+def test_update_allergies_rewrites_the_index(query):
+    assert PatientRepository.update_allergies("P001", ["Latex"]) is True
+    assert query("SELECT allergy FROM PatientAllergy WHERE patient_id = %s", ("P001",)) == [{"allergy": "Latex"}]
+    assert PatientRepository.update_allergies("NOPE", ["Latex"]) is False
+
+
+def test_delete_patient():
+    assert PatientRepository.delete("P010") is True
+    assert PatientRepository.get_details(patient_id="P010") == "No patient found."
+    assert PatientRepository.delete("P010") is False
+
+
+def test_staff_shift_update_rewrites_the_roster():
+    assert StaffRepository.update_fields("D002", ward="General", shift=["Sunday,Day"]) is True
+    assert StaffRepository.get_details("D002")["shift"] == [["Sunday", "Day"]]
+    on_duty, _ = StaffRepository.get_on_duty("Sunday", "Day", Page())
+    assert [s["staff_id"] for s in on_duty] == ["D002"]
+    assert StaffRepository.get_availability("D002") == [["Sunday", "Day"]]
+
+
+def test_staff_update_and_delete_report_missing_rows():
+    assert StaffRepository.update_fields("NOPE", ward="ICU") is False
+    assert StaffRepository.delete("NOPE") is False
+    assert StaffRepository.delete("D003") is True
+    assert not StaffRepository.exists("D003")
+
+
+def test_staff_page_filters():
+    staff, _ = StaffRepository.get_page(Page(), [("role = %s", "Nurse"), ("status = %s", "active")])
+    assert [s["staff_id"] for s in staff] == ["N001", "N002", "N004", "N005"]
+
+
+def test_users_round_trip():
+    UserRepository.add("U100", "nurse@hospital.com", "hash", "Nurse Daisy")
+    assert UserRepository.get_password_hash("U100") == "hash"
+    assert UserRepository.update_fields("U100", name="Nurse Daisy Updated") is True
+    assert UserRepository.get_by_username("nurse@hospital.com")["name"] == "Nurse Daisy Updated"
+    assert UserRepository.delete("U100") is True
+    assert UserRepository.get_credentials("nurse@hospital.com") is None
@@ -0,0 +1,20 @@
+from modules.search import is_word_prefix, query_trigrams
+from repository import PatientRepository
+
+
+def test_query_trigrams_leave_the_last_word_open():
+    assert query_trigrams("jo") == {"  j", " jo"}
+    assert "hn " in query_trigrams("john d")
+
+
+def test_is_word_prefix():
+    assert is_word_prefix("doe", "John Doe")
+    assert is_word_prefix("jo d", "John Doe")
+    assert not is_word_prefix("oe", "John Doe")
+    assert not is_word_prefix("", "John Doe")
+
+
+def test_search_names_ranks_word_prefixes_as_prefix_hits():
+    results = PatientRepository.search_names("doe")
+    assert results[0]["name"] == "John Doe"
+    assert results[0]["score"] == 1.0
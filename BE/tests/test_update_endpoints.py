@@ -0,0 +1,51 @@
+import pytest
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/patient/update_info", {"patient_id": "NOPE", "name": "Nobody"}),
+    ("/patient/update_condition", {"patient_id": "NOPE", "condition": "Flu"}),
+    ("/patient/update_allergies", {"patient_id": "NOPE", "new_allergies": ["Dust"]}),
+    ("/staff/update_info", {"staff_id": "NOPE", "ward": "ICU"}),
+])
+def test_update_of_unknown_id_is_404(client, path, body):
+    assert client.put(path, json=body).status_code == 404
+
+
+def test_delete_of_unknown_patient_is_404(client):
+    assert client.delete("/patient/delete?patient_id=NOPE").status_code == 404
+    assert client.delete("/patient/delete?patient_id=P001").status_code == 200
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/patient/update_info", {"patient_id": "P001", "gender": "Unknown"}),
+    ("/patient/update_info", {"patient_id": "P001", "date_of_birth": "1990-13-40"}),
+    ("/patient/update_condition", {"patient_id": "P001"}),
+    ("/patient/update_allergies", {"patient_id": "P001", "new_allergies": "Dust"}),
+    ("/staff/update_info", {"staff_id": "D002", "role": "Bogus"}),
+    ("/staff/update_info", {"staff_id": "D002", "status": "Bogus"}),
+    ("/staff/update_info", {"staff_id": "D002", "ward": "Nowhere"}),
+    ("/staff/update_info", {"staff_id": "D002", "shift": [["Funday", "Day"]]}),
+])
+def test_invalid_update_is_400_and_writes_nothing(client, path, body):
+    before = client.get("/patient?patient_id=P001").get_json(), client.get("/staff?staff_id=D002").get_json()
+    response = client.put(path, json=body)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert (client.get("/patient?patient_id=P001").get_json(), client.get("/staff?staff_id=D002").get_json()) == before
+
+
+def test_patient_updates_are_applied(client):
+    assert client.put("/patient/update_info", json={"patient_id": "P002", "name": "Jane Doe", "date_of_birth": "1986-01-02"}).status_code == 200
+    assert client.put("/patient/update_condition", json={"patient_id": "P002", "condition": "Recovered"}).status_code == 200
+    assert client.put("/patient/update_allergies", json={"patient_id": "P002", "new_allergies": ["Latex"]}).status_code == 200
+
+    patient = client.get("/patient?patient_id=P002").get_json()
+    assert (patient["name"], patient["date_of_birth"]) == ("Jane Doe", "1986-01-02")
+    assert patient["medical_history"]["condition"] == "Recovered"
+    assert patient["medical_history"]["allergies"] == ["Latex"]
+
+
+def test_staff_update_keeps_the_shift_unless_given(client):
+    assert client.put("/staff/update_info", json={"staff_id": "D002", "ward": "General", "shift": "not changed"}).status_code == 200
+    staff = client.get("/staff?staff_id=D002").get_json()
+    assert (staff["ward"], staff["shift"]) == ("General", [["Tuesday", "Day"], ["Thursday", "Night"]])
@@ -8,7 +8,19 @@ CREATE TABLE IF NOT EXISTS Patient (
     name VARCHAR(100) NOT NULL,
     gender ENUM('Male', 'Female', 'Other'),
     date_of_birth DATE NOT NULL,
-    contact_info VARCHAR(100) NOT NULL
+    contact_info VARCHAR(100) NOT NULL,
+    INDEX idx_patient_name (name),
+    INDEX idx_patient_gender_dob (gender, date_of_birth),
+    INDEX idx_patient_dob (date_of_birth)
+);
+
+-- Trigrams of patient names for typo-tolerant search (filled by the backend)
+CREATE TABLE IF NOT EXISTS PatientNameTrigram (
+    trigram CHAR(3) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+    patient_id VARCHAR(50) NOT NULL,
+    PRIMARY KEY (trigram, patient_id),
+    INDEX idx_trigram_patient (patient_id),
+    FOREIGN KEY (patient_id) REFERENCES Patient(patient_id) ON DELETE CASCADE
 );
 
 -- Create the MedicalHistory table
@@ -20,6 +32,16 @@ CREATE TABLE IF NOT EXISTS MedicalHistory (
     FOREIGN KEY (patient_id) REFERENCES Patient(patient_id) ON DELETE CASCADE
 );
 
+-- Normalized allergies, one row per patient and allergy (indexed for allergy search).
+-- MedicalHistory.allergies stays as the comma-joined display copy.
+CREATE TABLE IF NOT EXISTS PatientAllergy (
+    patient_id VARCHAR(50) NOT NULL,
+    allergy VARCHAR(100) NOT NULL,
+    PRIMARY KEY (patient_id, allergy),
+    INDEX idx_allergy_patient (allergy, patient_id),
+    FOREIGN KEY (patient_id) REFERENCES Patient(patient_id) ON DELETE CASCADE
+);
+
 -- Create the Staff table
 CREATE TABLE IF NOT EXISTS Staff (
     staff_id VARCHAR(50) PRIMARY KEY,
@@ -30,7 +52,20 @@ CREATE TABLE IF NOT EXISTS Staff (
     department VARCHAR(100),
     ward VARCHAR(100),
     status ENUM('active', 'inactive') NOT NULL,
-    shift JSON                     -- Comma-separated shift list
+    shift JSON,                    -- Comma-separated shift list
+    INDEX idx_staff_role_status (role, status),
+    INDEX idx_staff_ward (ward),
+    INDEX idx_staff_department (department)
+);
+
+-- On-duty roster index, one row per (day, shift_type, staff_id) derived from Staff.shift
+CREATE TABLE IF NOT EXISTS StaffShift (
+    day VARCHAR(20) NOT NULL,
+    shift_type VARCHAR(20) NOT NULL,
+    staff_id VARCHAR(50) NOT NULL,
+    PRIMARY KEY (day, shift_type, staff_id),
+    INDEX idx_staffshift_staff (staff_id),
+    FOREIGN KEY (staff_id) REFERENCES Staff(staff_id) ON DELETE CASCADE
 );
 
 CREATE TABLE IF NOT EXISTS Users (
@@ -68,6 +103,16 @@ VALUES
     ('H009', 'P009', 'Anemia', 'Gluten'),
     ('H010', 'P010', 'Chronic Pain', 'Latex');
 
+-- Split the sample allergies into PatientAllergy
+INSERT IGNORE INTO PatientAllergy (patient_id, allergy)
+SELECT h.patient_id, TRIM(j.allergy)
+FROM MedicalHistory h
+JOIN JSON_TABLE(
+    CONCAT('["', REPLACE(REPLACE(h.allergies, '"', '\\"'), ',', '","'), '"]'),
+    '$[*]' COLUMNS (allergy VARCHAR(100) PATH '$')
+) j
+WHERE TRIM(j.allergy) <> '';
+
 -- Insert sample data into Staff table
 -- Insert Doctors
 INSERT INTO Staff (staff_id, name, contact_info, role, status, specialization, department, ward, shift) VALUES
@@ -97,6 +142,16 @@ INSERT INTO Staff (staff_id, name, contact_info, role, status, specialization, d
  '[["Thursday", "Day"], ["Sunday", "Night"]]');
 
 
+-- Build the roster index for the sample staff
+INSERT IGNORE INTO StaffShift (day, shift_type, staff_id)
+SELECT j.day, j.shift_type, s.staff_id
+FROM Staff s
+JOIN JSON_TABLE(
+    s.shift,
+    '$[*]' COLUMNS (day VARCHAR(20) PATH '$[0]', shift_type VARCHAR(20) PATH '$[1]')
+) j
+WHERE j.day IS NOT NULL AND j.shift_type IS NOT NULL;
+
 -- Sample Users (passwords are plaintext examples for readability)
 INSERT INTO Users (id, username, password, name)
 VALUES 